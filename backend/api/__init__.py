@@ -1,5 +1,6 @@
 from .ads import router as ads_router
 from .auto_pricing import router as auto_pricing_router
+from .chats import router as chats_router
 from .credentials import router as credentials_router
 from .info import router as info_router
 from .orders import router as orders_router
@@ -10,6 +11,7 @@ from .fiat_balance_auto_pricing import router as fiat_balance_auto_pricing_route
 __all__ = [
     "ads_router",
     "auto_pricing_router",
+    "chats_router",
     "credentials_router",
     "info_router",
     "orders_router",
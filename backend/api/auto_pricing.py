@@ -1,8 +1,9 @@
 from fastapi import APIRouter, Depends
 
 from auth import get_current_user_id
-from schemas import AutoPricingStatusResponse
-from services.auto_pricing_service import auto_pricing_worker
+from schemas import AutoPricingStatusResponse, SpotFeedStatusResponse
+from services.spot_feed import spot_feed_status
+from services.worker_supervisor import AUTO_PRICING_WORKER, worker_supervisor
 
 router = APIRouter(prefix="/api/auto-pricing", tags=["auto-pricing"])
 
@@ -11,20 +12,27 @@ router = APIRouter(prefix="/api/auto-pricing", tags=["auto-pricing"])
 async def get_auto_pricing_status(
     user_id: str = Depends(get_current_user_id),
 ) -> AutoPricingStatusResponse:
-    return AutoPricingStatusResponse(**auto_pricing_worker.get_status())
+    return AutoPricingStatusResponse(**await worker_supervisor.status(AUTO_PRICING_WORKER))
 
 
 @router.post("/start", response_model=AutoPricingStatusResponse)
 async def start_auto_pricing(
     user_id: str = Depends(get_current_user_id),
 ) -> AutoPricingStatusResponse:
-    await auto_pricing_worker.start()
-    return AutoPricingStatusResponse(**auto_pricing_worker.get_status())
+    await worker_supervisor.set_desired(AUTO_PRICING_WORKER, True)
+    return AutoPricingStatusResponse(**await worker_supervisor.status(AUTO_PRICING_WORKER))
 
 
 @router.post("/stop", response_model=AutoPricingStatusResponse)
 async def stop_auto_pricing(
     user_id: str = Depends(get_current_user_id),
 ) -> AutoPricingStatusResponse:
-    await auto_pricing_worker.stop()
-    return AutoPricingStatusResponse(**auto_pricing_worker.get_status())
+    await worker_supervisor.set_desired(AUTO_PRICING_WORKER, False)
+    return AutoPricingStatusResponse(**await worker_supervisor.status(AUTO_PRICING_WORKER))
+
+
+@router.get("/spot-feed", response_model=SpotFeedStatusResponse)
+async def get_spot_feed_status(
+    user_id: str = Depends(get_current_user_id),
+) -> SpotFeedStatusResponse:
+    return SpotFeedStatusResponse(**spot_feed_status())
@@ -0,0 +1,20 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from auth import get_current_user_id
+from schemas import ChatSearchResponse
+from services.order_processing_service import search_chats
+
+router = APIRouter(prefix="/api/chats", tags=["chats"])
+
+
+@router.get("/search", response_model=ChatSearchResponse)
+async def search(
+    q: str = Query(..., min_length=2),
+    limit: int = Query(200, ge=1, le=1000),
+    user_id: str = Depends(get_current_user_id),
+) -> ChatSearchResponse:
+    try:
+        result = await search_chats(user_id, q, limit)
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
+    return ChatSearchResponse(**result)
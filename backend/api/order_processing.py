@@ -1,29 +1,62 @@
-from fastapi import APIRouter, HTTPException
-
-from schemas import OrderProcessingStatusResponse
-from services.order_processing_service import order_processing_worker
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from auth import get_current_user_id
+from schemas import (
+    OrderProcessingMetricsResponse,
+    OrderProcessingStatusResponse,
+    OrderProcessRequest,
+    OrderProcessResponse,
+)
+from services.order_processing_service import reprocess_order
+from services.worker_supervisor import ORDER_PROCESSING_WORKER, worker_supervisor
 
 router = APIRouter(prefix="/api/order-processing", tags=["order-processing"])
 
 
 @router.get("/status", response_model=OrderProcessingStatusResponse)
 async def get_status() -> OrderProcessingStatusResponse:
-    return OrderProcessingStatusResponse(**order_processing_worker.get_status())
+    return OrderProcessingStatusResponse(**await worker_supervisor.status(ORDER_PROCESSING_WORKER))
+
+
+@router.get("/metrics", response_model=OrderProcessingMetricsResponse)
+async def get_metrics() -> OrderProcessingMetricsResponse:
+    return OrderProcessingMetricsResponse(workers=await worker_supervisor.metrics(ORDER_PROCESSING_WORKER))
 
 
 @router.post("/start", response_model=OrderProcessingStatusResponse)
 async def start_worker() -> OrderProcessingStatusResponse:
     try:
-        await order_processing_worker.start()
+        await worker_supervisor.set_desired(ORDER_PROCESSING_WORKER, True)
     except Exception as exc:
         raise HTTPException(status_code=500, detail=str(exc)) from exc
-    return OrderProcessingStatusResponse(**order_processing_worker.get_status())
+    return OrderProcessingStatusResponse(**await worker_supervisor.status(ORDER_PROCESSING_WORKER))
 
 
 @router.post("/stop", response_model=OrderProcessingStatusResponse)
 async def stop_worker() -> OrderProcessingStatusResponse:
     try:
-        await order_processing_worker.stop()
+        await worker_supervisor.set_desired(ORDER_PROCESSING_WORKER, False)
     except Exception as exc:
         raise HTTPException(status_code=500, detail=str(exc)) from exc
-    return OrderProcessingStatusResponse(**order_processing_worker.get_status())
+    return OrderProcessingStatusResponse(**await worker_supervisor.status(ORDER_PROCESSING_WORKER))
+
+
+@router.post("/orders/{order_id}/process", response_model=OrderProcessResponse)
+async def process_order(
+    order_id: str,
+    payload: OrderProcessRequest,
+    user_id: str = Depends(get_current_user_id),
+) -> OrderProcessResponse:
+    try:
+        await reprocess_order(user_id, payload.credential_id, order_id)
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(exc),
+        ) from exc
+    except TimeoutError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail=str(exc),
+        ) from exc
+    return OrderProcessResponse(order_id=order_id, processed=True)
@@ -1,4 +1,5 @@
 import os
+import socket
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import List
@@ -22,6 +23,15 @@ def _get_list(name: str, fallback: str = "") -> List[str]:
     return [item.strip() for item in raw_value.split(",") if item.strip()]
 
 
+def _get_path(name: str) -> Path | None:
+    raw_value = os.getenv(name)
+    return Path(raw_value) if raw_value else None
+
+
+def _get_bool(name: str, fallback: str = "") -> bool:
+    return os.getenv(name, fallback).strip().lower() in {"1", "true", "yes", "on"}
+
+
 @dataclass(frozen=True)
 class Settings:
     supabase_url: str = _require_env("SUPABASE_URL")
@@ -31,6 +41,48 @@ class Settings:
     credential_check_interval_seconds: int = int(
         os.getenv("CREDENTIAL_CHECK_INTERVAL_SECONDS", "30")
     )
+    order_poll_min_seconds: int = int(os.getenv("ORDER_POLL_MIN_SECONDS", "3"))
+    order_poll_max_seconds: int = int(os.getenv("ORDER_POLL_MAX_SECONDS", "300"))
+    order_list_interval_seconds: int = int(
+        os.getenv("ORDER_LIST_INTERVAL_SECONDS", "30")
+    )
+    order_hot_list_interval_seconds: int = int(
+        os.getenv("ORDER_HOT_LIST_INTERVAL_SECONDS", "5")
+    )
+    order_hot_account_seconds: int = int(
+        os.getenv("ORDER_HOT_ACCOUNT_SECONDS", "900")
+    )
+    worker_sharding: bool = _get_bool("WORKER_SHARDING")
+    worker_id: str = os.getenv("WORKER_ID") or f"{socket.gethostname()}:{os.getpid()}"
+    lease_backend: str = os.getenv("LEASE_BACKEND", "sqlite")
+    lease_sqlite_path: Path = Path(
+        os.getenv("LEASE_SQLITE_PATH", str(Path(__file__).resolve().parent / "worker_leases.sqlite3"))
+    )
+    lease_ttl_seconds: int = int(os.getenv("LEASE_TTL_SECONDS", "90"))
+    chat_store_path: Path = Path(
+        os.getenv("CHAT_STORE_PATH", str(Path(__file__).resolve().parent / "chat_transcripts.sqlite3"))
+    )
+    order_log_spill_path: Path = Path(
+        os.getenv(
+            "ORDER_LOG_SPILL_PATH",
+            str(Path(__file__).resolve().parent / "playground_results" / "order_action_log_spill.jsonl"),
+        )
+    )
+    order_log_dead_letter_path: Path = Path(
+        os.getenv(
+            "ORDER_LOG_DEAD_LETTER_PATH",
+            str(Path(__file__).resolve().parent / "playground_results" / "order_action_log_dead_letter.jsonl"),
+        )
+    )
+    market_book_ttl_seconds: float = float(os.getenv("MARKET_BOOK_TTL_SECONDS", "15"))
+    spot_snapshot_ttl_seconds: float = float(os.getenv("SPOT_SNAPSHOT_TTL_SECONDS", "10"))
+    spot_feed: str = os.getenv("SPOT_FEED", "off")
+    spot_feed_symbols: List[str] = field(default_factory=lambda: _get_list("SPOT_FEED_SYMBOLS"))
+    spot_feed_poll_seconds: float = float(os.getenv("SPOT_FEED_POLL_SECONDS", "5"))
+    spot_feed_max_staleness_seconds: float = float(os.getenv("SPOT_FEED_MAX_STALENESS_SECONDS", "60"))
+    spot_feed_record_path: Path | None = _get_path("SPOT_FEED_RECORD_PATH")
+    spot_feed_replay_path: Path | None = _get_path("SPOT_FEED_REPLAY_PATH")
+    spot_feed_replay_speed: float = float(os.getenv("SPOT_FEED_REPLAY_SPEED", "1"))
     allowed_origins: List[str] = field(
         default_factory=lambda: _get_list("ALLOWED_ORIGINS", "*")
     )
@@ -6,6 +6,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from api import (
     ads_router,
     auto_pricing_router,
+    chats_router,
     credentials_router,
     fiat_balance_router,
     fiat_balance_auto_pricing_router,
@@ -14,15 +15,29 @@ from api import (
     order_processing_router,
 )
 from config import settings
+from repositories.order_state_repository import action_log_writer
 from services.auto_pricing_service import auto_pricing_worker
 from services.fiat_balance_auto_pricing_service import fiat_balance_auto_worker
+from services.order_processing_service import order_processing_worker
 from services.refresh_worker import CredentialRefreshWorker
+from services.worker_supervisor import (
+    AUTO_PRICING_WORKER,
+    CREDENTIAL_REFRESH_WORKER,
+    FIAT_AUTO_PRICING_WORKER,
+    ORDER_PROCESSING_WORKER,
+    worker_supervisor,
+)
 
 logger = logging.getLogger("p2p-panel")
 
 app = FastAPI(title="P2P Panel API")
 refresh_worker = CredentialRefreshWorker()
 
+worker_supervisor.register(CREDENTIAL_REFRESH_WORKER, refresh_worker, default_running=True)
+worker_supervisor.register(AUTO_PRICING_WORKER, auto_pricing_worker, shardable=True)
+worker_supervisor.register(FIAT_AUTO_PRICING_WORKER, fiat_balance_auto_worker, shardable=True)
+worker_supervisor.register(ORDER_PROCESSING_WORKER, order_processing_worker, shardable=True)
+
 if settings.allowed_origins == ["*"]:
     allow_origins = ["*"]
 else:
@@ -40,6 +55,7 @@ app.include_router(info_router)
 app.include_router(credentials_router)
 app.include_router(orders_router)
 app.include_router(order_processing_router)
+app.include_router(chats_router)
 app.include_router(ads_router)
 app.include_router(auto_pricing_router)
 app.include_router(fiat_balance_router)
@@ -48,7 +64,8 @@ app.include_router(fiat_balance_auto_pricing_router)
 
 @app.on_event("startup")
 async def _on_startup() -> None:
-    await refresh_worker.start()
+    await action_log_writer.start()
+    await worker_supervisor.start()
     if allow_origins == ["*"]:
         logger.warning(
             "CORS is set to allow all origins with credentials; set ALLOWED_ORIGINS to explicit values for local dev."
@@ -57,9 +74,8 @@ async def _on_startup() -> None:
 
 @app.on_event("shutdown")
 async def _on_shutdown() -> None:
-    await refresh_worker.stop()
-    await auto_pricing_worker.stop()
-    await fiat_balance_auto_worker.stop()
+    await worker_supervisor.stop()
+    await action_log_writer.stop()
 
 
 @app.middleware("http")
@@ -0,0 +1,189 @@
+import asyncio
+import contextlib
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger("p2p-panel")
+
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_FLUSH_INTERVAL_SECONDS = 2.0
+# Failed single-row inserts (while other rows go through) before a row moves to the dead-letter file.
+MAX_WRITE_ATTEMPTS = 3
+
+# (failed attempts, record); spilled rows carry their attempt count across flushes.
+_Entry = Tuple[int, Dict[str, Any]]
+
+
+class BufferedLogWriter:
+    def __init__(
+        self,
+        insert_fn: Callable[[List[Dict[str, Any]]], None],
+        *,
+        spill_path: Path,
+        dead_letter_path: Optional[Path] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        flush_interval_seconds: float = DEFAULT_FLUSH_INTERVAL_SECONDS,
+    ) -> None:
+        self.insert_fn = insert_fn
+        self.spill_path = spill_path
+        self.dead_letter_path = dead_letter_path or spill_path.with_name(f"{spill_path.stem}_dead_letter{spill_path.suffix}")
+        self.batch_size = batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self._buffer: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def submit(self, record: Dict[str, Any]) -> None:
+        with self._lock:
+            self._buffer.append(record)
+            full = len(self._buffer) >= self.batch_size
+        if not self.is_running:
+            # No background loop (CLI tools, scripts): write through, replaying earlier spills first.
+            self.flush()
+            return
+        if full and self._loop and self._wake:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    async def start(self) -> None:
+        if self.is_running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        await asyncio.to_thread(self.flush)
+
+    async def _run(self) -> None:
+        while True:
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval_seconds)
+            self._wake.clear()
+            try:
+                await asyncio.to_thread(self.flush)
+            except Exception as exc:  # pragma: no cover - background guard
+                logger.exception("Buffered log flush failed: %s", exc)
+
+    def flush(self) -> int:
+        with self._flush_lock:
+            with self._lock:
+                batch, self._buffer = self._buffer, []
+            entries = self._take_spilled() + [(0, record) for record in batch]
+            if not entries:
+                return 0
+            return self._write(entries)
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._buffer)
+
+    def _write(self, entries: List[_Entry]) -> int:
+        # Rows that already failed are chunked last and apart, so fresh chunks show whether the store is reachable.
+        fresh = [entry for entry in entries if entry[0] == 0]
+        suspect = [entry for entry in entries if entry[0] > 0]
+        chunks = [fresh[i : i + self.batch_size] for i in range(0, len(fresh), self.batch_size)]
+        chunks += [suspect[i : i + self.batch_size] for i in range(0, len(suspect), self.batch_size)]
+        written = 0
+        failed: List[_Entry] = []
+        consecutive_failures = 0
+        for index, chunk in enumerate(chunks):
+            try:
+                self.insert_fn([record for _, record in chunk])
+            except Exception as exc:  # pragma: no cover - network/database error
+                failed.extend(chunk)
+                consecutive_failures += 1
+                if not written and consecutive_failures > 1:
+                    # Nothing gets through: treat it as an outage and keep everything for the next flush.
+                    rest = [entry for later in chunks[index + 1 :] for entry in later]
+                    logger.warning(
+                        "Bulk insert failed, spilling %s rows to %s: %s",
+                        len(failed) + len(rest),
+                        self.spill_path,
+                        exc,
+                    )
+                    self._spill(failed + rest)
+                    return written
+                logger.warning("Bulk insert failed for %s rows: %s", len(chunk), exc)
+                continue
+            consecutive_failures = 0
+            written += len(chunk)
+        if failed:
+            if written:
+                written += self._isolate(failed)
+            else:
+                self._spill(failed)
+        return written
+
+    def _isolate(self, failed: List[_Entry]) -> int:
+        """Retry failed chunks row by row; rows that keep failing go to the dead-letter file."""
+        written = 0
+        retry: List[_Entry] = []
+        dead: List[_Entry] = []
+        for attempts, record in failed:
+            try:
+                self.insert_fn([record])
+            except Exception:  # pragma: no cover - network/database error
+                attempts += 1
+                (dead if attempts >= MAX_WRITE_ATTEMPTS else retry).append((attempts, record))
+                continue
+            written += 1
+        if retry:
+            logger.warning("Spilling %s rejected log rows to %s", len(retry), self.spill_path)
+            self._spill(retry)
+        if dead:
+            logger.error("Moving %s log rows to dead-letter file %s", len(dead), self.dead_letter_path)
+            self._append(self.dead_letter_path, dead)
+        return written
+
+    def _spill(self, entries: List[_Entry]) -> None:
+        self._append(self.spill_path, entries)
+
+    def _append(self, path: Path, entries: List[_Entry]) -> None:
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with path.open("a", encoding="utf-8") as fh:
+                for attempts, record in entries:
+                    line = {"attempts": attempts, "record": record}
+                    fh.write(json.dumps(line, ensure_ascii=False, default=str) + "\n")
+        except Exception as exc:  # pragma: no cover - disk failure
+            logger.error("Failed to write %s log rows to %s: %s", len(entries), path, exc)
+
+    def _take_spilled(self) -> List[_Entry]:
+        if not self.spill_path.exists():
+            return []
+        entries: List[_Entry] = []
+        try:
+            with self.spill_path.open("r", encoding="utf-8") as fh:
+                for line in fh:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    with contextlib.suppress(ValueError):
+                        entries.append(_parse_spilled(json.loads(line)))
+            self.spill_path.unlink()
+        except Exception as exc:  # pragma: no cover - disk failure
+            logger.error("Failed to read spilled log rows: %s", exc)
+            return []
+        return entries
+
+
+def _parse_spilled(item: Any) -> _Entry:
+    if isinstance(item, dict) and set(item) == {"attempts", "record"}:
+        return int(item["attempts"] or 0), item["record"]
+    # Spill files written before attempts were tracked hold bare records.
+    return 0, item
@@ -0,0 +1,194 @@
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Local copy of order chats plus an inverted index (kind, value) -> (order, message).
+# kind is "iban", "phone" or "name"; name rows point at message_id 0 (the order itself).
+_SCHEMA = (
+    "create table if not exists chat_messages ("
+    " order_id text not null, message_id integer not null, account_id text, content_type text,"
+    " message text, create_date integer, primary key (order_id, message_id))",
+    "create table if not exists chat_orders ("
+    " order_id text primary key, credential_id text, cursor integer, synced_at real)",
+    "create table if not exists chat_contacts ("
+    " kind text not null, value text not null, order_id text not null, message_id integer not null,"
+    " primary key (kind, value, order_id, message_id))",
+    "create index if not exists chat_contacts_order on chat_contacts (order_id)",
+)
+
+
+def _as_int(value: Any) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class ChatTranscriptStore:
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self._init_lock = threading.Lock()
+        self._ready = False
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._ready:
+            with self._init_lock:
+                if not self._ready:
+                    self.path.parent.mkdir(parents=True, exist_ok=True)
+                    conn = sqlite3.connect(self.path, timeout=10)
+                    with conn:
+                        conn.execute("pragma journal_mode=wal")
+                        for statement in _SCHEMA:
+                            conn.execute(statement)
+                    conn.close()
+                    self._ready = True
+        return sqlite3.connect(self.path, timeout=10)
+
+    def cursor(self, order_id: str) -> Optional[int]:
+        conn = self._connect()
+        try:
+            row = conn.execute("select cursor from chat_orders where order_id = ?", (order_id,)).fetchone()
+        finally:
+            conn.close()
+        return row[0] if row else None
+
+    def append(
+        self,
+        order_id: str,
+        items: Sequence[Dict[str, Any]],
+        contacts: Sequence[Tuple[Iterable[str], Iterable[str]]],
+        *,
+        cursor: Optional[int],
+        credential_id: str = "",
+    ) -> None:
+        """Store new messages with their (ibans, phones) and move the order's sync cursor forward."""
+        message_rows = []
+        contact_rows = []
+        for item, (ibans, phones) in zip(items, contacts):
+            message_id = _as_int(item.get("id"))
+            if message_id is None:
+                continue
+            message_rows.append(
+                (
+                    order_id,
+                    message_id,
+                    str(item.get("accountId") or ""),
+                    str(item.get("contentType") or "str"),
+                    str(item.get("message") or ""),
+                    _as_int(item.get("createDate")),
+                )
+            )
+            contact_rows.extend(("iban", value, order_id, message_id) for value in ibans)
+            contact_rows.extend(("phone", value, order_id, message_id) for value in phones)
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany("insert or ignore into chat_messages values (?, ?, ?, ?, ?, ?)", message_rows)
+                conn.executemany("insert or ignore into chat_contacts values (?, ?, ?, ?)", contact_rows)
+                conn.execute(
+                    "insert into chat_orders (order_id, credential_id, cursor, synced_at) values (?, ?, ?, ?) "
+                    "on conflict(order_id) do update set "
+                    " credential_id = coalesce(nullif(excluded.credential_id, ''), chat_orders.credential_id),"
+                    " cursor = max(coalesce(chat_orders.cursor, 0), coalesce(excluded.cursor, 0)),"
+                    " synced_at = excluded.synced_at",
+                    (order_id, credential_id, cursor, time.time()),
+                )
+        finally:
+            conn.close()
+
+    def index_names(self, order_id: str, names: Iterable[str], credential_id: str = "") -> None:
+        tokens = {token for name in names for token in tokenize_name(name)}
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany(
+                    "insert or ignore into chat_contacts values ('name', ?, ?, 0)",
+                    [(token, order_id) for token in tokens],
+                )
+                conn.execute(
+                    "insert into chat_orders (order_id, credential_id) values (?, ?) "
+                    "on conflict(order_id) do update set "
+                    " credential_id = coalesce(nullif(excluded.credential_id, ''), chat_orders.credential_id)",
+                    (order_id, credential_id),
+                )
+        finally:
+            conn.close()
+
+    def messages(self, order_id: str) -> List[Dict[str, Any]]:
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "select message_id, account_id, content_type, message, create_date from chat_messages "
+                "where order_id = ? order by message_id",
+                (order_id,),
+            ).fetchall()
+        finally:
+            conn.close()
+        return [
+            {
+                "id": str(message_id),
+                "orderId": order_id,
+                "accountId": account_id,
+                "contentType": content_type,
+                "message": message,
+                "createDate": str(create_date) if create_date is not None else None,
+            }
+            for message_id, account_id, content_type, message, create_date in rows
+        ]
+
+    def search(
+        self,
+        kind: str,
+        values: Sequence[str],
+        *,
+        credential_ids: Optional[Sequence[str]] = None,
+        limit: int = 200,
+    ) -> List[Dict[str, Any]]:
+        """Hits for ``kind``; for names every value (token) has to match the same order."""
+        if not values:
+            return []
+        params: List[Any] = [kind, *values]
+        placeholders = ", ".join("?" for _ in values)
+        having = f"having count(distinct c.value) = {len(set(values))}" if kind == "name" else ""
+        scope = ""
+        if credential_ids is not None:
+            if not credential_ids:
+                return []
+            scope = f"and o.credential_id in ({', '.join('?' for _ in credential_ids)})"
+            params.extend(credential_ids)
+        params.append(limit)
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "select h.order_id, h.credential_id, h.matched, h.message_id, m.message, m.create_date from ("
+                " select c.order_id, o.credential_id, group_concat(distinct c.value) as matched,"
+                "  max(c.message_id) as message_id"
+                " from chat_contacts c join chat_orders o on o.order_id = c.order_id"
+                f" where c.kind = ? and c.value in ({placeholders}) {scope}"
+                f" group by c.order_id, o.credential_id {having}"
+                " order by max(c.message_id) desc limit ?) h"
+                " left join chat_messages m on m.order_id = h.order_id and m.message_id = h.message_id"
+                " order by h.message_id desc",
+                params,
+            ).fetchall()
+        finally:
+            conn.close()
+        return [
+            {
+                "order_id": order_id,
+                "credential_id": credential_id or "",
+                "kind": kind,
+                "values": sorted(str(matched or "").split(",")) if matched else [],
+                "message_id": str(message_id) if message_id else None,
+                "message": message,
+                "create_date": str(create_date) if create_date is not None else None,
+            }
+            for order_id, credential_id, matched, message_id, message, create_date in rows
+        ]
+
+
+def tokenize_name(name: str) -> List[str]:
+    cleaned = "".join(ch if ch.isalpha() else " " for ch in str(name or "")).casefold()
+    return [token for token in cleaned.split() if len(token) > 1]
@@ -0,0 +1,194 @@
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+TABLE_NAME = "worker_leases"
+
+# Supabase/Postgres table backing SupabaseLeaseStore:
+#   create table worker_leases (
+#       name text primary key,
+#       owner text not null,
+#       expires_at double precision not null
+#   );
+# expires_at is a unix timestamp so all stores compare the same way.
+
+
+class LeaseStore(ABC):
+    """Named leases with an owner and an expiry; a lease held by someone else blocks until it expires."""
+
+    @abstractmethod
+    def acquire(self, name: str, owner: str, ttl_seconds: float) -> bool:
+        ...
+
+    @abstractmethod
+    def release(self, name: str, owner: str) -> None:
+        ...
+
+    @abstractmethod
+    def holders(self, prefix: str) -> Dict[str, str]:
+        """Live leases whose name starts with ``prefix``, as ``{name: owner}``."""
+
+    def owner(self, name: str) -> Optional[str]:
+        return self.holders(name).get(name)
+
+
+class MemoryLeaseStore(LeaseStore):
+    def __init__(self) -> None:
+        self._leases: Dict[str, Tuple[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, name: str, owner: str, ttl_seconds: float) -> bool:
+        now = time.time()
+        with self._lock:
+            current = self._leases.get(name)
+            if current and current[0] != owner and current[1] > now:
+                return False
+            self._leases[name] = (owner, now + ttl_seconds)
+            return True
+
+    def release(self, name: str, owner: str) -> None:
+        with self._lock:
+            current = self._leases.get(name)
+            if current and current[0] == owner:
+                self._leases.pop(name, None)
+
+    def holders(self, prefix: str) -> Dict[str, str]:
+        now = time.time()
+        with self._lock:
+            return {
+                name: lease_owner
+                for name, (lease_owner, expires_at) in self._leases.items()
+                if name.startswith(prefix) and expires_at > now
+            }
+
+
+class SQLiteLeaseStore(LeaseStore):
+    """Shared by every process on one host; BEGIN IMMEDIATE makes acquire an atomic compare-and-set."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                f"create table if not exists {TABLE_NAME} "
+                "(name text primary key, owner text not null, expires_at real not null)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        conn.execute("pragma journal_mode=wal")
+        return conn
+
+    def acquire(self, name: str, owner: str, ttl_seconds: float) -> bool:
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("begin immediate")
+            row = conn.execute(f"select owner, expires_at from {TABLE_NAME} where name = ?", (name,)).fetchone()
+            if row and row[0] != owner and row[1] > now:
+                conn.execute("rollback")
+                return False
+            conn.execute(
+                f"insert into {TABLE_NAME} (name, owner, expires_at) values (?, ?, ?) "
+                "on conflict(name) do update set owner = excluded.owner, expires_at = excluded.expires_at",
+                (name, owner, now + ttl_seconds),
+            )
+            conn.execute("commit")
+            return True
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("rollback")
+            raise
+        finally:
+            conn.close()
+
+    def release(self, name: str, owner: str) -> None:
+        conn = self._connect()
+        try:
+            conn.execute(f"delete from {TABLE_NAME} where name = ? and owner = ?", (name, owner))
+        finally:
+            conn.close()
+
+    def holders(self, prefix: str) -> Dict[str, str]:
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                f"select name, owner from {TABLE_NAME} where substr(name, 1, ?) = ? and expires_at > ?",
+                (len(prefix), prefix, time.time()),
+            ).fetchall()
+        finally:
+            conn.close()
+        return {name: lease_owner for name, lease_owner in rows}
+
+
+class SupabaseLeaseStore(LeaseStore):
+    """Postgres-backed leases for processes on different hosts.
+
+    Takeover of an expired lease is an UPDATE filtered on the old owner and expiry,
+    so two processes racing for the same lease cannot both win.
+    """
+
+    def __init__(self, client=None) -> None:
+        if client is None:
+            from supabase_client import supabase as client
+        self.client = client
+
+    def _table(self):
+        return self.client.table(TABLE_NAME)
+
+    def acquire(self, name: str, owner: str, ttl_seconds: float) -> bool:
+        now = time.time()
+        expires_at = now + ttl_seconds
+        rows = self._table().select("owner, expires_at").eq("name", name).limit(1).execute().data or []
+        if not rows:
+            try:
+                self._table().insert({"name": name, "owner": owner, "expires_at": expires_at}).execute()
+                return True
+            except Exception:
+                # Someone inserted first; fall through and treat it as a held lease.
+                return False
+        current = rows[0]
+        if current.get("owner") != owner and float(current.get("expires_at") or 0) > now:
+            return False
+        response = (
+            self._table()
+            .update({"owner": owner, "expires_at": expires_at})
+            .eq("name", name)
+            .eq("owner", current.get("owner"))
+            .eq("expires_at", current.get("expires_at"))
+            .execute()
+        )
+        return bool(response.data)
+
+    def release(self, name: str, owner: str) -> None:
+        self._table().delete().eq("name", name).eq("owner", owner).execute()
+
+    def holders(self, prefix: str) -> Dict[str, str]:
+        rows = (
+            self._table()
+            .select("name, owner")
+            .like("name", f"{prefix}%")
+            .gt("expires_at", time.time())
+            .execute()
+            .data
+            or []
+        )
+        return {str(row.get("name")): str(row.get("owner")) for row in rows}
+
+
+def create_lease_store(backend: str, sqlite_path: Path) -> LeaseStore:
+    backend = (backend or "").strip().lower()
+    if backend == "memory":
+        return MemoryLeaseStore()
+    if backend == "supabase":
+        return SupabaseLeaseStore()
+    if backend == "sqlite":
+        return SQLiteLeaseStore(sqlite_path)
+    raise ValueError(f"Unknown lease backend: {backend}")
+
+
+def live_owners(store: LeaseStore, prefix: str) -> List[str]:
+    return sorted(set(store.holders(prefix).values()))
@@ -1,5 +1,7 @@
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
+from config import settings
+from repositories.buffered_writer import BufferedLogWriter
 from supabase_client import supabase
 
 ORDER_STATE_TABLE = "order_state"
@@ -18,12 +20,31 @@ def fetch_state(order_id: str) -> Optional[Dict[str, Any]]:
     return items[0] if items else None
 
 
+def fetch_states(order_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    ids = [order_id for order_id in order_ids if order_id]
+    if not ids:
+        return {}
+    response = (
+        supabase.table(ORDER_STATE_TABLE)
+        .select("*")
+        .in_("order_id", ids)
+        .execute()
+    )
+    return {str(item.get("order_id")): item for item in response.data or []}
+
+
 def upsert_state(record: Dict[str, Any]) -> Dict[str, Any]:
     response = supabase.table(ORDER_STATE_TABLE).upsert(record).execute()
     data = response.data or []
     return data[0] if data else record
 
 
+def upsert_states(records: List[Dict[str, Any]]) -> None:
+    if not records:
+        return
+    supabase.table(ORDER_STATE_TABLE).upsert(records).execute()
+
+
 def update_flags(order_id: str, **flags: Any) -> None:
     payload = {key: value for key, value in flags.items() if value is not None}
     if not payload:
@@ -48,4 +69,17 @@ def log_action(
         "response": response or {},
         "status": status or "success",
     }
-    supabase.table(ORDER_LOG_TABLE).insert(record).execute()
+    action_log_writer.submit(record)
+
+
+def insert_actions(records: List[Dict[str, Any]]) -> None:
+    if not records:
+        return
+    supabase.table(ORDER_LOG_TABLE).insert(records).execute()
+
+
+action_log_writer = BufferedLogWriter(
+    insert_actions,
+    spill_path=settings.order_log_spill_path,
+    dead_letter_path=settings.order_log_dead_letter_path,
+)
@@ -0,0 +1,259 @@
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+TABLE_NAME = "worker_state"
+STATUS_TABLE_NAME = "worker_status"
+# Rows of runners that stopped publishing (restarted processes get a new worker id) are dropped after this.
+STATUS_RETENTION_SECONDS = 86400
+
+# Supabase/Postgres tables backing SupabaseWorkerStateStore:
+#   create table worker_state (
+#       name text primary key,
+#       desired_running boolean,
+#       config jsonb
+#   );
+#   create table worker_status (
+#       name text not null,
+#       owner text not null,
+#       status jsonb,
+#       metrics jsonb,
+#       updated_at double precision not null,
+#       primary key (name, owner)
+#   );
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, default=str)
+
+
+class WorkerStateStore(ABC):
+    """What each worker type should be doing (set by the API) and what its runner last reported."""
+
+    @abstractmethod
+    def set_desired(self, name: str, running: bool, config: Optional[Dict[str, Any]] = None) -> None:
+        ...
+
+    @abstractmethod
+    def desired(self, name: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def publish_status(
+        self,
+        name: str,
+        owner: str,
+        status: Dict[str, Any],
+        metrics: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """Status (and metrics, if the worker keeps any) reported by one runner; rows are kept per owner."""
+
+    @abstractmethod
+    def statuses(self, name: str) -> List[Dict[str, Any]]:
+        """Every runner's last report as ``{"owner", "status", "metrics", "updated_at"}``."""
+
+
+class MemoryWorkerStateStore(WorkerStateStore):
+    def __init__(self) -> None:
+        self._desired: Dict[str, Dict[str, Any]] = {}
+        self._status: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def set_desired(self, name: str, running: bool, config: Optional[Dict[str, Any]] = None) -> None:
+        with self._lock:
+            previous = self._desired.get(name) or {}
+            self._desired[name] = {
+                "running": running,
+                "config": config if config is not None else previous.get("config"),
+            }
+
+    def desired(self, name: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            value = self._desired.get(name)
+            return dict(value) if value else None
+
+    def publish_status(
+        self,
+        name: str,
+        owner: str,
+        status: Dict[str, Any],
+        metrics: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        # Round-trip through JSON so callers see the same shape as from the shared stores.
+        now = time.time()
+        row = {
+            "owner": owner,
+            "status": json.loads(_dumps(status)),
+            "metrics": json.loads(_dumps(metrics)) if metrics is not None else None,
+            "updated_at": now,
+        }
+        with self._lock:
+            self._status[(name, owner)] = row
+            for key, value in list(self._status.items()):
+                if now - value["updated_at"] > STATUS_RETENTION_SECONDS:
+                    self._status.pop(key, None)
+
+    def statuses(self, name: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [dict(value) for (row_name, _), value in self._status.items() if row_name == name]
+
+
+class SQLiteWorkerStateStore(WorkerStateStore):
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                f"create table if not exists {TABLE_NAME} ("
+                "name text primary key, desired_running integer, config text)"
+            )
+            conn.execute(
+                f"create table if not exists {STATUS_TABLE_NAME} ("
+                "name text not null, owner text not null, status text, metrics text, "
+                "updated_at real not null, primary key (name, owner))"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        conn.execute("pragma journal_mode=wal")
+        return conn
+
+    def set_desired(self, name: str, running: bool, config: Optional[Dict[str, Any]] = None) -> None:
+        conn = self._connect()
+        try:
+            conn.execute(
+                f"insert into {TABLE_NAME} (name, desired_running, config) values (?, ?, ?) "
+                "on conflict(name) do update set desired_running = excluded.desired_running, "
+                "config = coalesce(excluded.config, config)",
+                (name, int(running), _dumps(config) if config is not None else None),
+            )
+        finally:
+            conn.close()
+
+    def desired(self, name: str) -> Optional[Dict[str, Any]]:
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                f"select desired_running, config from {TABLE_NAME} where name = ?", (name,)
+            ).fetchone()
+        finally:
+            conn.close()
+        if not row or row[0] is None:
+            return None
+        return {"running": bool(row[0]), "config": json.loads(row[1]) if row[1] else None}
+
+    def publish_status(
+        self,
+        name: str,
+        owner: str,
+        status: Dict[str, Any],
+        metrics: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute(
+                f"insert into {STATUS_TABLE_NAME} (name, owner, status, metrics, updated_at) values (?, ?, ?, ?, ?) "
+                "on conflict(name, owner) do update set status = excluded.status, "
+                "metrics = excluded.metrics, updated_at = excluded.updated_at",
+                (name, owner, _dumps(status), _dumps(metrics) if metrics is not None else None, now),
+            )
+            conn.execute(
+                f"delete from {STATUS_TABLE_NAME} where updated_at < ?", (now - STATUS_RETENTION_SECONDS,)
+            )
+        finally:
+            conn.close()
+
+    def statuses(self, name: str) -> List[Dict[str, Any]]:
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                f"select owner, status, metrics, updated_at from {STATUS_TABLE_NAME} where name = ?", (name,)
+            ).fetchall()
+        finally:
+            conn.close()
+        return [
+            {
+                "owner": owner,
+                "status": json.loads(status) if status else {},
+                "metrics": json.loads(metrics) if metrics else None,
+                "updated_at": updated_at,
+            }
+            for owner, status, metrics, updated_at in rows
+        ]
+
+
+class SupabaseWorkerStateStore(WorkerStateStore):
+    def __init__(self, client=None) -> None:
+        if client is None:
+            from supabase_client import supabase as client
+        self.client = client
+
+    def _table(self):
+        return self.client.table(TABLE_NAME)
+
+    def set_desired(self, name: str, running: bool, config: Optional[Dict[str, Any]] = None) -> None:
+        record: Dict[str, Any] = {"name": name, "desired_running": running}
+        if config is not None:
+            record["config"] = config
+        self._table().upsert(record, on_conflict="name").execute()
+
+    def desired(self, name: str) -> Optional[Dict[str, Any]]:
+        rows = self._table().select("desired_running, config").eq("name", name).limit(1).execute().data or []
+        if not rows or rows[0].get("desired_running") is None:
+            return None
+        return {"running": bool(rows[0]["desired_running"]), "config": rows[0].get("config")}
+
+    def publish_status(
+        self,
+        name: str,
+        owner: str,
+        status: Dict[str, Any],
+        metrics: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        now = time.time()
+        self.client.table(STATUS_TABLE_NAME).upsert(
+            {
+                "name": name,
+                "owner": owner,
+                "status": json.loads(_dumps(status)),
+                "metrics": json.loads(_dumps(metrics)) if metrics is not None else None,
+                "updated_at": now,
+            },
+            on_conflict="name,owner",
+        ).execute()
+        self.client.table(STATUS_TABLE_NAME).delete().lt("updated_at", now - STATUS_RETENTION_SECONDS).execute()
+
+    def statuses(self, name: str) -> List[Dict[str, Any]]:
+        rows = (
+            self.client.table(STATUS_TABLE_NAME)
+            .select("owner, status, metrics, updated_at")
+            .eq("name", name)
+            .execute()
+            .data
+            or []
+        )
+        return [
+            {
+                "owner": row.get("owner"),
+                "status": row.get("status") or {},
+                "metrics": row.get("metrics"),
+                "updated_at": row.get("updated_at"),
+            }
+            for row in rows
+        ]
+
+
+def create_worker_state_store(backend: str, sqlite_path: Path) -> WorkerStateStore:
+    backend = (backend or "").strip().lower()
+    if backend == "memory":
+        return MemoryWorkerStateStore()
+    if backend == "supabase":
+        return SupabaseWorkerStateStore()
+    if backend == "sqlite":
+        return SQLiteWorkerStateStore(sqlite_path)
+    raise ValueError(f"Unknown worker state backend: {backend}")
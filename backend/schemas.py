@@ -122,6 +122,14 @@ class AutoPricingAdSummary(BaseModel):
     suggested_buy_qty: Optional[float] = None
 
 
+class WorkerRunStatus(BaseModel):
+    running: bool
+    last_run_at: Optional[datetime] = None
+    last_success_at: Optional[datetime] = None
+    last_error: Optional[str] = None
+    updated_at: Optional[float] = None
+
+
 class AutoPricingStatusResponse(BaseModel):
     running: bool
     interval_seconds: int
@@ -131,6 +139,26 @@ class AutoPricingStatusResponse(BaseModel):
     ads: List[AutoPricingAdSummary]
     sell_enabled: Optional[bool] = None
     buy_enabled: Optional[bool] = None
+    workers: Dict[str, WorkerRunStatus] = {}
+
+
+class SpotStaleness(BaseModel):
+    feed_source: Optional[str] = None
+    snapshot_age_seconds: Optional[float] = None
+    last_change_age_seconds: Optional[float] = None
+    max_age_seconds: Optional[float] = None
+    symbols: Dict[str, Optional[float]] = {}
+
+
+class SpotFeedStatusResponse(BaseModel):
+    source: str
+    running: bool
+    started_at: Optional[datetime] = None
+    last_message_at: Optional[datetime] = None
+    last_error: Optional[str] = None
+    messages: int = 0
+    rest_fetches: int = 0
+    staleness: SpotStaleness
 
 
 class OrderProcessingStatusResponse(BaseModel):
@@ -139,6 +167,64 @@ class OrderProcessingStatusResponse(BaseModel):
     last_run_at: Optional[datetime]
     last_success_at: Optional[datetime]
     last_error: Optional[str]
+    workers: Dict[str, WorkerRunStatus] = {}
+
+
+class LatencyStats(BaseModel):
+    count: int
+    errors: int
+    total_ms: float
+    p50_ms: float
+    p90_ms: float
+    p99_ms: float
+    max_ms: float
+    buckets: Dict[str, int]
+
+
+class CycleStats(LatencyStats):
+    orders_total: int
+    orders_per_cycle: float
+    orders_per_minute: float
+
+
+class OrderProcessingWorkerMetrics(BaseModel):
+    window_seconds: int
+    stages: Dict[str, LatencyStats]
+    endpoints: Dict[str, LatencyStats]
+    cycles: CycleStats
+    details_cache: Dict[str, int]
+    outbox_pending: int
+    updated_at: Optional[float] = None
+
+
+class OrderProcessingMetricsResponse(BaseModel):
+    # Keyed by worker id; each sharded runner reports its own window.
+    workers: Dict[str, OrderProcessingWorkerMetrics]
+
+
+class OrderProcessRequest(BaseModel):
+    credential_id: str
+
+
+class OrderProcessResponse(BaseModel):
+    order_id: str
+    processed: bool
+
+
+class ChatSearchHit(BaseModel):
+    order_id: str
+    credential_id: str
+    kind: str
+    values: List[str]
+    message_id: Optional[str] = None
+    message: Optional[str] = None
+    create_date: Optional[str] = None
+
+
+class ChatSearchResponse(BaseModel):
+    query: str
+    kind: str
+    hits: List[ChatSearchHit]
 
 
 class AdToggleAutoRequest(BaseModel):
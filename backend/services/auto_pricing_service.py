@@ -1,10 +1,10 @@
 import asyncio
 import contextlib
 import logging
+from dataclasses import dataclass
 from datetime import datetime
 from typing import Any, Dict, List, Optional, Tuple
 
-import requests
 import math
 from pathlib import Path
 import json
@@ -13,6 +13,9 @@ from exchanges import create_exchange_client
 from services.ads_service import _build_update_payload, _load_bybit_ads
 from services.credentials_service import build_exchange_credentials
 from repositories.credentials_repository import fetch_all_credentials
+from services.sharding import owned_credentials, release_shard
+from services.spot_feed import release_spot_feed, retain_spot_feed
+from services.spot_snapshot import spot_snapshot
 from tools.auto_pricing import (
     AUTO_MARKER,
     AUTO_PAUSED_MARKER,
@@ -24,17 +27,23 @@ from tools.auto_pricing import (
 
 logger = logging.getLogger("p2p-panel")
 
-SPOT_TICKERS_URL = "https://api.bybit.com/v5/market/tickers"
 MIN_SELL_BALANCE = {"BTC": 0.00005, "ETH": 0.001}
 FALLBACK_SELL_MULTIPLIER = {"BTC": 1.28, "ETH": 1.28, "USDT": 1.19, "USDC": 1.19}
 FALLBACK_BUY_MULTIPLIER = {"BTC": 0.72, "ETH": 0.72, "USDT": 0.81, "USDC": 0.81}
 GUARDRAIL_PCT = {"BTC": 0.05, "ETH": 0.05, "USDT": 0.008, "USDC": 0.02}
 TOKEN_PRECISION = {"BTC": 8, "ETH": 8, "USDT": 4, "USDC": 4}
 PRICE_PRECISION = 2
+AUTO_PRICING_SHARD_GROUP = "auto_pricing"
 SNAPSHOT_PATH = Path("playground_results/auto_pricing_cycle.json")
 _snapshot_written = False
 BUY_FIXED_QTY = {"BTC": 0.25, "ETH": 16.0, "USDT": 49000.0, "USDC": 49000.0}
 
+# An ad is re-priced only when its market prefix (the top PRICING_TOP_N competitors, extended
+# through the group the pick comes from) or its own inputs move, and at least every
+# PRICING_FORCE_EVERY_CYCLES cycles regardless.
+PRICING_TOP_N = 10
+PRICING_FORCE_EVERY_CYCLES = 10
+
 # True  — ставати в рівень з конкурентом
 # False — обганяти конкурента на один крок (0.01)
 MATCH_COMPETITOR_PRICE = True
@@ -78,6 +87,82 @@ def _summarize_price_groups(groups: List[List[Dict[str, Any]]]) -> List[Dict[str
     return summary
 
 
+@dataclass
+class _AdEvaluation:
+    fingerprint: Tuple[Any, ...]
+    # How many raw competitors the fingerprint covers.
+    depth: int
+    status: Dict[str, Any]
+    reserved_price: Optional[float]
+    skipped: int = 0
+
+
+_evaluations: Dict[str, _AdEvaluation] = {}
+
+
+def _selection_depth(token: str, groups: List[List[Dict[str, Any]]], comps_count: int) -> int:
+    """How many leading competitors _select_competitor's choice depends on."""
+    if token.upper() != "USDT":
+        return min(PRICING_TOP_N, comps_count)
+    depth = 0
+    for group in groups:
+        depth += len(group)
+        if len(group) > 1:
+            # The pick is the head of the first multi-member group; cover that whole group.
+            return max(depth, min(PRICING_TOP_N, comps_count))
+    # No multi-member group anywhere: any two competitors coming together would change the pick.
+    return comps_count
+
+
+def _raw_depth(competitors: List[Dict[str, Any]], count: int) -> int:
+    """Length of the market-ordered prefix holding the first ``count`` priced competitors."""
+    seen = 0
+    for index, competitor in enumerate(competitors):
+        if seen >= count:
+            return index
+        if _to_float(competitor.get("price")) is not None:
+            seen += 1
+    return len(competitors)
+
+
+def _pricing_fingerprint(
+    ad: Dict[str, Any],
+    competitors: List[Dict[str, Any]],
+    side: str,
+    token: str,
+    spot_ref: Optional[float],
+    step: float,
+    balance: Optional[int],
+    pair_used: Any,
+    depth: int,
+) -> Tuple[Any, ...]:
+    # Built from the raw competitor list (the market book comes price-ordered), so an unchanged
+    # market is recognised before any sorting, guardrail filtering or grouping.
+    top = competitors[:depth]
+    priced = [c for c in top if _to_float(c.get("price")) is not None]
+    eligible = _guardrail_filter_competitors(side, token, spot_ref, priced, step)
+    fallback = _fallback_price(side, token, spot_ref)
+    return (
+        tuple((str(c.get("price")), str(c.get("lastQuantity"))) for c in top),
+        # When the prefix is the whole list, competitors joining at the end count too.
+        len(competitors) if len(competitors) <= depth else None,
+        # Spot only reaches the price through which of these pass the guardrail, and through
+        # the fallback used when none does.
+        len(eligible),
+        round(fallback, PRICE_PRECISION) if fallback is not None and not eligible else None,
+        tuple(str(ad.get(key)) for key in ("price", "lastQuantity", "minAmount", "status", "remark")),
+        balance,
+        tuple(sorted(pair_used)),
+    )
+
+
+def _remember(
+    ad_id: str, fingerprint: Tuple[Any, ...], depth: int, entry: Dict[str, Any], reserved_price: Optional[float]
+) -> Dict[str, Any]:
+    _evaluations[ad_id] = _AdEvaluation(fingerprint, depth, entry, reserved_price)
+    return entry
+
+
 def _spot_quote(token: str, fiat: str) -> Tuple[Optional[float], Optional[float], Optional[str]]:
     token_up = token.upper()
     fiat_up = fiat.upper()
@@ -88,20 +173,10 @@ def _spot_quote(token: str, fiat: str) -> Tuple[Optional[float], Optional[float]
         symbol = f"{token_up}{fiat_up}"
     if token_up in {"USDT", "USDC"} and fiat_up == "USD":
         return 1.0, 1.0, "USDTUSD"
-    resp = requests.get(
-        SPOT_TICKERS_URL,
-        params={"category": "spot", "symbol": symbol},
-        timeout=10,
-    )
-    resp.raise_for_status()
-    items = resp.json().get("result", {}).get("list") or []
-    if not items:
+    ticker = spot_snapshot.ticker(symbol)
+    if ticker is None:
         return None, None, symbol
-    ticker = items[0]
-    bid = _to_float(ticker.get("bid1Price"))
-    ask = _to_float(ticker.get("ask1Price"))
-    last_price = _to_float(ticker.get("lastPrice"))
-    return bid or last_price, ask or last_price, symbol
+    return ticker.bid or ticker.last, ticker.ask or ticker.last, symbol
 
 
 def _price_precision(raw_price: Any, fiat: str) -> int:
@@ -262,12 +337,13 @@ def _update_single_ad(client, ad: Dict[str, Any], price: float, qty: float, fiat
 
 def _apply_pricing() -> List[Dict[str, Any]]:
     global _snapshot_written
-    rows = fetch_all_credentials()
+    rows = owned_credentials(AUTO_PRICING_SHARD_GROUP, fetch_all_credentials())
     if not rows:
         return []
     statuses: List[Dict[str, Any]] = []
     snapshot_collect = not _snapshot_written
     snapshot_entries_all: List[Dict[str, Any]] = []
+    seen_ads: set[str] = set()
     for row in rows:
         creds = build_exchange_credentials(row)
         client = create_exchange_client(creds)
@@ -301,10 +377,37 @@ def _apply_pricing() -> List[Dict[str, Any]]:
             if AUTO_MARKER not in remark or AUTO_PAUSED_MARKER in remark:
                 continue
             update_price, update_qty = _auto_update_flags(remark)
+            ad_id = str(ad.get("id") or "")
+            seen_ads.add(ad_id)
+            cache_key = (token.upper(), fiat.upper())
+            if cache_key not in spot_cache:
+                spot_cache[cache_key] = _spot_quote(token, fiat)
+            bid, ask, symbol = spot_cache[cache_key]
+            spot_ref = ask if side == "SELL" else bid
+            precision = _price_precision(ad.get("price"), fiat)
+            step = _price_step(fiat, precision)
+            pair_key = (fiat.upper(), side)
+            balance = math.floor(balances.get(token.upper(), 0.0)) if side == "SELL" else None
+            previous = _evaluations.pop(ad_id, None)
+            if (
+                previous is not None
+                and not snapshot_collect
+                and previous.skipped + 1 < PRICING_FORCE_EVERY_CYCLES
+                and previous.fingerprint
+                == _pricing_fingerprint(
+                    ad, ctx.competitors, side, token, spot_ref, step, balance, used_prices.get(pair_key, ()), previous.depth
+                )
+            ):
+                # Nothing this ad's price depends on has moved: reuse the last result and keep its price reserved.
+                previous.skipped += 1
+                _evaluations[ad_id] = previous
+                if previous.reserved_price is not None:
+                    used_prices.setdefault(pair_key, set()).add(previous.reserved_price)
+                statuses.append(previous.status)
+                continue
             comps = [c for c in ctx.competitors if _to_float(c.get("price")) is not None]
             reverse = side == "BUY"
             comps = sorted(comps, key=lambda c: _to_float(c.get("price")) or 0, reverse=reverse)
-            groups = _group_competitors_by_price(ad, comps)
             if snapshot_collect:
                 snapshot_entries.append(
                     {
@@ -313,17 +416,16 @@ def _apply_pricing() -> List[Dict[str, Any]]:
                         "competitors_after": comps,
                     }
                 )
-            cache_key = (token.upper(), fiat.upper())
-            if cache_key not in spot_cache:
-                spot_cache[cache_key] = _spot_quote(token, fiat)
-            bid, ask, symbol = spot_cache[cache_key]
-            spot_ref = ask if side == "SELL" else bid
-            precision = _price_precision(ad.get("price"), fiat)
-            step = _price_step(fiat, precision)
             eligible_comps = _guardrail_filter_competitors(side, token, spot_ref, comps, step)
-            eligible_groups = _group_competitors_by_price(ad, eligible_comps)
-            comp = _select_competitor(token, side, eligible_groups, eligible_comps)
             fallback = _fallback_price(side, token, spot_ref)
+            eligible_groups = _group_competitors_by_price(ad, eligible_comps, ctx.market_columns)
+            # Cover the competitors the guardrail dropped (spot moving can bring them back) and the selection's reach.
+            depth = _selection_depth(token, eligible_groups, len(eligible_comps))
+            raw_depth = _raw_depth(ctx.competitors, len(comps) - len(eligible_comps) + depth)
+            fingerprint = _pricing_fingerprint(
+                ad, ctx.competitors, side, token, spot_ref, step, balance, used_prices.get(pair_key, ()), raw_depth
+            )
+            comp = _select_competitor(token, side, eligible_groups, eligible_comps)
             target_price = _target_price(side, comp, step, fallback)
             comp_label = "-"
             if comp:
@@ -334,11 +436,12 @@ def _apply_pricing() -> List[Dict[str, Any]]:
             current_price = _to_float(ad.get("price"))
             current_qty = _to_float(ad.get("lastQuantity"))
             if update_price and target_price is None:
-                statuses.append(_build_status_entry(ad, current_price, current_qty, eligible_groups, None, (bid, ask, symbol)))
+                entry = _build_status_entry(ad, current_price, current_qty, eligible_groups, None, (bid, ask, symbol))
+                statuses.append(_remember(ad_id, fingerprint, raw_depth, entry, None))
                 continue
             price_for_update = round(target_price, precision) if update_price and target_price is not None else current_price
+            reserved_price: Optional[float] = None
             if update_price and price_for_update is not None:
-                pair_key = (fiat.upper(), side)
                 pair_used = used_prices.setdefault(pair_key, set())
                 offset = 0
                 candidate = price_for_update
@@ -347,12 +450,16 @@ def _apply_pricing() -> List[Dict[str, Any]]:
                     candidate = price_for_update + offset * step if side == "SELL" else price_for_update - offset * step
                 price_for_update = round(candidate, precision)
                 pair_used.add(price_for_update)
+                reserved_price = price_for_update
             token_up = token.upper()
             if side == "SELL":
                 available = balances.get(token_up, 0.0)
                 sell_qty = math.floor(available)
                 if sell_qty <= 0:
-                    statuses.append(_build_status_entry(ad, price_for_update, 0.0, groups, price_for_update, (bid, ask, symbol)))
+                    # The full (pre-guardrail) grouping is only reported here, so it is built on demand.
+                    groups = _group_competitors_by_price(ad, comps, ctx.market_columns)
+                    entry = _build_status_entry(ad, price_for_update, 0.0, groups, price_for_update, (bid, ask, symbol))
+                    statuses.append(_remember(ad_id, fingerprint, raw_depth, entry, reserved_price))
                     continue
                 updated_qty = float(sell_qty) if update_qty else current_qty
             else:  # BUY
@@ -360,21 +467,30 @@ def _apply_pricing() -> List[Dict[str, Any]]:
                 suggested_qty = fixed if fixed is not None else (current_qty if current_qty is not None else 0.0)
                 updated_qty = suggested_qty if update_qty else current_qty
                 if updated_qty <= 0:
-                    statuses.append(_build_status_entry(ad, price_for_update, 0.0, eligible_groups, price_for_update, (bid, ask, symbol)))
+                    entry = _build_status_entry(ad, price_for_update, 0.0, eligible_groups, price_for_update, (bid, ask, symbol))
+                    statuses.append(_remember(ad_id, fingerprint, raw_depth, entry, reserved_price))
                     continue
             if price_for_update is None or updated_qty is None:
-                statuses.append(_build_status_entry(ad, current_price, current_qty, eligible_groups, target_price, (bid, ask, symbol)))
+                entry = _build_status_entry(ad, current_price, current_qty, eligible_groups, target_price, (bid, ask, symbol))
+                statuses.append(_remember(ad_id, fingerprint, raw_depth, entry, reserved_price))
                 continue
             if _should_skip_update(price_for_update, updated_qty, current_price, current_qty, step, update_price, update_qty):
-                statuses.append(_build_status_entry(ad, price_for_update, updated_qty, eligible_groups, price_for_update, (bid, ask, symbol)))
+                entry = _build_status_entry(ad, price_for_update, updated_qty, eligible_groups, price_for_update, (bid, ask, symbol))
+                statuses.append(_remember(ad_id, fingerprint, raw_depth, entry, reserved_price))
                 continue
+            entry = _build_status_entry(ad, price_for_update, updated_qty, eligible_groups, price_for_update, (bid, ask, symbol))
             try:
                 _update_single_ad(client, ad, price_for_update, updated_qty, fiat, side)
             except Exception as exc:
+                # Not remembered, so the next cycle retries instead of skipping.
                 logger.warning("Auto price update failed ad=%s err=%s", ad.get("id"), exc)
-            statuses.append(_build_status_entry(ad, price_for_update, updated_qty, eligible_groups, price_for_update, (bid, ask, symbol)))
+                statuses.append(entry)
+                continue
+            statuses.append(_remember(ad_id, fingerprint, raw_depth, entry, reserved_price))
         if snapshot_collect and snapshot_entries:
             snapshot_entries_all.extend(snapshot_entries)
+    for ad_id in set(_evaluations) - seen_ads:
+        del _evaluations[ad_id]
     if snapshot_collect and snapshot_entries_all:
         try:
             SNAPSHOT_PATH.parent.mkdir(parents=True, exist_ok=True)
@@ -402,6 +518,7 @@ class AutoPricingWorker:
     async def start(self) -> None:
         if self.is_running:
             return
+        await retain_spot_feed(AUTO_PRICING_SHARD_GROUP)
         self._task = asyncio.create_task(self._run())
 
     async def stop(self) -> None:
@@ -411,6 +528,8 @@ class AutoPricingWorker:
         with contextlib.suppress(asyncio.CancelledError):
             await self._task
         self._task = None
+        await asyncio.to_thread(release_shard, AUTO_PRICING_SHARD_GROUP)
+        await release_spot_feed(AUTO_PRICING_SHARD_GROUP)
 
     async def _run(self) -> None:
         while True:
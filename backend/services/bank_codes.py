@@ -0,0 +1,39 @@
+import json
+import logging
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger("p2p-panel")
+
+BANK_CODES_PATH = Path(__file__).resolve().parent.parent / "data" / "pl_bank_codes.json"
+
+
+@lru_cache(maxsize=1)
+def _load_index() -> Dict[str, Any]:
+    try:
+        with BANK_CODES_PATH.open("r", encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError) as exc:  # pragma: no cover - broken deployment
+        logger.error("Failed to load bank code index %s: %s", BANK_CODES_PATH, exc)
+        return {}
+
+
+def bank_index_version() -> str:
+    return str(_load_index().get("version") or "")
+
+
+def bank_for_iban(iban: str) -> Optional[str]:
+    """Bank name from the routing digits of a 26-digit PL IBAN (check digits, then the bank code)."""
+    digits = "".join(ch for ch in str(iban or "") if ch.isdigit())
+    if len(digits) != 26:
+        return None
+    index = _load_index()
+    code = digits[2:6]
+    name = (index.get("banks") or {}).get(code)
+    if name:
+        return name
+    # Cooperative banks share the 8xxx range; the exact one needs the full routing number.
+    if code.startswith(str(index.get("cooperative_prefix") or "8")):
+        return index.get("cooperative_name") or None
+    return None
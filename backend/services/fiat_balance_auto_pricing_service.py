@@ -5,8 +5,6 @@ from collections import deque
 from datetime import datetime, timedelta
 from typing import Any, Dict, List, Optional
 
-import requests
-
 from constants import FIAT_BALANCE_REMARK_MARKER
 from exchanges import create_exchange_client
 from fiat_balance_marker import get_marker
@@ -14,17 +12,20 @@ from repositories.credentials_repository import fetch_all_credentials
 from services.ads_service import _load_bybit_ads
 from services.credentials_service import build_exchange_credentials
 from services.fiat_balance_service import FIAT_PRECISION, DEFAULT_TRADING_PREFS
+from services.market_book import market_book_cache
+from services.sharding import owned_credentials, release_shard
+from services.spot_feed import release_spot_feed, retain_spot_feed
+from services.spot_snapshot import SpotTicker, spot_snapshot
 from tools.auto_pricing import _group_competitors_by_price, _to_float
 
 import numpy as np
 
 logger = logging.getLogger("p2p-panel")
 
-SPOT_TICKERS_URL = "https://api.bybit.com/v5/market/tickers"
 PAYMENT_CODE = "416"
 MIN_USD_LIQUIDITY = 300.0
-MARKET_PAGE_SIZE = "10000"
 FIAT_AUTO_INTERVAL_SECONDS = 60
+FIAT_AUTO_SHARD_GROUP = "fiat_balance_auto_pricing"
 UPDATE_WINDOW_SECONDS = 300
 UPDATE_WINDOW_MAX = 10
 # Default margins
@@ -145,18 +146,6 @@ def _stringify_trading_preferences(raw: Any) -> Dict[str, str]:
     return {k: str(v) for k, v in (prefs or {}).items()}
 
 
-def _extract_items(response: Dict[str, Any]) -> List[Dict[str, Any]]:
-    if not isinstance(response, dict):
-        return []
-    result = response.get("result")
-    if not isinstance(result, dict):
-        return []
-    items = result.get("items")
-    if isinstance(items, list):
-        return items
-    return []
-
-
 def _has_payment_416(raw: Any) -> bool:
     if isinstance(raw, list):
         return any(str(p) == PAYMENT_CODE for p in raw)
@@ -187,19 +176,7 @@ def _fetch_token_usd_price(token: str) -> float:
     token_up = token.upper()
     if token_up in {"USDT", "USDC"}:
         return 1.0
-    symbol = f"{token_up}USDT"
-    response = requests.get(
-        SPOT_TICKERS_URL,
-        params={"category": "spot", "symbol": symbol},
-        timeout=10,
-    )
-    response.raise_for_status()
-    data = response.json()
-    items = data.get("result", {}).get("list")
-    if not items:
-        raise ValueError(f"No ticker for {symbol}")
-    price = items[0].get("lastPrice")
-    return float(price)
+    return spot_snapshot.last_price(f"{token_up}USDT")
 
 
 def _load_balances_simple(client) -> Dict[str, float]:
@@ -287,31 +264,13 @@ def _passes_activity_filters(
     return True
 
 
-def _fetch_spot_ticker(symbol: str) -> Dict[str, Any]:
-    response = requests.get(
-        SPOT_TICKERS_URL,
-        params={"category": "spot", "symbol": symbol},
-        timeout=10,
-    )
-    response.raise_for_status()
-    data = response.json()
-    items = data.get("result", {}).get("list")
-    if not items:
-        raise ValueError(f"No spot ticker for {symbol}")
-    return items[0]
-
-
-def _fetch_spot_quote(token: str, fiat: str, spot_cache: Dict[str, Dict[str, Any]], price_cache: Dict[str, float]) -> Dict[str, Optional[float]]:
+def _fetch_spot_quote(token: str, fiat: str, price_cache: Dict[str, float]) -> Dict[str, Optional[float]]:
     token_up = token.upper()
     fiat_up = fiat.upper()
 
-    def _get_ticker(sym: str) -> Optional[Dict[str, Any]]:
-        if sym in spot_cache:
-            return spot_cache[sym]
+    def _get_ticker(sym: str) -> Optional[SpotTicker]:
         try:
-            ticker_local = _fetch_spot_ticker(sym)
-            spot_cache[sym] = ticker_local
-            return ticker_local
+            return spot_snapshot.ticker(sym)
         except Exception:
             return None
 
@@ -320,8 +279,8 @@ def _fetch_spot_quote(token: str, fiat: str, spot_cache: Dict[str, Dict[str, Any
         if not ticker_local:
             return {"bid": None, "ask": None, "symbol": sym}
         return {
-            "bid": _to_float(ticker_local.get("bid1Price")),
-            "ask": _to_float(ticker_local.get("ask1Price")),
+            "bid": ticker_local.bid,
+            "ask": ticker_local.ask,
             "symbol": sym,
         }
 
@@ -525,14 +484,7 @@ def _normalize_side(value: Any) -> str:
 def _collect_competitors(api, ad: Dict[str, Any], price_cache: Dict[str, float]) -> List[Dict[str, Any]]:
     my_min = _to_float(ad.get("minAmount"))
     my_last_quantity = _to_float(ad.get("lastQuantity"))
-    resp = api.get_online_ads(
-        tokenId=str(ad.get("tokenId")),
-        currencyId=str(ad.get("currencyId")),
-        side=str(ad.get("side")),
-        page="1",
-        size=MARKET_PAGE_SIZE,
-    )
-    market_ads = _extract_items(resp)
+    market_ads = market_book_cache.get_for_ad(api, ad)
     my_account_id = str(ad.get("accountId") or "")
     token = str(ad.get("tokenId") or "")
     filtered: List[Dict[str, Any]] = []
@@ -572,13 +524,12 @@ def _summarize_groups(groups: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]
 
 
 def collect_fiat_balance_contexts(run_sell: bool = True, run_buy: bool = True) -> List[Dict[str, Any]]:
-    rows = fetch_all_credentials()
+    rows = owned_credentials(FIAT_AUTO_SHARD_GROUP, fetch_all_credentials())
     if not rows:
         return []
     marker = get_marker()
     contexts: List[Dict[str, Any]] = []
     price_cache: Dict[str, float] = {}
-    spot_cache: Dict[str, Dict[str, Any]] = {}
 
     for row in rows:
         if row.get("exchange") != "bybit":
@@ -600,7 +551,6 @@ def collect_fiat_balance_contexts(run_sell: bool = True, run_buy: bool = True) -
             spot = _fetch_spot_quote(
                 str(ad.get("tokenId") or ad.get("token") or ""),
                 str(ad.get("currencyId") or ad.get("currency") or ""),
-                spot_cache,
                 price_cache,
             )
             token_val = str(ad.get("tokenId") or ad.get("token") or "")
@@ -772,6 +722,7 @@ class FiatBalanceAutoPricingWorker:
     async def start(self) -> None:
         if self.is_running:
             return
+        await retain_spot_feed(FIAT_AUTO_SHARD_GROUP)
         self._task = asyncio.create_task(self._run())
 
     async def stop(self) -> None:
@@ -781,6 +732,8 @@ class FiatBalanceAutoPricingWorker:
         with contextlib.suppress(asyncio.CancelledError):
             await self._task
         self._task = None
+        await asyncio.to_thread(release_shard, FIAT_AUTO_SHARD_GROUP)
+        await release_spot_feed(FIAT_AUTO_SHARD_GROUP)
 
     async def _run(self) -> None:
         while True:
@@ -3,7 +3,6 @@ import json
 from pathlib import Path
 from typing import Any, Dict, List
 
-import requests
 from bybit_p2p._exceptions import FailedRequestError
 
 from exchanges import SUPPORTED_EXCHANGES, create_exchange_client
@@ -18,6 +17,7 @@ from schemas import (
 )
 from services.credentials_service import build_exchange_credentials
 from services.ads_service import get_ads
+from services.spot_snapshot import spot_snapshot
 from fiat_balance_marker import get_marker, save_marker
 from constants import FIAT_BALANCE_REMARK_MARKER
 
@@ -26,7 +26,6 @@ FIATS = ["EUR", "PLN", "USD", "BRL"]
 PAYMENT_METHOD_ID = "-1"
 PRICE_DOWN = 0.92
 PRICE_UP = 1.08
-MARKET_TICKERS_URL = "https://api.bybit.com/v5/market/tickers"
 FIAT_PRECISION = {
     "USD": 3,
     "EUR": 3,
@@ -97,18 +96,7 @@ def _load_balances(client) -> Dict[str, float]:
 
 
 def _fetch_spot(symbol: str) -> float:
-    response = requests.get(
-        MARKET_TICKERS_URL,
-        params={"category": "spot", "symbol": symbol},
-        timeout=10,
-    )
-    response.raise_for_status()
-    data = response.json()
-    items = data.get("result", {}).get("list") if isinstance(data, dict) else None
-    if not items:
-        raise ValueError(f"No ticker for {symbol}")
-    price = items[0].get("lastPrice")
-    return float(price)
+    return spot_snapshot.last_price(symbol)
 
 
 def _compute_price(token: str, fiat: str) -> float:
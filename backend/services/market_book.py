@@ -0,0 +1,144 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from config import settings
+from services.rate_limiter import RateLimiter
+
+# Large pages keep a deep book to one or two requests (the fiat worker always asked for 10000).
+MARKET_PAGE_SIZE = 10000
+MARKET_FETCH_WORKERS = 4
+MARKET_FETCH_RATE_PER_SECOND = 8.0
+MARKET_FETCH_BURST = 4
+
+MarketKey = Tuple[str, str, str]
+
+
+def _extract_items(response: Dict[str, Any]) -> List[Dict[str, Any]]:
+    if not isinstance(response, dict):
+        return []
+    result = response.get("result")
+    if not isinstance(result, dict):
+        return []
+    items = result.get("items")
+    if isinstance(items, list):
+        return items
+    return []
+
+
+def _copy_book(book: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [dict(item) for item in book]
+
+
+# Every online-ads page request, from any worker or thread, draws from this one budget.
+market_rate_limiter = RateLimiter(MARKET_FETCH_RATE_PER_SECOND, burst=MARKET_FETCH_BURST)
+
+
+def fetch_market_book(api, token_id: str, currency_id: str, side: str) -> List[Dict[str, Any]]:
+    all_items: List[Dict[str, Any]] = []
+    page = 1
+    while True:
+        market_rate_limiter.acquire()
+        resp = api.get_online_ads(
+            tokenId=token_id,
+            currencyId=currency_id,
+            side=side,
+            page=str(page),
+            size=str(MARKET_PAGE_SIZE),
+        )
+        items = _extract_items(resp)
+        all_items.extend(items)
+        if len(items) < MARKET_PAGE_SIZE:
+            break
+        page += 1
+    return all_items
+
+
+# The public P2P book is the same for every account, so both pricing workers share one copy
+# per (token, fiat, side). The TTL is shorter than a pricing cycle: within a cycle each market
+# is downloaded once, and the next cycle always sees a fresh book.
+class MarketBookCache:
+    def __init__(self, ttl_seconds: float) -> None:
+        self.ttl_seconds = ttl_seconds
+        self._books: Dict[MarketKey, Tuple[float, List[Dict[str, Any]]]] = {}
+        self._key_locks: Dict[MarketKey, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.fetches = 0
+
+    @staticmethod
+    def key(token_id: Any, currency_id: Any, side: Any) -> MarketKey:
+        return str(token_id or "").upper(), str(currency_id or "").upper(), str(side)
+
+    def _fresh(self, key: MarketKey) -> Optional[List[Dict[str, Any]]]:
+        entry = self._books.get(key)
+        if entry and time.monotonic() - entry[0] < self.ttl_seconds:
+            return entry[1]
+        return None
+
+    def _prune(self, now: float) -> None:
+        # Expired books go, and with them the locks of markets no longer cached (failed fetches too).
+        for key, (fetched_at, _) in list(self._books.items()):
+            if now - fetched_at >= self.ttl_seconds:
+                self._books.pop(key, None)
+        for key, key_lock in list(self._key_locks.items()):
+            if key not in self._books and not key_lock.locked():
+                self._key_locks.pop(key, None)
+
+    def get(self, api, token_id: Any, currency_id: Any, side: Any) -> List[Dict[str, Any]]:
+        """The market's ads; each caller gets its own ad dicts (nested values such as payments are shared)."""
+        key = self.key(token_id, currency_id, side)
+        with self._lock:
+            book = self._fresh(key)
+            if book is not None:
+                self.hits += 1
+                return _copy_book(book)
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        # One download per market: concurrent callers for the same key wait for the first one.
+        with key_lock:
+            with self._lock:
+                book = self._fresh(key)
+                if book is not None:
+                    self.hits += 1
+                    return _copy_book(book)
+            book = fetch_market_book(api, str(token_id), str(currency_id), str(side))
+            with self._lock:
+                now = time.monotonic()
+                self._prune(now)
+                self._books[key] = (now, book)
+                self.fetches += 1
+        return _copy_book(book)
+
+    def get_for_ad(self, api, ad: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return self.get(api, ad.get("tokenId"), ad.get("currencyId"), ad.get("side"))
+
+    def iter_books(
+        self,
+        api,
+        keys: Iterable[MarketKey],
+        max_workers: int = MARKET_FETCH_WORKERS,
+    ) -> Iterator[Tuple[MarketKey, Optional[List[Dict[str, Any]]], Optional[Exception]]]:
+        """Fetch distinct markets concurrently; yields (key, book, error) as each one completes."""
+        unique = list(dict.fromkeys(keys))
+        if not unique:
+            return
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(unique))), thread_name_prefix="market-book") as pool:
+            futures = {pool.submit(self.get, api, *key): key for key in unique}
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result(), None
+                except Exception as exc:
+                    yield futures[future], None, exc
+
+    def clear(self) -> None:
+        with self._lock:
+            self._books.clear()
+            self._prune(time.monotonic())
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"markets": len(self._books), "fetches": self.fetches, "hits": self.hits}
+
+
+market_book_cache = MarketBookCache(settings.market_book_ttl_seconds)
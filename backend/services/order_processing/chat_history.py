@@ -0,0 +1,165 @@
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from config import settings
+from repositories.chat_store import ChatTranscriptStore, tokenize_name
+from services.payment_contacts import chat_contact_extractor, scan_contacts
+
+logger = logging.getLogger("p2p-panel")
+
+CHAT_PAGE_SIZE = 200
+CHAT_MAX_PAGES = 20
+
+chat_store = ChatTranscriptStore(settings.chat_store_path)
+
+
+def _parse_ms(value: Any) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _extract_chat_items(response: Dict[str, Any]) -> List[Dict[str, Any]]:
+    if not isinstance(response, dict):
+        return []
+    result = response.get("result")
+    if isinstance(result, dict):
+        items = result.get("result") or result.get("items") or []
+    else:
+        items = []
+    return items if isinstance(items, list) else []
+
+
+def fetch_chat_since(
+    api,
+    order_id: str,
+    cursor: Optional[int] = None,
+) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+    # Pages forward from the cursor until a short page; messages at or before the cursor are dropped.
+    items_by_id: Dict[int, Dict[str, Any]] = {}
+    start_message_id = cursor
+    for _ in range(CHAT_MAX_PAGES):
+        params: Dict[str, Any] = {"orderId": order_id, "size": str(CHAT_PAGE_SIZE)}
+        if start_message_id is not None:
+            params["startMessageId"] = str(start_message_id)
+        try:
+            resp = api.get_chat_messages(**params)
+        except Exception:
+            # A failed first page is the caller's problem; later pages just end this sync early.
+            if start_message_id == cursor:
+                raise
+            break
+        page = _extract_chat_items(resp)
+        max_id = start_message_id
+        for item in page:
+            msg_id = _parse_ms(item.get("id"))
+            if msg_id is None or (cursor is not None and msg_id <= cursor):
+                continue
+            items_by_id[msg_id] = item
+            max_id = max(max_id or msg_id, msg_id)
+        if len(page) < CHAT_PAGE_SIZE or max_id is None or max_id == start_message_id:
+            break
+        start_message_id = max_id
+    items = [items_by_id[msg_id] for msg_id in sorted(items_by_id)]
+    new_cursor = max(items_by_id) if items_by_id else cursor
+    return items, new_cursor
+
+
+def record_chat(
+    order_id: str,
+    items: Sequence[Dict[str, Any]],
+    cursor: Optional[int],
+    *,
+    credential_id: str = "",
+    my_account_id: str = "",
+) -> None:
+    """Append freshly fetched messages to the local transcript store; failures never block the caller."""
+    if not items:
+        return
+    contacts = chat_contact_extractor.extract(items)
+    # Our own IBANs/phones (sent in SELL orders) would otherwise match every order of the account.
+    index = [
+        ((), ()) if my_account_id and str(item.get("accountId") or "") == my_account_id else (found.ibans, found.phones)
+        for item, found in zip(items, contacts)
+    ]
+    try:
+        chat_store.append(
+            order_id,
+            items,
+            index,
+            cursor=cursor,
+            credential_id=credential_id,
+        )
+    except Exception as exc:  # pragma: no cover - disk failure
+        logger.warning("Chat transcript store write failed order=%s: %s", order_id, exc)
+
+
+def record_chat_since(
+    api,
+    order_id: str,
+    items: Sequence[Dict[str, Any]],
+    cursor: Optional[int],
+    *,
+    fetched_from: Optional[int],
+    credential_id: str = "",
+    my_account_id: str = "",
+) -> None:
+    """Record messages fetched past ``fetched_from``; if the store is behind that point it is synced itself."""
+    try:
+        stored = chat_store.cursor(order_id)
+    except Exception as exc:  # pragma: no cover - disk failure
+        logger.warning("Chat transcript store read failed order=%s: %s", order_id, exc)
+        return
+    if fetched_from is not None and (stored is None or stored < fetched_from):
+        # Orders already in progress when the store was introduced (or after a failed write) would
+        # otherwise keep a transcript without their earlier messages.
+        sync_order_chat(api, order_id, credential_id=credential_id, my_account_id=my_account_id)
+        return
+    record_chat(order_id, items, cursor, credential_id=credential_id, my_account_id=my_account_id)
+
+
+def sync_order_chat(
+    api,
+    order_id: str,
+    *,
+    credential_id: str = "",
+    my_account_id: str = "",
+) -> List[Dict[str, Any]]:
+    """Full transcript of an order; only messages newer than the stored cursor are fetched.
+
+    An order the store has never seen is seeded with a sync from its first message.
+    """
+    cursor = chat_store.cursor(order_id)
+    try:
+        items, new_cursor = fetch_chat_since(api, order_id, cursor)
+    except Exception as exc:  # pragma: no cover - network/API failures
+        logger.warning("Chat sync failed order=%s: %s", order_id, exc)
+        items, new_cursor = [], cursor
+    record_chat(order_id, items, new_cursor, credential_id=credential_id, my_account_id=my_account_id)
+    return chat_store.messages(order_id)
+
+
+def index_order_names(order: Dict[str, Any], *, credential_id: str = "") -> None:
+    # Only the counterparty is indexed; our own real name would match every order.
+    order_id = str(order.get("id") or order.get("orderId") or "")
+    side = str(order.get("side"))
+    realname = order.get("sellerRealName") if side == "0" else order.get("buyerRealName") if side == "1" else None
+    names = [str(name) for name in (realname, order.get("targetNickName")) if name]
+    if not order_id or not names:
+        return
+    try:
+        chat_store.index_names(order_id, names, credential_id=credential_id)
+    except Exception as exc:  # pragma: no cover - disk failure
+        logger.warning("Chat transcript name index failed order=%s: %s", order_id, exc)
+
+
+def search_transcripts(query: str, credential_ids: Sequence[str], limit: int = 200) -> Tuple[str, List[Dict[str, Any]]]:
+    """Orders whose chat mentions the IBAN/phone in ``query``, or whose parties match every name token."""
+    contacts = scan_contacts(query)
+    if contacts.ibans:
+        return "iban", chat_store.search("iban", list(contacts.ibans), credential_ids=credential_ids, limit=limit)
+    if contacts.phones:
+        return "phone", chat_store.search("phone", list(contacts.phones), credential_ids=credential_ids, limit=limit)
+    tokens = tokenize_name(query)
+    return "name", chat_store.search("name", tokens, credential_ids=credential_ids, limit=limit)
@@ -3,18 +3,12 @@ from __future__ import annotations
 from datetime import datetime, timedelta, timezone
 from typing import Any, Dict, List, Optional, Tuple
 
+from services.bank_codes import bank_for_iban
+from services.payment_contacts import chat_contact_extractor
+from .chat_history import _parse_ms, fetch_chat_since, index_order_names, record_chat_since
 from .messages import ASK_SEQUENCES
 from .messaging import message_text, send_chat_message
-from .payments import extract_iban, extract_pl_phone
-
-_ACCOUNT_ID_CACHE: Dict[str, str] = {}
-
-
-def _parse_ms(value: Any) -> Optional[int]:
-    try:
-        return int(value)
-    except (TypeError, ValueError):
-        return None
+from .profile_cache import profile_cache
 
 
 def _parse_iso_dt(value: Any) -> Optional[datetime]:
@@ -30,34 +24,23 @@ def _parse_iso_dt(value: Any) -> Optional[datetime]:
     return None
 
 
-def _extract_chat_items(response: Dict[str, Any]) -> List[Dict[str, Any]]:
-    if not isinstance(response, dict):
-        return []
-    result = response.get("result")
-    if isinstance(result, dict):
-        items = result.get("result") or result.get("items") or []
-    else:
-        items = []
-    return items if isinstance(items, list) else []
-
-
 def _is_valid_value(value: Any) -> bool:
     return bool(value) and str(value).strip().lower() != "not found"
 
 
+def _has_all_payment_data(state: Dict[str, Any]) -> bool:
+    return all(_is_valid_value(state.get(key)) for key in ("to_iban", "to_phone", "to_bank"))
+
+
+def chat_requirements_pending(state: Dict[str, Any]) -> bool:
+    # Nothing left to gather: either we already confirmed, or the terms were complete and we never asked.
+    if state.get("payment_data_complete"):
+        return False
+    return not (_has_all_payment_data(state) and not state.get("last_request_at"))
+
+
 def _get_my_account_id(api, credential_id: str) -> str:
-    cached = _ACCOUNT_ID_CACHE.get(credential_id)
-    if cached is not None:
-        return cached
-    try:
-        resp = api.get_account_information()
-    except Exception:
-        _ACCOUNT_ID_CACHE[credential_id] = ""
-        return ""
-    result = resp.get("result") if isinstance(resp, dict) else None
-    account_id = str(result.get("accountId") or "") if isinstance(result, dict) else ""
-    _ACCOUNT_ID_CACHE[credential_id] = account_id
-    return account_id
+    return profile_cache.get(api, credential_id).account_id
 
 
 def _collect_from_messages(
@@ -70,26 +53,26 @@ def _collect_from_messages(
     echo_ibans: set[str] = set()
     echo_phones: set[str] = set()
     last_counterparty_ms: Optional[int] = None
+    incoming: List[Dict[str, Any]] = []
     for item in items:
         account_id = str(item.get("accountId") or "")
         if not account_id or account_id == my_account_id:
             continue
         if str(item.get("contentType") or "str") != "str":
             continue
-        msg = str(item.get("message") or "")
-        if not msg:
+        if not item.get("message"):
             continue
-        msg_trimmed = msg.strip()
+        incoming.append(item)
         msg_ms = _parse_ms(item.get("createDate"))
         if msg_ms:
             last_counterparty_ms = max(last_counterparty_ms or msg_ms, msg_ms)
-        iban = extract_iban(msg)
-        if iban:
+    for item, contacts in zip(incoming, chat_contact_extractor.extract(incoming)):
+        msg_trimmed = str(item.get("message") or "").strip()
+        for iban in contacts.ibans:
             ibans.add(iban)
             if msg_trimmed != iban:
                 echo_ibans.add(iban)
-        phone = extract_pl_phone(msg)
-        if phone:
+        for phone in contacts.phones:
             phones.add(phone)
             if msg_trimmed != phone:
                 echo_phones.add(phone)
@@ -151,28 +134,19 @@ def process_chat_requirements(
     if currency != "PLN":
         return {}
 
-    my_account_id = _get_my_account_id(api, credential_id)
     order_id = str(order.get("id") or order.get("orderId") or "")
     if not order_id:
         return {}
+    if not chat_requirements_pending(state):
+        return {}
 
-    last_message_id = str(state.get("last_message_id") or "")
-    params: Dict[str, Any] = {"orderId": order_id, "size": "200"}
-    if last_message_id:
-        params["startMessageId"] = last_message_id
+    my_account_id = _get_my_account_id(api, credential_id)
+    cursor = _parse_ms(state.get("last_message_id"))
     try:
-        resp = api.get_chat_messages(**params)
+        items, last_id = fetch_chat_since(api, order_id, cursor)
     except Exception:
         return {}
 
-    items = _extract_chat_items(resp)
-
-    last_id = None
-    for item in items:
-        msg_id = _parse_ms(item.get("id"))
-        if msg_id is not None:
-            last_id = max(last_id or msg_id, msg_id)
-
     last_request_at = _parse_iso_dt(state.get("last_request_at"))
     since_ms = int(last_request_at.timestamp() * 1000) if last_request_at else None
     ibans, phones, echo_ibans, echo_phones, counterparty_replied = _collect_from_messages(
@@ -180,8 +154,19 @@ def process_chat_requirements(
     )
 
     updates: Dict[str, Any] = {}
-    if last_id is not None:
+    if last_id is not None and last_id != cursor:
         updates["last_message_id"] = str(last_id)
+        record_chat_since(
+            api,
+            order_id,
+            items,
+            last_id,
+            fetched_from=cursor,
+            credential_id=credential_id,
+            my_account_id=my_account_id,
+        )
+        if cursor is None:
+            index_order_names(order, credential_id=credential_id)
 
     existing_ibans = _split_existing(state.get("to_iban"))
     existing_phones = _split_existing(state.get("to_phone"))
@@ -195,9 +180,15 @@ def process_chat_requirements(
     if new_phones:
         updates["to_phone"] = ", ".join(sorted(existing_phones | set(new_phones)))
 
+    if not _is_valid_value(state.get("to_bank")):
+        known_ibans = sorted(existing_ibans | set(new_ibans))
+        iban_bank = next((name for name in map(bank_for_iban, known_ibans) if name), None)
+        if iban_bank:
+            updates["to_bank"] = iban_bank
+
     missing_iban = not _is_valid_value(updates.get("to_iban") or state.get("to_iban"))
     missing_phone = not _is_valid_value(updates.get("to_phone") or state.get("to_phone"))
-    missing_bank = not _is_valid_value(state.get("to_bank"))
+    missing_bank = not _is_valid_value(updates.get("to_bank") or state.get("to_bank"))
     complete = not missing_iban and not missing_phone and not missing_bank
 
     if send_messages:
@@ -0,0 +1,86 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+DETAILS_CACHE_MAX_ENTRIES = 2000
+
+
+def _order_id(order: Dict[str, Any]) -> str:
+    return str(order.get("id") or order.get("orderId") or "")
+
+
+def order_fingerprint(order: Dict[str, Any]) -> Tuple[str, str]:
+    status = str(order.get("status") or "")
+    updated = str(order.get("updateDate") or order.get("updateTime") or order.get("updatedAt") or "")
+    return status, updated
+
+
+def _same_version(cached: Tuple[str, str], current: Tuple[str, str]) -> bool:
+    if cached[0] != current[0]:
+        return False
+    # List entries do not always carry an update stamp; compare it only when both sides have one.
+    if cached[1] and current[1]:
+        return cached[1] == current[1]
+    return True
+
+
+class OrderDetailsCache:
+    def __init__(self, max_entries: int = DETAILS_CACHE_MAX_ENTRIES) -> None:
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[Tuple[str, str], Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, api, order: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        order_id = _order_id(order)
+        if not order_id:
+            return None
+        fingerprint = order_fingerprint(order)
+        with self._lock:
+            cached = self._entries.get(order_id)
+            if cached and _same_version(cached[0], fingerprint):
+                self._entries.move_to_end(order_id)
+                self.hits += 1
+                return cached[1]
+            self.misses += 1
+        details = self._fetch(api, order_id)
+        if details is not None:
+            stamp = fingerprint if fingerprint[1] else (fingerprint[0], order_fingerprint(details)[1])
+            self._store(order_id, stamp, details)
+        return details
+
+    def get_by_id(self, api, order_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self.misses += 1
+        details = self._fetch(api, order_id)
+        if details is not None:
+            self._store(order_id, order_fingerprint(details), details)
+        return details
+
+    def invalidate(self, order_id: str) -> None:
+        with self._lock:
+            self._entries.pop(order_id, None)
+
+    def _store(self, order_id: str, fingerprint: Tuple[str, str], details: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[order_id] = (fingerprint, details)
+            self._entries.move_to_end(order_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    @staticmethod
+    def _fetch(api, order_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            response = api.get_order_details(orderId=order_id)
+        except Exception:  # pragma: no cover - network/API failures
+            return None
+        if not isinstance(response, dict):
+            return None
+        details = response.get("result")
+        if isinstance(details, dict):
+            return details
+        return None
+
+
+order_details_cache = OrderDetailsCache()
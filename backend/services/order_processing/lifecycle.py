@@ -0,0 +1,64 @@
+from typing import Any, Dict, List, Optional
+
+from services.payment_parser import SKIP_PAYMENT_TYPE
+from .chat_requirements import chat_requirements_pending
+
+# Transitions an order goes through; each one is done once and recorded as a flag on order_state.
+MARK_PAID = "mark_paid"
+PAYMENT_FIELDS = "payment_fields"
+FIRST_MESSAGES = "first_messages"
+PAYMENT_INFO = "payment_info"
+CHAT_REQUIREMENTS = "chat_requirements"
+STATUS20_MESSAGE = "status20_message"
+
+# Cancelled, completed and system-cancelled orders never need processing again.
+TERMINAL_STATUSES = {"40", "50", "80"}
+
+TRANSITION_ORDER = (
+    MARK_PAID,
+    PAYMENT_FIELDS,
+    FIRST_MESSAGES,
+    PAYMENT_INFO,
+    CHAT_REQUIREMENTS,
+    STATUS20_MESSAGE,
+)
+
+# Exchange endpoints each transition reads before it can run (sends are not listed).
+TRANSITION_ENDPOINTS = {
+    MARK_PAID: ("order_details",),
+    PAYMENT_FIELDS: ("order_details", "counterparty_info", "payment_types"),
+    FIRST_MESSAGES: ("order_details", "counterparty_info"),
+    PAYMENT_INFO: ("order_details", "counterparty_info", "payment_types"),
+    CHAT_REQUIREMENTS: ("order_details", "counterparty_info", "chat_messages"),
+    STATUS20_MESSAGE: ("order_details", "counterparty_info"),
+}
+
+
+def pending_transitions(
+    order: Dict[str, Any],
+    state: Dict[str, Any],
+    *,
+    side: str,
+    payment_type: Optional[str],
+    force_all_messages: bool = False,
+) -> List[str]:
+    status = str(order.get("status") or "")
+    currency = str(order.get("currencyId") or order.get("currency") or "").upper()
+    pending: List[str] = []
+    if side == "BUY" and status == "10" and payment_type != SKIP_PAYMENT_TYPE and not state.get("mark_paid_sent"):
+        pending.append(MARK_PAID)
+    if currency == "PLN" and (not state.get("order_title") or str(state.get("status_code") or "") != status):
+        pending.append(PAYMENT_FIELDS)
+    if not state.get("first_messages_sent"):
+        pending.append(FIRST_MESSAGES)
+    if not state.get("payment_info_sent"):
+        pending.append(PAYMENT_INFO)
+    if side == "BUY" and currency == "PLN" and chat_requirements_pending(state):
+        pending.append(CHAT_REQUIREMENTS)
+    if (force_all_messages or status == "20") and not state.get("status20_msg_sent"):
+        pending.append(STATUS20_MESSAGE)
+    return pending
+
+
+def required_endpoints(pending: List[str]) -> set[str]:
+    return {endpoint for transition in pending for endpoint in TRANSITION_ENDPOINTS.get(transition, ())}
@@ -5,7 +5,6 @@ PLN_WARNINGS = {
                 "❓ номер рахунку\n"
                 "❓ номер телефону BLIK\n"
                 "  (того самого банку)\n"
-                "❓ назва банку\n"
                 "«Щось одне» - НЕДОСТАТНЬО ❌ --- +48 609 819 779"
             ),
         ],
@@ -15,7 +14,6 @@ PLN_WARNINGS = {
                 "❓ account number IBAN\n"
                 "❓ BLIK phone number\n"
                 "  (same bank)\n"
-                "❓ bank name\n"
                 "Missing info = NO PAYMENT ❌ --- +48 609 819 779"
             ),
         ],
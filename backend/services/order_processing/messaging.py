@@ -1,12 +1,34 @@
+from functools import lru_cache
 from typing import Any, Dict, List, Optional
-from uuid import uuid4
 from translitua import translit
 from unidecode import unidecode
 import pycountry
 
-from repositories.order_state_repository import log_action
+from .outbox import OutboundMessage, chat_outbox
 from .messages import INTRO_TEMPLATES, MESSAGES, PAYMENT_LABELS, PLN_WARNINGS, STATUS20
 
+# Templates resolved once at import: per-language messages with the English fallback merged in,
+# and the intro/counterparty blocks as single format strings.
+_MESSAGES_BY_LANG: Dict[str, Dict[str, str]] = {
+    lang: {**MESSAGES["en"], **{key: text for key, text in msgs.items() if text}}
+    for lang, msgs in MESSAGES.items()
+}
+_COUNTERPARTY_TEMPLATE = "\n".join(
+    [
+        "{nickname}",
+        "🙂 {realname}",
+        "🌐 {kyc_code} - {kyc_name}",
+        "🕒⬆️ {avg_transfer} - ⬇️{avg_release}",
+        "🔄 🟢 {buy_count} /  🔴{sell_count}",
+        "👍 {good_appraise} / 👎 {bad_appraise}",
+        "🗓️{reg_days} / {first_trade_days}",
+        "💲 {total_usdt}",
+    ]
+)
+_INTRO_TEMPLATE = "I {side} {token} {quantity} / {currency} {amount} – ({price})  {header}\n{info}"
+
+
+@lru_cache(maxsize=512)
 def country_name(code: str) -> str:
     normalized = (code or "").strip().upper()
     if not normalized:
@@ -37,15 +59,17 @@ def pln_warning_messages(side: str, kyc_code: str) -> list[str]:
 
 
 def message_text(key: str, lang: str) -> str:
-    msgs = MESSAGES.get(lang) or MESSAGES["en"]
-    return msgs.get(key) or MESSAGES["en"].get(key, "")
+    msgs = _MESSAGES_BY_LANG.get(lang) or _MESSAGES_BY_LANG["en"]
+    return msgs.get(key, "")
+
+
+_LATIN_NAME_CHARS = frozenset("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ -'\".")
 
 
 def _is_latin_name(name: str) -> bool:
     if not name:
         return False
-    allowed = set("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ -'\".")
-    return all(ch in allowed for ch in name)
+    return all(ch in _LATIN_NAME_CHARS for ch in name)
 
 
 def _normalize_realname(name: str, kyc_code: str) -> str:
@@ -55,17 +79,22 @@ def _normalize_realname(name: str, kyc_code: str) -> str:
     if _is_latin_name(name_str):
         return name_str
     kyc = (kyc_code or "").strip().upper()
-    if kyc in {"UKR", "UA"} and translit:
+    return _transliterate(name_str, kyc in {"UKR", "UA"})
+
+
+@lru_cache(maxsize=4096)
+def _transliterate(name: str, ukrainian: bool) -> str:
+    if ukrainian and translit:
         try:
-            return translit(name_str)
+            return translit(name)
         except Exception:
             pass
     if unidecode:
         try:
-            return unidecode(name_str)
+            return unidecode(name)
         except Exception:
             pass
-    return name_str
+    return name
 
 
 def counterparty_realname(order: Dict[str, Any], counterparty: Optional[Dict[str, Any]] = None) -> str:
@@ -84,50 +113,44 @@ def counterparty_realname(order: Dict[str, Any], counterparty: Optional[Dict[str
 
 
 def format_counterparty_info(counterparty: Dict[str, Any], order: Dict[str, Any], side: str) -> str:
-    nickname = counterparty.get("nickName") or "-"
-    realname_en = counterparty_realname(order, counterparty)
     kyc_code = counterparty.get("kycCountryCode") or "-"
-    kyc_name = country_name(kyc_code)
-    sell_count = counterparty.get("totalFinishSellCount") or "0"
-    buy_count = counterparty.get("totalFinishBuyCount") or "0"
-    reg_days = counterparty.get("accountCreateDays") or "0"
-    first_trade_days = counterparty.get("firstTradeDays") or "0"
-    total_usdt = counterparty.get("totalTradeAmount") or "0"
-    avg_transfer = counterparty.get("averageTransferTime") or "0"
-    avg_release = counterparty.get("averageReleaseTime") or "0"
-    good_appraise = counterparty.get("goodAppraiseCount") or "0"
-    bad_appraise = counterparty.get("badAppraiseCount") or "0"
-    lines = [
-        str(nickname),
-        f"🙂 {realname_en}",
-        f"🌐 {kyc_code} - {kyc_name}",
-        f"🕒⬆️ {avg_transfer} - ⬇️{avg_release}",
-        f"🔄 🟢 {buy_count} /  🔴{sell_count}",
-        f"👍 {good_appraise} / 👎 {bad_appraise}",
-        f"🗓️{reg_days} / {first_trade_days}",
-        f"💲 {total_usdt}",
-    ]
-    return "\n".join(lines)
+    return _COUNTERPARTY_TEMPLATE.format(
+        nickname=counterparty.get("nickName") or "-",
+        realname=counterparty_realname(order, counterparty),
+        kyc_code=kyc_code,
+        kyc_name=country_name(kyc_code),
+        avg_transfer=counterparty.get("averageTransferTime") or "0",
+        avg_release=counterparty.get("averageReleaseTime") or "0",
+        buy_count=counterparty.get("totalFinishBuyCount") or "0",
+        sell_count=counterparty.get("totalFinishSellCount") or "0",
+        good_appraise=counterparty.get("goodAppraiseCount") or "0",
+        bad_appraise=counterparty.get("badAppraiseCount") or "0",
+        reg_days=counterparty.get("accountCreateDays") or "0",
+        first_trade_days=counterparty.get("firstTradeDays") or "0",
+        total_usdt=counterparty.get("totalTradeAmount") or "0",
+    )
 
 
 def build_intro_message(order: Dict[str, Any], counterparty: Dict[str, Any], side: str, lang: Optional[str] = None) -> str:
     if not lang:
         kyc_code = counterparty.get("kycCountryCode") or counterparty.get("kycCountry") or ""
         lang = language_from_kyc(kyc_code)
-    token = str(order.get("tokenId") or order.get("coin") or "").upper()
-    currency = str(order.get("currencyId") or order.get("currency") or "").upper()
-    quantity = order.get("notifyTokenQuantity") or order.get("quantity") or order.get("coinQuantity") or "-"
-    amount = (
-        order.get("amount")
-        or order.get("fiatAmount")
-        or order.get("totalAmount")
-        or order.get("quantityFiat")
-        or "-"
+    return _INTRO_TEMPLATE.format(
+        side=side,
+        token=str(order.get("tokenId") or order.get("coin") or "").upper(),
+        quantity=order.get("notifyTokenQuantity") or order.get("quantity") or order.get("coinQuantity") or "-",
+        currency=str(order.get("currencyId") or order.get("currency") or "").upper(),
+        amount=(
+            order.get("amount")
+            or order.get("fiatAmount")
+            or order.get("totalAmount")
+            or order.get("quantityFiat")
+            or "-"
+        ),
+        price=order.get("price") or "-",
+        header="from:" if side == "BUY" else "to:",
+        info=format_counterparty_info(counterparty, order, side),
     )
-    price = order.get("price") or "-"
-    direction_line = f"I {side} {token} {quantity} / {currency} {amount} – ({price})"
-    header = "from:" if side == "BUY" else "to:"
-    return f"{direction_line}  {header}\n{format_counterparty_info(counterparty, order, side)}"
 
 
 def _with_bot_prefix(text: str) -> str:
@@ -154,17 +177,22 @@ def send_chat_message(
         print(f"[CHAT]{order_id}: {outgoing}")
     if not send:
         return
-    try:
-        api.send_chat_message(message=outgoing, contentType="str", orderId=order_id, msgUuid=uuid4().hex)
-    except Exception as exc:  # pragma: no cover - third-party errors
-        log_action(
-            order_id,
-            credential_id,
-            "send_chat_message",
-            request={"message": outgoing},
-            response={"error": str(exc)},
-            status="error",
-        )
+    chat_outbox.enqueue(OutboundMessage(api, order_id, credential_id, outgoing))
+
+
+def payment_summary_head(info: Dict[str, str], lang: str = "en") -> str:
+    labels = PAYMENT_LABELS.get(lang) or PAYMENT_LABELS["en"]
+    full_name = info.get("full_name", "Not Found")
+    iban = info.get("iban", "Not Found")
+    phone = info.get("phone", "Not Found")
+    return "\n\n".join(
+        [
+            f"{labels['recipient']}:\n{full_name}",
+            f"{labels['account']}:\n{iban}",
+            labels["or"],
+            f"{labels['phone']}:\n{phone}",
+        ]
+    )
 
 
 def send_payment_details(
@@ -179,6 +207,7 @@ def send_payment_details(
     include_summary: bool = True,
     lang: str = "en",
     title_note: Optional[str] = None,
+    summary_head: Optional[str] = None,
 ) -> None:
     labels = PAYMENT_LABELS.get(lang) or PAYMENT_LABELS["en"]
     bank_raw = info.get("bank", "Not Found")
@@ -204,12 +233,7 @@ def send_payment_details(
     if not include_summary:
         return
 
-    block_lines = [
-        f"{labels['recipient']}:\n{full_name}",
-        f"{labels['account']}:\n{iban}",
-        labels["or"],
-        f"{labels['phone']}:\n{phone}",
-    ]
+    block_lines = [summary_head or payment_summary_head(info, lang)]
     if include_title:
         block_lines.append(f"{labels['title']}:\n{title}")
         if title_note:
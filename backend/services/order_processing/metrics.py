@@ -0,0 +1,153 @@
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, List, Tuple
+
+METRICS_WINDOW_SECONDS = 900
+# Upper bounds in milliseconds; the last bucket catches everything slower.
+LATENCY_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, max(0, math.ceil(fraction * len(values)) - 1))
+    return values[index]
+
+
+def _summarize(samples: List[Tuple[float, bool]]) -> Dict[str, Any]:
+    durations = sorted(duration for duration, _ in samples)
+    buckets: Dict[str, int] = {str(bound): 0 for bound in LATENCY_BUCKETS_MS}
+    buckets["inf"] = 0
+    for duration in durations:
+        for bound in LATENCY_BUCKETS_MS:
+            if duration <= bound:
+                buckets[str(bound)] += 1
+                break
+        else:
+            buckets["inf"] += 1
+    return {
+        "count": len(durations),
+        "errors": sum(1 for _, ok in samples if not ok),
+        "total_ms": round(sum(durations), 3),
+        "p50_ms": round(_percentile(durations, 0.50), 3),
+        "p90_ms": round(_percentile(durations, 0.90), 3),
+        "p99_ms": round(_percentile(durations, 0.99), 3),
+        "max_ms": round(durations[-1], 3) if durations else 0.0,
+        "buckets": buckets,
+    }
+
+
+class InstrumentedClient:
+    """Proxy around an exchange client that records one endpoint sample per method call."""
+
+    def __init__(self, client, metrics: "WorkerMetrics") -> None:
+        self._client = client
+        self._metrics = metrics
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._client, name)
+        if not callable(attr) or name.startswith("_"):
+            return attr
+
+        def call(*args, **kwargs):
+            started = time.perf_counter()
+            ok = False
+            try:
+                result = attr(*args, **kwargs)
+                ok = True
+                return result
+            finally:
+                self._metrics.record_call(name, (time.perf_counter() - started) * 1000, ok=ok)
+
+        return call
+
+
+# Samples older than the window are dropped on write and on read; everything is thread-safe
+# because the chat outbox sends from its own threads.
+class WorkerMetrics:
+    def __init__(self, window_seconds: int = METRICS_WINDOW_SECONDS) -> None:
+        self.window_seconds = window_seconds
+        self._stages: Dict[str, Deque[Tuple[float, float, bool]]] = {}
+        self._calls: Dict[str, Deque[Tuple[float, float, bool]]] = {}
+        self._cycles: Deque[Tuple[float, float, int]] = deque()
+        self._lock = threading.Lock()
+
+    def instrument(self, client) -> InstrumentedClient:
+        return InstrumentedClient(client, self)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            self.record_stage(name, (time.perf_counter() - started) * 1000, ok=ok)
+
+    def record_stage(self, name: str, duration_ms: float, *, ok: bool = True) -> None:
+        self._record(self._stages, name, duration_ms, ok)
+
+    def record_call(self, endpoint: str, duration_ms: float, *, ok: bool = True) -> None:
+        self._record(self._calls, endpoint, duration_ms, ok)
+
+    def record_cycle(self, duration_ms: float, orders: int) -> None:
+        now = time.time()
+        with self._lock:
+            self._cycles.append((now, duration_ms, orders))
+            self._trim(self._cycles, now)
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            stages = {name: self._window(samples, now) for name, samples in self._stages.items()}
+            calls = {name: self._window(samples, now) for name, samples in self._calls.items()}
+            self._trim(self._cycles, now)
+            cycles = list(self._cycles)
+        orders_total = sum(orders for _, _, orders in cycles)
+        span = (now - cycles[0][0]) if cycles else 0.0
+        return {
+            "window_seconds": self.window_seconds,
+            "stages": {name: _summarize(samples) for name, samples in stages.items() if samples},
+            "endpoints": {name: _summarize(samples) for name, samples in calls.items() if samples},
+            "cycles": {
+                **_summarize([(duration, True) for _, duration, _ in cycles]),
+                "orders_total": orders_total,
+                "orders_per_cycle": round(orders_total / len(cycles), 3) if cycles else 0.0,
+                "orders_per_minute": round(orders_total * 60 / span, 3) if span > 0 else 0.0,
+            },
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stages.clear()
+            self._calls.clear()
+            self._cycles.clear()
+
+    def _record(
+        self,
+        target: Dict[str, Deque[Tuple[float, float, bool]]],
+        name: str,
+        duration_ms: float,
+        ok: bool,
+    ) -> None:
+        now = time.time()
+        with self._lock:
+            samples = target.setdefault(name, deque())
+            samples.append((now, duration_ms, ok))
+            self._trim(samples, now)
+
+    def _window(self, samples: Deque[Tuple[float, float, bool]], now: float) -> List[Tuple[float, bool]]:
+        self._trim(samples, now)
+        return [(duration, ok) for _, duration, ok in samples]
+
+    def _trim(self, samples: Deque, now: float) -> None:
+        cutoff = now - self.window_seconds
+        while samples and samples[0][0] < cutoff:
+            samples.popleft()
+
+
+order_metrics = WorkerMetrics()
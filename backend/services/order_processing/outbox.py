@@ -0,0 +1,123 @@
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Optional
+from uuid import uuid4
+
+from repositories.order_state_repository import log_action
+from services.rate_limiter import RateLimiter
+
+logger = logging.getLogger("p2p-panel")
+
+CHAT_OUTBOX_WORKERS = 4
+CHAT_SEND_RATE_PER_SECOND = 5.0
+CHAT_SEND_BURST = 5
+CHAT_SEND_MAX_ATTEMPTS = 3
+CHAT_RETRY_BACKOFF_SECONDS = 1.0
+
+
+@dataclass
+class OutboundMessage:
+    api: Any
+    order_id: str
+    credential_id: str
+    message: str
+    msg_uuid: str = field(default_factory=lambda: uuid4().hex)
+
+
+# FIFO per order, orders drained in parallel; a drain task owns its order until the queue is empty.
+class ChatOutbox:
+    def __init__(
+        self,
+        max_workers: int = CHAT_OUTBOX_WORKERS,
+        limiter: Optional[RateLimiter] = None,
+        max_attempts: int = CHAT_SEND_MAX_ATTEMPTS,
+    ) -> None:
+        self.max_workers = max_workers
+        self.limiter = limiter or RateLimiter(CHAT_SEND_RATE_PER_SECOND, burst=CHAT_SEND_BURST)
+        self.max_attempts = max_attempts
+        self._queues: Dict[str, Deque[OutboundMessage]] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._executor is not None
+
+    def start(self) -> None:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="chat-outbox")
+
+    def stop(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=True)
+
+    def pending(self) -> int:
+        with self._lock:
+            return sum(len(queue) for queue in self._queues.values())
+
+    def enqueue(self, item: OutboundMessage) -> None:
+        with self._lock:
+            executor = self._executor
+            if executor is not None:
+                queue = self._queues.get(item.order_id)
+                if queue is not None:
+                    queue.append(item)
+                    return
+                self._queues[item.order_id] = deque([item])
+                executor.submit(self._drain, item.order_id)
+                return
+        self.deliver(item)
+
+    def _drain(self, order_id: str) -> None:
+        while True:
+            with self._lock:
+                queue = self._queues.get(order_id)
+                if not queue:
+                    self._queues.pop(order_id, None)
+                    return
+                item = queue[0]
+            try:
+                self.deliver(item)
+            except Exception as exc:  # pragma: no cover - background guard
+                logger.exception("Chat outbox delivery crashed order=%s: %s", order_id, exc)
+            with self._lock:
+                queue = self._queues.get(order_id)
+                if queue:
+                    queue.popleft()
+
+    def deliver(self, item: OutboundMessage) -> bool:
+        last_error: Optional[Exception] = None
+        for attempt in range(self.max_attempts):
+            self.limiter.acquire()
+            try:
+                # Retries reuse msgUuid so the exchange can drop a duplicate of a message that did land.
+                item.api.send_chat_message(
+                    message=item.message,
+                    contentType="str",
+                    orderId=item.order_id,
+                    msgUuid=item.msg_uuid,
+                )
+                return True
+            except Exception as exc:  # pragma: no cover - third-party errors
+                last_error = exc
+                if attempt + 1 < self.max_attempts:
+                    time.sleep(CHAT_RETRY_BACKOFF_SECONDS * (attempt + 1))
+        log_action(
+            item.order_id,
+            item.credential_id,
+            "send_chat_message",
+            request={"message": item.message, "msgUuid": item.msg_uuid},
+            response={"error": str(last_error)},
+            status="error",
+        )
+        return False
+
+
+chat_outbox = ChatOutbox()
@@ -1,5 +1,7 @@
 from typing import Any, Dict, List, Optional, Set
 
+from services.bank_codes import bank_for_iban
+from services.payment_contacts import collect_contacts, first_iban, first_phone
 from services.payment_parser import SKIP_PAYMENT_TYPE, parse_pln_payment_terms
 from .constants import PAYMENT_FIELDS
 
@@ -10,25 +12,12 @@ def format_order_title(order_id: str, token_id: Optional[str]) -> str:
     return f"zakup {token} na bybit{suffix}"
 
 
-def normalize_numeric_string(text: str) -> str:
-    if not text:
-        return ""
-    trimmed = "".join(ch for ch in text if ch.isdigit() or ch.isspace())
-    return trimmed.replace(" ", "")
-
-
 def extract_iban(text: str) -> Optional[str]:
-    digits = normalize_numeric_string(text)
-    return digits if digits.isdigit() and len(digits) == 26 else None
+    return first_iban(text)
 
 
 def extract_pl_phone(text: str) -> Optional[str]:
-    digits = normalize_numeric_string(text)
-    if len(digits) == 9 and digits.isdigit():
-        return digits
-    if digits.startswith("48") and len(digits) == 11 and digits[2:].isdigit():
-        return digits[2:]
-    return None
+    return first_phone(text)
 
 
 def payment_terms(order: Dict[str, Any]) -> List[Dict[str, Any]]:
@@ -36,32 +25,24 @@ def payment_terms(order: Dict[str, Any]) -> List[Dict[str, Any]]:
     return terms if isinstance(terms, list) else []
 
 
+def find_payment_with_hash(methods: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    for method in methods or []:
+        branch = str(method.get("branchName") or "")
+        if branch.startswith("###"):
+            return method
+    return None
+
+
 def get_my_payment_with_hash(api) -> Optional[Dict[str, Any]]:
     try:
         resp = api.get_user_payment_types()
-        methods = resp.get("result") or []
-        for method in methods:
-            branch = str(method.get("branchName") or "")
-            if branch.startswith("###"):
-                return method
+        return find_payment_with_hash(resp.get("result") or [])
     except Exception:
         return None
-    return None
 
 
 def _collect_contacts_from_terms(terms: List[Dict[str, Any]]) -> tuple[Set[str], Set[str]]:
-    ibans: Set[str] = set()
-    phones: Set[str] = set()
-    for term in terms:
-        for field in PAYMENT_FIELDS:
-            val = str(term.get(field, "") or "")
-            iban = extract_iban(val)
-            if iban:
-                ibans.add(iban)
-            phone = extract_pl_phone(val)
-            if phone:
-                phones.add(phone)
-    return ibans, phones
+    return collect_contacts(str(term.get(field, "") or "") for term in terms for field in PAYMENT_FIELDS)
 
 
 def extract_pln_payment_buy(order: Dict[str, Any]) -> Dict[str, str]:
@@ -82,8 +63,10 @@ def extract_pln_payment_buy(order: Dict[str, Any]) -> Dict[str, str]:
 
     iban_text = ", ".join(sorted(ibans)) if ibans else "Not Found"
     phone_text = ", ".join(sorted(phones)) if phones else "Not Found"
+    # The routing digits name the actual bank; the term's payment name is often just "Bank Transfer".
+    iban_bank = next((name for name in map(bank_for_iban, sorted(ibans)) if name), None)
     return {
-        "bank": bank_name or "Not Found",
+        "bank": iban_bank or bank_name or "Not Found",
         "phone": phone_text,
         "full_name": full_name or "Not Found",
         "iban": iban_text,
@@ -92,8 +75,14 @@ def extract_pln_payment_buy(order: Dict[str, Any]) -> Dict[str, str]:
     }
 
 
-def extract_pln_payment_sell(api, order_id: str = "", token_id: Optional[str] = None) -> Dict[str, str]:
-    method = get_my_payment_with_hash(api) or {}
+def extract_pln_payment_sell(
+    api,
+    order_id: str = "",
+    token_id: Optional[str] = None,
+    method: Optional[Dict[str, Any]] = None,
+) -> Dict[str, str]:
+    if method is None:
+        method = get_my_payment_with_hash(api) or {}
     iban = extract_iban(method.get("accountNo", ""))
     phone = extract_pl_phone(method.get("bankName", "")) or extract_pl_phone(method.get("accountNo", ""))
     realname = method.get("realName") or ""
@@ -1,8 +1,7 @@
 import logging
-from datetime import datetime
 from typing import Any, Dict, Optional
 
-from repositories.order_state_repository import fetch_state, log_action, update_flags, upsert_state
+from repositories.order_state_repository import log_action
 from services.orders_service import _fetch_counterparty_info
 
 from services.payment_parser import SKIP_PAYMENT_TYPE
@@ -16,14 +15,26 @@ from .messaging import (
     send_payment_details,
     status20_message,
 )
-from .chat_requirements import process_chat_requirements
+from .chat_requirements import chat_requirements_pending, process_chat_requirements
+from .details_cache import order_details_cache
+from .lifecycle import (
+    CHAT_REQUIREMENTS,
+    FIRST_MESSAGES,
+    MARK_PAID,
+    PAYMENT_FIELDS,
+    PAYMENT_INFO,
+    STATUS20_MESSAGE,
+    pending_transitions,
+    required_endpoints,
+)
+from .profile_cache import profile_cache
+from .state_cache import OrderStateCache
 from .payments import (
     extract_payment_id,
     extract_payment_info_buy,
     extract_payment_info_sell,
     extract_payment_type,
     extract_pln_payment_buy,
-    extract_pln_payment_sell,
     format_order_title,
 )
 
@@ -52,6 +63,7 @@ def _build_payment_state_fields(
     order: Dict[str, Any],
     side: str,
     counterparty: Dict[str, Any],
+    credential_id: str = "",
 ) -> tuple[Dict[str, Any], set[str]]:
     currency = str(order.get("currencyId") or order.get("currency") or "").upper()
     if currency != "PLN":
@@ -59,8 +71,8 @@ def _build_payment_state_fields(
 
     order_id = str(order.get("id") or order.get("orderId") or "")
     token_id = str(order.get("tokenId") or order.get("tokenName") or "")
+    my_info = profile_cache.get(api, credential_id).pln_payment_info(order_id, token_id)
     if side == "BUY":
-        my_info = extract_pln_payment_sell(api, order_id, token_id)
         to_info = extract_pln_payment_buy(order)
         to_info["full_name"] = counterparty_realname(order, counterparty)
         order_title = to_info.get("order_title") or my_info.get("order_title") or format_order_title(order_id, token_id)
@@ -74,7 +86,6 @@ def _build_payment_state_fields(
         }, set()
 
     confirmed_name = _extract_confirmed_payment_name(order)
-    my_info = extract_pln_payment_sell(api, order_id, token_id)
     order_title = my_info.get("order_title") or format_order_title(order_id, token_id)
     return {
         "from_bank": confirmed_name,
@@ -100,25 +111,15 @@ def _apply_payment_state_fields(
             state[key] = value
 
 
-def load_order_details(api, order_id: str) -> Optional[Dict[str, Any]]:
-    try:
-        response = api.get_order_details(orderId=order_id)
-    except Exception:  # pragma: no cover - network/API failures
-        return None
-    if not isinstance(response, dict):
-        return None
-    details = response.get("result")
-    if isinstance(details, dict):
-        return details
-    return None
+def load_order_details(api, order: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    return order_details_cache.get(api, order)
 
 
 def resolve_payment_term(api, order: Dict[str, Any]) -> Optional[Dict[str, Any]]:
     terms = order.get("paymentTermList") or order.get("paymentTerms") or []
     if isinstance(terms, list) and terms:
         return terms[0]
-    details = api.get_order_details(orderId=str(order.get("id") or order.get("orderId") or ""))
-    result = details.get("result") if isinstance(details, dict) else None
+    result = order_details_cache.get(api, order)
     if isinstance(result, dict):
         term_list = result.get("paymentTermList") or []
         if isinstance(term_list, list) and term_list:
@@ -150,10 +151,71 @@ def mark_as_paid(api, order: Dict[str, Any]) -> Dict[str, Any]:
         "paymentId": payment_id or "",
     }
     resp = api.mark_as_paid(**payload)
+    order_details_cache.invalidate(order_id)
     logger.info("mark_as_paid order=%s resp=%s", order_id, resp)
     return resp
 
 
+def _mark_paid_transition(
+    api,
+    creds: Dict[str, Any],
+    order: Dict[str, Any],
+    state: Dict[str, Any],
+    *,
+    record_state: bool,
+) -> bool:
+    order_id = str(order.get("id") or order.get("orderId") or "")
+    resp = mark_as_paid(api, order)
+    status_text = resp.get("ret_msg") if isinstance(resp, dict) else ""
+    if status_text and status_text.lower() != "success":
+        logger.error("mark_as_paid error order=%s resp=%s", order_id, resp)
+        if record_state:
+            log_action(order_id, creds["id"], "mark_as_paid", response=resp, status="error")
+        return False
+    if record_state:
+        log_action(order_id, creds["id"], "mark_as_paid", response=resp, status="success")
+        state["mark_paid_sent"] = True
+    return True
+
+
+def _order_side(order: Dict[str, Any]) -> str:
+    return "SELL" if str(order.get("side")) in {"1", "sell", "SELL"} else "BUY"
+
+
+def _default_state(order: Dict[str, Any], creds: Dict[str, Any], payment_type: Optional[str]) -> Dict[str, Any]:
+    return {
+        "order_id": str(order.get("id") or order.get("orderId") or ""),
+        "credential_id": creds.get("id", ""),
+        "exchange": "bybit",
+        "side": _order_side(order),
+        "status_code": order.get("status"),
+        "payment_type": payment_type,
+        "first_messages_sent": False,
+        "counterparty_msg_sent": False,
+        "payment_info_sent": False,
+        "status20_msg_sent": False,
+        "mark_paid_sent": False,
+    }
+
+
+def run_fast_lane(api, creds: Dict[str, Any], order: Dict[str, Any], state_cache: OrderStateCache) -> bool:
+    """Run time-critical transitions (mark-as-paid for new BUY orders) before any chat traffic.
+
+    Uses the listed order as-is when it carries payment terms, so the only call is ``mark_as_paid``.
+    """
+    order_id = str(order.get("id") or order.get("orderId") or "")
+    if not order_id or _order_side(order) != "BUY" or str(order.get("status")) != "10":
+        return False
+    payment_type = extract_payment_type(order)
+    if payment_type is None:
+        order = load_order_details(api, order) or order
+        payment_type = extract_payment_type(order)
+    state = state_cache.load(order_id, _default_state(order, creds, payment_type))
+    if not should_mark_paid(order, payment_type, state):
+        return False
+    return _mark_paid_transition(api, creds, order, state, record_state=True)
+
+
 def _handle_payment_info_buy(
     api,
     order: Dict[str, Any],
@@ -206,7 +268,8 @@ def _handle_payment_info_sell(
     order_id = str(order.get("id") or order.get("orderId") or "")
     if currency == "PLN":
         token_id = str(order.get("tokenId") or order.get("tokenName") or "")
-        info = extract_pln_payment_sell(api, order_id, token_id)
+        profile = profile_cache.get(api, credential_id)
+        info = profile.pln_payment_info(order_id, token_id)
         send_chat_message(
             api,
             order_id,
@@ -225,6 +288,7 @@ def _handle_payment_info_sell(
             include_title=True,
             lang=lang,
             title_note=message_text("title_note", lang),
+            summary_head=profile.payment_block(lang),
         )
     else:
         msg = extract_payment_info_sell(
@@ -244,49 +308,99 @@ def process_single_order(
     echo: bool = False,
     force_all_messages: bool = False,
     send_messages: bool = True,
+    state_cache: Optional[OrderStateCache] = None,
+) -> None:
+    owns_cache = record_state and state_cache is None
+    cache = state_cache or OrderStateCache()
+    try:
+        _process_order(
+            api,
+            creds,
+            order,
+            cache,
+            record_state=record_state,
+            echo=echo,
+            force_all_messages=force_all_messages,
+            send_messages=send_messages,
+        )
+    finally:
+        if owns_cache:
+            cache.flush()
+
+
+def _process_order(
+    api,
+    creds: Dict[str, Any],
+    order: Dict[str, Any],
+    cache: OrderStateCache,
+    *,
+    record_state: bool,
+    echo: bool,
+    force_all_messages: bool,
+    send_messages: bool,
 ) -> None:
     order_id = str(order.get("id") or order.get("orderId") or "")
     if not order_id:
         return
-    order_details = load_order_details(api, order_id)
-    if order_details:
-        order = order_details
-    counterparty_info = order.get("counterparty_info") or _fetch_counterparty_info(api, order) or {}
-    payment_type = extract_payment_type(order)
+    known_state = cache.get(order_id) if record_state else None
+    payment_type = extract_payment_type(order) or (known_state or {}).get("payment_type")
+    order_details: Optional[Dict[str, Any]] = None
+    if payment_type is None:
+        order_details = load_order_details(api, order)
+        if order_details:
+            order = order_details
+        payment_type = extract_payment_type(order)
     if payment_type == SKIP_PAYMENT_TYPE:
         return
-    side = "SELL" if str(order.get("side")) in {"1", "sell", "SELL"} else "BUY"
+    side = _order_side(order)
+    default_state = _default_state(order, creds, payment_type)
+    state = cache.load(order_id, default_state) if record_state else default_state
+    if record_state:
+        cache.touch(order_id)
+    pending = pending_transitions(
+        order, state, side=side, payment_type=payment_type, force_all_messages=force_all_messages
+    )
+    if not pending:
+        # Fully handled: nothing to send or record, so no exchange calls this cycle.
+        state["status_code"] = order.get("status")
+        return
+
+    endpoints = required_endpoints(pending)
+    if order_details is None and "order_details" in endpoints:
+        order_details = load_order_details(api, order)
+        if order_details:
+            order = order_details
+            payment_type = extract_payment_type(order) or payment_type
+            pending = pending_transitions(
+                order, state, side=side, payment_type=payment_type, force_all_messages=force_all_messages
+            )
+    counterparty_info: Dict[str, Any] = {}
+    if "counterparty_info" in required_endpoints(pending):
+        counterparty_info = order.get("counterparty_info") or _fetch_counterparty_info(api, order) or {}
+        if counterparty_info and order_details:
+            # Kept on the cached details so later cycles skip the lookup until the order changes.
+            order_details["counterparty_info"] = counterparty_info
     currency = str(order.get("currencyId") or order.get("currency") or "").upper()
     lang = language_from_kyc(counterparty_info.get("kycCountryCode") or counterparty_info.get("kycCountry") or "")
-    state = fetch_state(order_id) if record_state else None
-    if not state:
-        state = {
-            "order_id": order_id,
-            "credential_id": creds.get("id", ""),
-            "exchange": "bybit",
-            "side": side,
-            "status_code": order.get("status"),
-            "payment_type": payment_type,
-            "first_messages_sent": False,
-            "counterparty_msg_sent": False,
-            "payment_info_sent": False,
-            "status20_msg_sent": False,
-            "mark_paid_sent": False,
-        }
     state["status_code"] = order.get("status")
     state["payment_type"] = payment_type
-    state["last_seen_at"] = datetime.utcnow().isoformat()
-    payment_fields, clear_fields = _build_payment_state_fields(api, order, side, counterparty_info)
-    _apply_payment_state_fields(
-        state,
-        payment_fields,
-        overwrite_fields={"from_bank"},
-        clear_fields=clear_fields,
-    )
-    if record_state:
-        upsert_state(state)
 
-    if not state.get("first_messages_sent"):
+    # Time-critical transition first; chat messages below go through the outbox.
+    if MARK_PAID in pending:
+        _mark_paid_transition(api, creds, order, state, record_state=record_state)
+
+    if PAYMENT_FIELDS in pending:
+        payment_fields, clear_fields = _build_payment_state_fields(
+            api, order, side, counterparty_info, creds.get("id", "")
+        )
+        _apply_payment_state_fields(
+            state,
+            payment_fields,
+            overwrite_fields={"from_bank"},
+            clear_fields=clear_fields,
+        )
+
+    if FIRST_MESSAGES in pending:
         if currency == "PLN":
             kyc_code = counterparty_info.get("kycCountryCode") or counterparty_info.get("kycCountry") or ""
             for msg in pln_warning_messages(side, kyc_code):
@@ -294,10 +408,10 @@ def process_single_order(
         text = build_intro_message(order, counterparty_info, side, lang=lang)
         send_chat_message(api, order_id, text, creds["id"], echo=echo, send=send_messages, bot_prefix=False)
         if record_state:
-            update_flags(order_id, first_messages_sent=True, counterparty_msg_sent=True)
+            state.update(first_messages_sent=True, counterparty_msg_sent=True)
             log_action(order_id, creds["id"], "first_message", request={"message": text})
 
-    if not state.get("payment_info_sent"):
+    if PAYMENT_INFO in pending:
         if side == "BUY":
             _handle_payment_info_buy(
                 api,
@@ -311,38 +425,27 @@ def process_single_order(
         else:
             _handle_payment_info_sell(api, order, creds["id"], echo=echo, send_messages=send_messages, lang=lang)
         if record_state:
-            update_flags(order_id, payment_info_sent=True)
+            state["payment_info_sent"] = True
             log_action(order_id, creds["id"], "payment_info", request={"message": "sent"})
 
-    chat_updates = process_chat_requirements(
-        api,
-        order,
-        state,
-        side=side,
-        lang=lang,
-        credential_id=creds.get("id", ""),
-        echo=echo,
-        send_messages=send_messages,
-    )
-    if record_state and chat_updates:
-        update_flags(order_id, **chat_updates)
-        state.update(chat_updates)
+    # Payment fields filled just above may already complete the data, so re-check before reading chat.
+    if CHAT_REQUIREMENTS in pending and chat_requirements_pending(state):
+        chat_updates = process_chat_requirements(
+            api,
+            order,
+            state,
+            side=side,
+            lang=lang,
+            credential_id=creds.get("id", ""),
+            echo=echo,
+            send_messages=send_messages,
+        )
+        if record_state and chat_updates:
+            state.update(chat_updates)
 
-    if (force_all_messages or str(order.get("status")) == "20") and not state.get("status20_msg_sent"):
+    if STATUS20_MESSAGE in pending:
         text = status20_message(side, lang=lang)
         send_chat_message(api, order_id, text, creds["id"], echo=echo, send=send_messages)
         if record_state:
-            update_flags(order_id, status20_msg_sent=True)
+            state["status20_msg_sent"] = True
             log_action(order_id, creds["id"], "status20_message", request={"message": text})
-
-    if should_mark_paid(order, payment_type, state):
-        resp = mark_as_paid(api, order)
-        status_text = resp.get("ret_msg") if isinstance(resp, dict) else ""
-        if status_text and status_text.lower() != "success":
-            logger.error("mark_as_paid error order=%s resp=%s", order_id, resp)
-            if record_state:
-                log_action(order_id, creds["id"], "mark_as_paid", response=resp, status="error")
-        else:
-            if record_state:
-                log_action(order_id, creds["id"], "mark_as_paid", response=resp, status="success")
-                update_flags(order_id, mark_paid_sent=True)
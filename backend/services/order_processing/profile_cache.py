@@ -0,0 +1,107 @@
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from .messaging import payment_summary_head
+from .payments import extract_pln_payment_sell, find_payment_with_hash
+
+logger = logging.getLogger("p2p-panel")
+
+PROFILE_TTL_SECONDS = 600
+# A partially loaded profile (one of the calls failed) is retried much sooner.
+PROFILE_RETRY_SECONDS = 30
+
+
+@dataclass
+class CredentialProfile:
+    account_id: str = ""
+    nickname: str = ""
+    payment_methods: List[Dict[str, Any]] = field(default_factory=list)
+    payment_blocks: Dict[str, str] = field(default_factory=dict)
+    loaded_at: float = 0.0
+    complete: bool = False
+
+    @property
+    def pln_payment_method(self) -> Optional[Dict[str, Any]]:
+        return find_payment_with_hash(self.payment_methods)
+
+    def pln_payment_info(self, order_id: str = "", token_id: Optional[str] = None) -> Dict[str, str]:
+        return extract_pln_payment_sell(None, order_id, token_id, method=self.pln_payment_method or {})
+
+    def payment_block(self, lang: str) -> str:
+        block = self.payment_blocks.get(lang)
+        if block is None:
+            block = payment_summary_head(self.pln_payment_info(), lang)
+            self.payment_blocks[lang] = block
+        return block
+
+
+def _load_account(api) -> Optional[Dict[str, Any]]:
+    try:
+        resp = api.get_account_information()
+    except Exception as exc:  # pragma: no cover - network/API failures
+        logger.warning("get_account_information failed: %s", exc)
+        return None
+    result = resp.get("result") if isinstance(resp, dict) else None
+    return result if isinstance(result, dict) else None
+
+
+def _load_payment_methods(api) -> Optional[List[Dict[str, Any]]]:
+    try:
+        resp = api.get_user_payment_types()
+    except Exception as exc:  # pragma: no cover - network/API failures
+        logger.warning("get_user_payment_types failed: %s", exc)
+        return None
+    result = resp.get("result") if isinstance(resp, dict) else None
+    return result if isinstance(result, list) else None
+
+
+class CredentialProfileCache:
+    def __init__(
+        self,
+        ttl_seconds: int = PROFILE_TTL_SECONDS,
+        retry_seconds: int = PROFILE_RETRY_SECONDS,
+    ) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.retry_seconds = retry_seconds
+        self._profiles: Dict[str, CredentialProfile] = {}
+        self._lock = threading.Lock()
+
+    def get(self, api, credential_id: str) -> CredentialProfile:
+        with self._lock:
+            profile = self._profiles.get(credential_id)
+        if profile and not self._expired(profile):
+            return profile
+        return self.refresh(api, credential_id)
+
+    def refresh(self, api, credential_id: str) -> CredentialProfile:
+        previous = self._profiles.get(credential_id) or CredentialProfile()
+        account = _load_account(api)
+        methods = _load_payment_methods(api)
+        # Keep the last good values when a refresh call fails instead of caching the failure.
+        profile = CredentialProfile(
+            account_id=str(account.get("accountId") or "") if account else previous.account_id,
+            nickname=str(account.get("nickName") or "") if account else previous.nickname,
+            payment_methods=methods if methods is not None else previous.payment_methods,
+            loaded_at=time.monotonic(),
+            complete=account is not None and methods is not None,
+        )
+        with self._lock:
+            self._profiles[credential_id] = profile
+        return profile
+
+    def invalidate(self, credential_id: Optional[str] = None) -> None:
+        with self._lock:
+            if credential_id is None:
+                self._profiles.clear()
+            else:
+                self._profiles.pop(credential_id, None)
+
+    def _expired(self, profile: CredentialProfile) -> bool:
+        max_age = self.ttl_seconds if profile.complete else self.retry_seconds
+        return time.monotonic() - profile.loaded_at >= max_age
+
+
+profile_cache = CredentialProfileCache()
@@ -0,0 +1,124 @@
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+# Revisit interval per order status; new orders (10) need the fastest reaction.
+STATUS_POLL_SECONDS = {
+    "10": 5,
+    "20": 15,
+    "90": 30,
+    "5": 120,
+    "30": 300,
+    "100": 300,
+    "110": 300,
+}
+
+
+def _unread_count(order: Dict[str, Any]) -> int:
+    total = 0
+    for key in ("unreadMsgCount", "selfUnreadMsgCount"):
+        try:
+            total += int(order.get(key) or 0)
+        except (TypeError, ValueError):
+            continue
+    return total
+
+
+def _signature(order: Dict[str, Any]) -> Tuple[str, int]:
+    return str(order.get("status") or ""), _unread_count(order)
+
+
+class OrderScheduler:
+    def __init__(
+        self,
+        *,
+        default_seconds: float,
+        min_seconds: float,
+        max_seconds: float,
+        list_interval_seconds: float,
+        hot_list_interval_seconds: Optional[float] = None,
+        hot_seconds: float = 0.0,
+    ) -> None:
+        self.default_seconds = default_seconds
+        self.min_seconds = min_seconds
+        self.max_seconds = max(max_seconds, min_seconds)
+        self.list_interval_seconds = list_interval_seconds
+        # Accounts with pending or recent BUY orders are listed more often: a new order there
+        # should not wait a full list interval to be marked paid.
+        self.hot_list_interval_seconds = min(hot_list_interval_seconds or list_interval_seconds, list_interval_seconds)
+        self.hot_seconds = hot_seconds
+        self._next_due: Dict[str, float] = {}
+        self._signatures: Dict[str, Tuple[str, int]] = {}
+        self._order_accounts: Dict[str, str] = {}
+        self._account_listed_at: Dict[str, float] = {}
+        self._account_hot_until: Dict[str, float] = {}
+
+    def _clamp(self, seconds: float) -> float:
+        return min(max(seconds, self.min_seconds), self.max_seconds)
+
+    def interval_for(self, order: Dict[str, Any], *, active: bool = False) -> float:
+        if active or _unread_count(order) > 0:
+            return self.min_seconds
+        status = str(order.get("status") or "")
+        return self._clamp(STATUS_POLL_SECONDS.get(status, self.default_seconds))
+
+    def is_due(self, order_id: str, order: Dict[str, Any], now: float) -> bool:
+        next_due = self._next_due.get(order_id)
+        if next_due is None or self._signatures.get(order_id) != _signature(order):
+            return True
+        return now >= next_due
+
+    def mark_visited(
+        self,
+        account_id: str,
+        order_id: str,
+        order: Dict[str, Any],
+        now: float,
+        *,
+        active: bool = False,
+    ) -> None:
+        self._next_due[order_id] = now + self.interval_for(order, active=active)
+        self._signatures[order_id] = _signature(order)
+        self._order_accounts[order_id] = account_id
+
+    def account_list_interval(self, account_id: str, now: float) -> float:
+        if self._account_hot_until.get(account_id, 0.0) > now:
+            return self.hot_list_interval_seconds
+        return self.list_interval_seconds
+
+    def account_due(self, account_id: str, now: float) -> bool:
+        listed_at = self._account_listed_at.get(account_id)
+        if listed_at is None or now - listed_at >= self.account_list_interval(account_id, now):
+            return True
+        return any(
+            due <= now
+            for order_id, due in self._next_due.items()
+            if self._order_accounts.get(order_id) == account_id
+        )
+
+    def mark_listed(self, account_id: str, order_ids: Iterable[str], now: float, *, buy_activity: bool = False) -> None:
+        self._account_listed_at[account_id] = now
+        if buy_activity:
+            self._account_hot_until[account_id] = now + self.hot_seconds
+        keep = set(order_ids)
+        for order_id in [oid for oid, acc in self._order_accounts.items() if acc == account_id and oid not in keep]:
+            self._next_due.pop(order_id, None)
+            self._signatures.pop(order_id, None)
+            self._order_accounts.pop(order_id, None)
+
+    def retain_accounts(self, account_ids: Iterable[str]) -> None:
+        keep = set(account_ids)
+        for account_id in list(self._account_listed_at):
+            if account_id not in keep:
+                self.mark_listed(account_id, [], 0.0)
+                self._account_listed_at.pop(account_id, None)
+                self._account_hot_until.pop(account_id, None)
+
+    def sleep_seconds(self, now: float) -> float:
+        wakeups = [
+            listed + self.account_list_interval(account_id, now)
+            for account_id, listed in self._account_listed_at.items()
+        ]
+        wakeups.extend(self._next_due.values())
+        next_wakeup: Optional[float] = min(wakeups) if wakeups else None
+        if next_wakeup is None:
+            return self.min_seconds
+        return min(max(next_wakeup - now, self.min_seconds), self.list_interval_seconds)
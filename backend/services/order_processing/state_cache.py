@@ -0,0 +1,172 @@
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from repositories.order_state_repository import fetch_state, fetch_states, upsert_states
+
+logger = logging.getLogger("p2p-panel")
+
+# Columns sent with every partial write so the INSERT half of the upsert stays valid.
+IDENTITY_FIELDS = ("order_id", "credential_id", "exchange", "side")
+LAST_SEEN_REFRESH_SECONDS = 300
+
+_MISSING = object()
+
+
+# Rows stay in memory across cycles; flush writes only columns that differ from what was stored.
+class OrderStateCache:
+    def __init__(self, last_seen_refresh_seconds: int = LAST_SEEN_REFRESH_SECONDS) -> None:
+        self.last_seen_refresh_seconds = last_seen_refresh_seconds
+        self._states: Dict[str, Dict[str, Any]] = {}
+        self._persisted: Dict[str, Dict[str, Any]] = {}
+        self._checked: set[str] = set()
+        self._last_seen_written: Dict[str, float] = {}
+        self._order_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.RLock()
+
+    def order_lock(self, order_id: str) -> threading.Lock:
+        """Serializes the worker and one-off reprocessing of the same order."""
+        with self._lock:
+            return self._order_locks.setdefault(order_id, threading.Lock())
+
+    def preload(self, order_ids: Iterable[str], *, held: Iterable[str] = ()) -> None:
+        # Re-read every listed row so edits made by other processes or by hand are picked up;
+        # rows with unsaved local changes keep their in-memory state until they are flushed.
+        # Orders locked by someone else are left alone (and unchecked, so load() still reads them);
+        # ``held`` names the orders whose lock the caller itself holds.
+        order_ids = [order_id for order_id in dict.fromkeys(order_ids) if order_id]
+        if not order_ids:
+            return
+        held = set(held)
+        rows = fetch_states(order_ids)
+        with self._lock:
+            for order_id in order_ids:
+                if order_id not in held and self._is_locked(order_id):
+                    continue
+                self._checked.add(order_id)
+                row = rows.get(order_id)
+                if not row or self.dirty_fields(order_id):
+                    continue
+                state = self._states.get(order_id)
+                if state is None:
+                    self._states[order_id] = dict(row)
+                else:
+                    # Update in place: processors may hold a reference to the state dict.
+                    state.clear()
+                    state.update(row)
+                self._persisted[order_id] = dict(row)
+
+    def load(self, order_id: str, default: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            state = self._states.get(order_id)
+            if state is not None:
+                return state
+            checked = order_id in self._checked
+        row = None if checked else fetch_state(order_id)
+        with self._lock:
+            self._checked.add(order_id)
+            state = self._states.get(order_id)
+            if state is not None:
+                return state
+            if row:
+                state = dict(row)
+                self._persisted[order_id] = dict(row)
+            else:
+                state = dict(default)
+            self._states[order_id] = state
+            return state
+
+    def get(self, order_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._states.get(order_id)
+
+    def touch(self, order_id: str) -> None:
+        now = time.monotonic()
+        with self._lock:
+            state = self._states.get(order_id)
+            if state is None:
+                return
+            last_written = self._last_seen_written.get(order_id)
+            if last_written is not None and now - last_written < self.last_seen_refresh_seconds:
+                return
+            state["last_seen_at"] = datetime.utcnow().isoformat()
+
+    def dirty_fields(self, order_id: str) -> Dict[str, Any]:
+        with self._lock:
+            state = self._states.get(order_id) or {}
+            persisted = self._persisted.get(order_id) or {}
+            return {
+                key: value
+                for key, value in state.items()
+                if persisted.get(key, _MISSING) != value
+            }
+
+    def flush(self, order_ids: Optional[Iterable[str]] = None) -> int:
+        with self._lock:
+            pending: Dict[str, Dict[str, Any]] = {}
+            targets = list(self._states) if order_ids is None else [oid for oid in order_ids if oid in self._states]
+            for order_id in targets:
+                changes = self.dirty_fields(order_id)
+                if changes:
+                    pending[order_id] = changes
+            if not pending:
+                return 0
+            groups: Dict[frozenset, List[Dict[str, Any]]] = {}
+            for order_id, changes in pending.items():
+                state = self._states[order_id]
+                record = {key: state.get(key) for key in IDENTITY_FIELDS}
+                record.update(changes)
+                groups.setdefault(frozenset(record), []).append(record)
+        # PostgREST bulk upserts need one column set per request; rows usually share it.
+        written = 0
+        for records in groups.values():
+            try:
+                upsert_states(records)
+            except Exception as exc:  # pragma: no cover - network/database error
+                logger.warning("order_state flush failed rows=%s err=%s", len(records), exc)
+                continue
+            now = time.monotonic()
+            with self._lock:
+                for record in records:
+                    order_id = str(record.get("order_id") or "")
+                    persisted = self._persisted.setdefault(order_id, {})
+                    persisted.update(record)
+                    if "last_seen_at" in record:
+                        self._last_seen_written[order_id] = now
+            written += len(records)
+        return written
+
+    def _is_locked(self, order_id: str) -> bool:
+        lock = self._order_locks.get(order_id)
+        return lock is not None and lock.locked()
+
+    def _drop(self, order_id: str) -> None:
+        self._states.pop(order_id, None)
+        self._persisted.pop(order_id, None)
+        self._last_seen_written.pop(order_id, None)
+        if not self._is_locked(order_id):
+            self._order_locks.pop(order_id, None)
+
+    def retain(self, order_ids: Iterable[str]) -> None:
+        keep = set(order_ids)
+        with self._lock:
+            for order_id in list(self._states):
+                if order_id in keep or self.dirty_fields(order_id):
+                    continue
+                self._drop(order_id)
+            self._checked &= keep | set(self._states)
+
+    def retain_credentials(self, credential_ids: Iterable[str]) -> None:
+        """Drop rows of credentials this process no longer owns, unsaved changes included."""
+        keep = {str(credential_id) for credential_id in credential_ids}
+        with self._lock:
+            for order_id, state in list(self._states.items()):
+                if str(state.get("credential_id") or "") in keep:
+                    continue
+                self._drop(order_id)
+                self._checked.discard(order_id)
+
+
+order_state_cache = OrderStateCache()
@@ -1,19 +1,39 @@
 import asyncio
 import contextlib
 import logging
+import time
 from datetime import datetime
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
+from config import settings
 from exchanges import ExchangeCredentials, create_exchange_client
-from repositories.credentials_repository import fetch_all_credentials
+from repositories.credentials_repository import fetch_all_credentials, fetch_user_credentials
 from services.credentials_service import build_exchange_credentials
-from services.orders_service import _load_bybit_pending_orders
+from services.orders_service import _fetch_counterparty_info, _load_bybit_pending_orders
 
-from services.order_processing.processors import process_single_order
+from services.order_processing.chat_history import search_transcripts
+from services.order_processing.details_cache import order_details_cache
+from services.order_processing.lifecycle import TERMINAL_STATUSES
+from services.order_processing.metrics import order_metrics
+from services.order_processing.outbox import chat_outbox
+from services.order_processing.processors import process_single_order, run_fast_lane
+from services.order_processing.scheduler import OrderScheduler
+from services.order_processing.state_cache import OrderStateCache, order_state_cache
+from services.sharding import lease_store, owned_credentials, release_shard
+from services.worker_supervisor import ORDER_PROCESSING_WORKER, worker_supervisor
 
 logger = logging.getLogger("p2p-panel")
 
 POLL_INTERVAL_SECONDS = 30
+ORDER_PROCESSING_SHARD_GROUP = "order_processing"
+# Reprocess requests are handed to whichever runner owns the credential through the lease store:
+# the API holds ``reprocess:...`` until a runner answers under ``reprocess-result:...``.
+REPROCESS_REQUEST_PREFIX = f"reprocess:{ORDER_PROCESSING_SHARD_GROUP}:"
+REPROCESS_RESULT_PREFIX = f"reprocess-result:{ORDER_PROCESSING_SHARD_GROUP}:"
+REPROCESS_TIMEOUT_SECONDS = 90
+REPROCESS_POLL_SECONDS = 1.0
+# Runners look for reprocess requests at least this often, even when no account is due.
+REPROCESS_CHECK_SECONDS = 5.0
 
 
 def _process_single_order(
@@ -24,6 +44,7 @@ def _process_single_order(
     echo: bool = False,
     force_all_messages: bool = False,
     send_messages: bool = True,
+    state_cache: Optional[OrderStateCache] = None,
 ) -> None:
     process_single_order(
         api,
@@ -33,15 +54,114 @@ def _process_single_order(
         echo=echo,
         force_all_messages=force_all_messages,
         send_messages=send_messages,
+        state_cache=state_cache,
     )
 
 
-async def _process_account(row: Dict[str, Any]) -> None:
+def _order_id(order: Dict[str, Any]) -> str:
+    return str(order.get("id") or order.get("orderId") or "")
+
+
+async def _persist_order_state(order_id: str) -> bool:
+    """Write the order's side-effect flags before moving on; False when they stay unsaved."""
+    if not order_id:
+        return True
+    with order_metrics.stage("state_flush"):
+        await asyncio.to_thread(order_state_cache.flush, [order_id])
+    return not order_state_cache.dirty_fields(order_id)
+
+
+def _reprocess_key(credential_id: str, order_id: str) -> str:
+    return f"{credential_id}:{order_id}"
+
+
+def _pending_reprocess_requests() -> Dict[str, Dict[str, str]]:
+    """Open reprocess requests as {credential_id: {order_id: requester}}."""
+    requests: Dict[str, Dict[str, str]] = {}
+    for name, owner in lease_store().holders(REPROCESS_REQUEST_PREFIX).items():
+        credential_id, _, order_id = name[len(REPROCESS_REQUEST_PREFIX):].rpartition(":")
+        if credential_id and order_id:
+            requests.setdefault(credential_id, {})[order_id] = owner
+    return requests
+
+
+def _answer_reprocess(credential_id: str, order_id: str, requester: str, processed: bool) -> None:
+    store = lease_store()
+    key = _reprocess_key(credential_id, order_id)
+    # The result lease's owner field carries the answer back to the requester.
+    store.acquire(REPROCESS_RESULT_PREFIX + key, "processed" if processed else "missing", REPROCESS_TIMEOUT_SECONDS)
+    store.release(REPROCESS_REQUEST_PREFIX + key, requester)
+
+
+async def _process_account(
+    row: Dict[str, Any],
+    scheduler: OrderScheduler,
+    requested: Optional[Dict[str, str]] = None,
+) -> Optional[Tuple[List[str], int]]:
+    account_id = str(row.get("id") or "")
+    requested = requested or {}
+    if not requested and not scheduler.account_due(account_id, time.monotonic()):
+        return None
     creds_obj = build_exchange_credentials(row)
-    client = create_exchange_client(creds_obj)
-    orders = await asyncio.to_thread(_load_bybit_pending_orders, creds_obj)
+    client = order_metrics.instrument(create_exchange_client(creds_obj))
+    # Counterparty info is looked up lazily by the processor and kept on the cached order details.
+    with order_metrics.stage("list_orders"):
+        orders = await asyncio.to_thread(_load_bybit_pending_orders, creds_obj, False, client)
+    order_ids = [_order_id(order) for order in orders]
+    buy_activity = any(str(order.get("side")).upper() in {"0", "BUY"} for order in orders)
+    scheduler.mark_listed(account_id, order_ids, time.monotonic(), buy_activity=buy_activity)
+    with order_metrics.stage("state_preload"):
+        await asyncio.to_thread(order_state_cache.preload, order_ids)
+    # Fast lane: mark new BUY orders as paid across the whole account before any chat traffic.
     for order in orders:
-        _process_single_order(client, row, order)
+        lock = order_state_cache.order_lock(_order_id(order))
+        if not lock.acquire(blocking=False):
+            continue  # being reprocessed on request; picked up again next cycle
+        try:
+            with order_metrics.stage("fast_lane"):
+                run_fast_lane(client, row, order, order_state_cache)
+        except Exception as exc:  # pragma: no cover - network/API failures
+            logger.warning("Fast lane failed order=%s: %s", _order_id(order), exc)
+        finally:
+            lock.release()
+        if not await _persist_order_state(_order_id(order)):
+            # Acting again without the flags on record could repeat the side effect elsewhere.
+            logger.error("order_state not persisted order=%s; skipping account=%s this cycle", _order_id(order), account_id)
+            return order_ids, 0
+    processed = 0
+    for order in orders:
+        order_id = _order_id(order)
+        forced = order_id in requested
+        if not order_id or not (forced or scheduler.is_due(order_id, order, time.monotonic())):
+            continue
+        lock = order_state_cache.order_lock(order_id)
+        if not lock.acquire(blocking=False):
+            continue
+        cursor_before = (order_state_cache.get(order_id) or {}).get("last_message_id")
+        try:
+            with order_metrics.stage("process_order"):
+                _process_single_order(client, row, order, state_cache=order_state_cache)
+        finally:
+            lock.release()
+            persisted = await _persist_order_state(order_id)
+        processed += 1
+        if not persisted:
+            logger.error("order_state not persisted order=%s; skipping account=%s this cycle", order_id, account_id)
+            break
+        if forced:
+            await asyncio.to_thread(_answer_reprocess, account_id, order_id, requested.pop(order_id), True)
+        cursor_after = (order_state_cache.get(order_id) or {}).get("last_message_id")
+        scheduler.mark_visited(
+            account_id,
+            order_id,
+            order,
+            time.monotonic(),
+            active=cursor_before != cursor_after,
+        )
+    for order_id, requester in requested.items():
+        if order_id not in order_ids:
+            await asyncio.to_thread(_answer_reprocess, account_id, order_id, requester, False)
+    return order_ids, processed
 
 
 def process_pending_order_by_id(
@@ -51,30 +171,115 @@ def process_pending_order_by_id(
     *,
     record_state: bool = False,
     echo: bool = False,
+    state_cache: Optional[OrderStateCache] = None,
 ) -> bool:
     client = create_exchange_client(creds)
-    orders = _load_bybit_pending_orders(creds)
-    for order in orders:
-        oid = str(order.get("id") or order.get("orderId") or "")
-        if oid == order_id:
-            _process_single_order(
-                client,
-                {"id": credential_id},
-                order,
-                record_state=record_state,
-                echo=echo,
+    order = order_details_cache.get_by_id(client, order_id)
+    if not order or str(order.get("status") or "") in TERMINAL_STATUSES:
+        return False
+    counterparty_info = _fetch_counterparty_info(client, order)
+    if counterparty_info:
+        order["counterparty_info"] = counterparty_info
+    _process_single_order(
+        client,
+        {"id": credential_id},
+        order,
+        record_state=record_state,
+        echo=echo,
+        state_cache=state_cache,
+    )
+    return True
+
+
+def _reprocess_pending_order(creds: ExchangeCredentials, credential_id: str, order_id: str) -> bool:
+    # Hold the order's lock so an in-process worker skips it meanwhile, and start from the stored row.
+    with order_state_cache.order_lock(order_id):
+        order_state_cache.preload([order_id], held=[order_id])
+        try:
+            return process_pending_order_by_id(
+                creds,
+                credential_id,
+                order_id,
+                record_state=True,
+                state_cache=order_state_cache,
             )
-            return True
-    return False
+        finally:
+            order_state_cache.flush([order_id])
+
+
+def _find_user_credential(user_id: str, credential_id: str) -> Dict[str, Any]:
+    for row in fetch_user_credentials(user_id):
+        if str(row.get("id")) == str(credential_id):
+            return row
+    raise ValueError("Credential not found for user")
+
+
+async def _request_reprocess(credential_id: str, order_id: str) -> bool:
+    """Ask the runner that owns the credential to process the order and wait for its answer."""
+    store = lease_store()
+    key = _reprocess_key(credential_id, order_id)
+    request_name, result_name = REPROCESS_REQUEST_PREFIX + key, REPROCESS_RESULT_PREFIX + key
+    stale = await asyncio.to_thread(store.owner, result_name)
+    if stale is not None:
+        await asyncio.to_thread(store.release, result_name, stale)
+    # An identical request already in flight is simply waited on.
+    await asyncio.to_thread(store.acquire, request_name, settings.worker_id, REPROCESS_TIMEOUT_SECONDS)
+    deadline = time.monotonic() + REPROCESS_TIMEOUT_SECONDS
+    while time.monotonic() < deadline:
+        await asyncio.sleep(REPROCESS_POLL_SECONDS)
+        result = await asyncio.to_thread(store.owner, result_name)
+        if result is not None:
+            # Left to expire so every caller waiting on the same request sees it.
+            return result == "processed"
+    await asyncio.to_thread(store.release, request_name, settings.worker_id)
+    raise TimeoutError("Order processing worker did not pick up the order in time")
+
+
+async def reprocess_order(user_id: str, credential_id: str, order_id: str) -> None:
+    row = await asyncio.to_thread(_find_user_credential, user_id, credential_id)
+    if row.get("exchange") != "bybit":
+        raise ValueError("Order processing supports only bybit credentials")
+    status = await worker_supervisor.status(ORDER_PROCESSING_WORKER)
+    if status.get("running"):
+        # A runner (maybe in another process) may be on this order right now; let it do the work.
+        processed = await _request_reprocess(credential_id, order_id)
+    else:
+        creds = build_exchange_credentials(row)
+        processed = await asyncio.to_thread(_reprocess_pending_order, creds, credential_id, order_id)
+    if not processed:
+        raise ValueError("Pending order not found")
+
+
+async def search_chats(user_id: str, query: str, limit: int = 200) -> Dict[str, Any]:
+    """Stored chats of the user's credentials that mention an IBAN/phone or match a counterparty name."""
+    rows = await asyncio.to_thread(fetch_user_credentials, user_id)
+    credential_ids = [str(row.get("id")) for row in rows if row.get("id")]
+    kind, hits = await asyncio.to_thread(search_transcripts, query, credential_ids, limit)
+    return {"query": query, "kind": kind, "hits": hits}
 
 
 class OrderProcessingWorker:
     def __init__(self, interval_seconds: int = POLL_INTERVAL_SECONDS) -> None:
         self.interval_seconds = interval_seconds
+        self.scheduler = OrderScheduler(
+            default_seconds=interval_seconds,
+            min_seconds=settings.order_poll_min_seconds,
+            max_seconds=settings.order_poll_max_seconds,
+            list_interval_seconds=settings.order_list_interval_seconds,
+            hot_list_interval_seconds=settings.order_hot_list_interval_seconds,
+            hot_seconds=settings.order_hot_account_seconds,
+        )
         self._task: Optional[asyncio.Task] = None
         self._last_run_at: Optional[datetime] = None
         self._last_success_at: Optional[datetime] = None
         self._last_error: Optional[str] = None
+        self._rows: List[Dict[str, Any]] = []
+        self._rows_loaded_at: Optional[float] = None
+        # Sharded workers re-check their credential leases well inside the lease TTL.
+        self._rows_refresh_seconds = (
+            min(interval_seconds, settings.lease_ttl_seconds / 3) if settings.worker_sharding else interval_seconds
+        )
+        self._account_orders: Dict[str, List[str]] = {}
 
     @property
     def is_running(self) -> bool:
@@ -83,6 +288,7 @@ class OrderProcessingWorker:
     async def start(self) -> None:
         if self.is_running:
             return
+        chat_outbox.start()
         self._task = asyncio.create_task(self._run())
 
     async def stop(self) -> None:
@@ -92,22 +298,52 @@ class OrderProcessingWorker:
         with contextlib.suppress(asyncio.CancelledError):
             await self._task
         self._task = None
+        await asyncio.to_thread(chat_outbox.stop)
+        await asyncio.to_thread(release_shard, ORDER_PROCESSING_SHARD_GROUP)
+
+    async def _load_rows(self) -> List[Dict[str, Any]]:
+        now = time.monotonic()
+        if self._rows_loaded_at is None or now - self._rows_loaded_at >= self._rows_refresh_seconds:
+            rows = await asyncio.to_thread(fetch_all_credentials)
+            rows = [row for row in rows if row.get("exchange") == "bybit"]
+            self._rows = await asyncio.to_thread(owned_credentials, ORDER_PROCESSING_SHARD_GROUP, rows)
+            self._rows_loaded_at = now
+        return self._rows
 
     async def _run(self) -> None:
         while True:
             self._last_run_at = datetime.utcnow()
+            started = time.perf_counter()
+            processed = 0
             try:
-                rows = await asyncio.to_thread(fetch_all_credentials)
-                for row in rows:
-                    if row.get("exchange") != "bybit":
-                        continue
-                    await _process_account(row)
+                with order_metrics.stage("load_credentials"):
+                    rows = await self._load_rows()
+                try:
+                    requests = await asyncio.to_thread(_pending_reprocess_requests)
+                except Exception as exc:  # pragma: no cover - lease store unavailable
+                    logger.warning("Reprocess request check failed: %s", exc)
+                    requests = {}
+                try:
+                    for row in rows:
+                        result = await _process_account(row, self.scheduler, requests.get(str(row.get("id") or "")))
+                        if result is not None:
+                            self._account_orders[str(row.get("id") or "")] = result[0]
+                            processed += result[1]
+                finally:
+                    with order_metrics.stage("state_flush"):
+                        await asyncio.to_thread(order_state_cache.flush)
+                    order_metrics.record_cycle((time.perf_counter() - started) * 1000, processed)
+                account_ids = [str(row.get("id") or "") for row in rows]
+                self._account_orders = {key: ids for key, ids in self._account_orders.items() if key in account_ids}
+                self.scheduler.retain_accounts(account_ids)
+                order_state_cache.retain_credentials(account_ids)
+                order_state_cache.retain(oid for ids in self._account_orders.values() for oid in ids)
                 self._last_success_at = datetime.utcnow()
                 self._last_error = None
             except Exception as exc:  # pragma: no cover
                 self._last_error = str(exc)
                 logger.exception("Order processing cycle failed: %s", exc)
-            await asyncio.sleep(self.interval_seconds)
+            await asyncio.sleep(min(self.scheduler.sleep_seconds(time.monotonic()), REPROCESS_CHECK_SECONDS))
 
     def get_status(self) -> Dict[str, Any]:
         return {
@@ -118,5 +354,14 @@ class OrderProcessingWorker:
             "last_error": self._last_error,
         }
 
+    def get_metrics(self) -> Dict[str, Any]:
+        snapshot = order_metrics.snapshot()
+        snapshot["details_cache"] = {
+            "hits": order_details_cache.hits,
+            "misses": order_details_cache.misses,
+        }
+        snapshot["outbox_pending"] = chat_outbox.pending()
+        return snapshot
+
 
 order_processing_worker = OrderProcessingWorker()
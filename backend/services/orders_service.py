@@ -143,8 +143,8 @@ def _attach_counterparty_info(client, orders: List[Dict[str, Any]]) -> None:
             order["counterparty_info"] = info
 
 
-def _load_bybit_pending_orders(creds) -> List[Dict[str, Any]]:
-    client = create_exchange_client(creds)
+def _load_bybit_pending_orders(creds, with_counterparty: bool = True, client=None) -> List[Dict[str, Any]]:
+    client = client or create_exchange_client(creds)
     orders: List[Dict[str, Any]] = []
     page = 1
     while True:
@@ -156,7 +156,8 @@ def _load_bybit_pending_orders(creds) -> List[Dict[str, Any]]:
         if len(batch) < PAGE_SIZE:
             break
         page += 1
-    _attach_counterparty_info(client, orders)
+    if with_counterparty:
+        _attach_counterparty_info(client, orders)
     return orders
 
 
@@ -0,0 +1,161 @@
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+# One pass over the text: every run of digits (optionally grouped by spaces or dashes and
+# prefixed with PL, +48 or 0048) is a candidate, then classified by length. Runs that do not
+# classify as a whole are retried split at their separators ("500600700 500600701").
+_CANDIDATE_RE = re.compile(
+    r"(?<!\d)"
+    r"(?P<country>PL[ \u00a0]?)?"
+    r"\+?"
+    r"(?P<digits>\d(?:[ \u00a0\-]?\d){8,29})"
+    r"(?!\d)",
+    re.IGNORECASE,
+)
+_SEPARATORS = str.maketrans("", "", " \u00a0-")
+_SEPARATOR_RE = re.compile(r"[ \u00a0\-]")
+
+# "PL" as IBAN digits (P=25, L=21), moved to the end for the mod-97 check.
+_PL_IBAN_SUFFIX = "2521"
+IBAN_DIGITS = 26
+PHONE_DIGITS = 9
+CHAT_MEMO_MAX_ENTRIES = 20000
+
+
+@dataclass(frozen=True)
+class PaymentContacts:
+    ibans: Tuple[str, ...] = ()
+    phones: Tuple[str, ...] = ()
+
+
+def is_valid_pl_iban(digits: str) -> bool:
+    if len(digits) != IBAN_DIGITS or not digits.isdigit():
+        return False
+    return int(digits[2:] + _PL_IBAN_SUFFIX + digits[:2]) % 97 == 1
+
+
+def _classify(digits: str, has_country: bool) -> Tuple[Optional[str], Optional[str]]:
+    if len(digits) == IBAN_DIGITS:
+        return (digits, None) if is_valid_pl_iban(digits) else (None, None)
+    if has_country:
+        return None, None
+    if len(digits) == PHONE_DIGITS:
+        return None, digits
+    if len(digits) == PHONE_DIGITS + 2 and digits.startswith("48"):
+        return None, digits[2:]
+    if len(digits) == PHONE_DIGITS + 4 and digits.startswith("0048"):
+        return None, digits[4:]
+    return None, None
+
+
+def _classify_run(run: str, has_country: bool) -> Iterator[Tuple[Optional[str], Optional[str]]]:
+    found = _classify(run.translate(_SEPARATORS), has_country)
+    if found != (None, None):
+        yield found
+        return
+    groups = _SEPARATOR_RE.split(run)
+    # Neighbouring numbers merged into one run: take the longest classifiable span of groups
+    # from each position; the country prefix only belongs to the first group.
+    start = 0
+    while start < len(groups):
+        for end in range(len(groups), start, -1):
+            if end - start == len(groups):
+                continue
+            found = _classify("".join(groups[start:end]), has_country and start == 0)
+            if found != (None, None):
+                yield found
+                start = end
+                break
+        else:
+            start += 1
+
+
+def _scan_into(text: str, ibans: dict, phones: dict) -> None:
+    for match in _CANDIDATE_RE.finditer(text):
+        for iban, phone in _classify_run(match.group("digits"), bool(match.group("country"))):
+            if iban:
+                ibans.setdefault(iban, None)
+            elif phone:
+                phones.setdefault(phone, None)
+
+
+def scan_contacts(text: str) -> PaymentContacts:
+    """All valid PL IBANs and PL phone numbers found anywhere in ``text``, in order of appearance."""
+    if not text:
+        return PaymentContacts()
+    ibans: dict = {}
+    phones: dict = {}
+    _scan_into(str(text), ibans, phones)
+    return PaymentContacts(tuple(ibans), tuple(phones))
+
+
+def scan_many(texts: Iterable[str]) -> List[PaymentContacts]:
+    return [scan_contacts(text) for text in texts]
+
+
+def collect_contacts(texts: Iterable[str]) -> Tuple[Set[str], Set[str]]:
+    """Union of contacts over many strings; they are scanned as one newline-joined text."""
+    ibans: dict = {}
+    phones: dict = {}
+    _scan_into("\n".join(str(text) for text in texts if text), ibans, phones)
+    return set(ibans), set(phones)
+
+
+def first_iban(text: str) -> Optional[str]:
+    contacts = scan_contacts(text)
+    return contacts.ibans[0] if contacts.ibans else None
+
+
+def first_phone(text: str) -> Optional[str]:
+    contacts = scan_contacts(text)
+    return contacts.phones[0] if contacts.phones else None
+
+
+# Chat messages never change once sent, so contacts are memoized by message id and each
+# message is parsed once no matter how many cycles or exports see it.
+class ChatContactExtractor:
+    def __init__(self, max_entries: int = CHAT_MEMO_MAX_ENTRIES) -> None:
+        self.max_entries = max_entries
+        self._memo: "OrderedDict[str, PaymentContacts]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def extract(self, items: Iterable[Dict[str, Any]]) -> List[PaymentContacts]:
+        """Contacts for each chat item, aligned with ``items``; non-text messages get empty contacts."""
+        results: List[PaymentContacts] = []
+        for item in items:
+            if str(item.get("contentType") or "str") != "str" or not item.get("message"):
+                results.append(PaymentContacts())
+                continue
+            message_id = str(item.get("id") or "")
+            cached = self._lookup(message_id) if message_id else None
+            if cached is None:
+                cached = scan_contacts(str(item.get("message")))
+                if message_id:
+                    self._store(message_id, cached)
+            results.append(cached)
+        return results
+
+    def _lookup(self, message_id: str) -> Optional[PaymentContacts]:
+        with self._lock:
+            cached = self._memo.get(message_id)
+            if cached is None:
+                self.misses += 1
+                return None
+            self._memo.move_to_end(message_id)
+            self.hits += 1
+            return cached
+
+    def _store(self, message_id: str, contacts: PaymentContacts) -> None:
+        with self._lock:
+            self._memo[message_id] = contacts
+            self._memo.move_to_end(message_id)
+            while len(self._memo) > self.max_entries:
+                self._memo.popitem(last=False)
+
+
+chat_contact_extractor = ChatContactExtractor()
@@ -1,28 +1,16 @@
-import re
 from typing import Dict, List, Optional
 
-SKIP_PAYMENT_TYPE = "416"
-
+from services.payment_contacts import collect_contacts, first_iban, first_phone
 
-def _normalize_numeric(text: str) -> str:
-    if not text:
-        return ""
-    trimmed = re.sub(r"^[^\d]+|[^\d]+$", "", text)
-    return trimmed.replace(" ", "")
+SKIP_PAYMENT_TYPE = "416"
 
 
 def extract_iban(value: str) -> Optional[str]:
-    digits = _normalize_numeric(value)
-    return digits if re.fullmatch(r"\d{26}", digits) else None
+    return first_iban(value)
 
 
 def extract_polish_phone(value: str) -> Optional[str]:
-    digits = _normalize_numeric(value)
-    if re.fullmatch(r"\d{9}", digits):
-        return digits
-    if re.fullmatch(r"48\d{9}", digits):
-        return digits[2:]
-    return None
+    return first_phone(value)
 
 
 def parse_pln_payment_terms(order: Dict[str, any]) -> str:
@@ -30,8 +18,6 @@ def parse_pln_payment_terms(order: Dict[str, any]) -> str:
     if not isinstance(terms, list) or not terms:
         return "не знайдено коректних даних для оплати"
 
-    unique_ibans = set()
-    unique_phones = set()
     first_real_name = None
     first_bank_name = None
 
@@ -52,17 +38,10 @@ def parse_pln_payment_terms(order: Dict[str, any]) -> str:
         "lastName",
     ]
 
+    unique_ibans, unique_phones = collect_contacts(
+        str(term.get(key)) for term in terms for key in fields if term.get(key)
+    )
     for term in terms:
-        for key in fields:
-            val = term.get(key)
-            if not val:
-                continue
-            iban = extract_iban(str(val))
-            if iban:
-                unique_ibans.add(iban)
-            phone = extract_polish_phone(str(val))
-            if phone:
-                unique_phones.add(phone)
         if not first_real_name:
             real_name = term.get("realName")
             if real_name:
@@ -1,6 +1,7 @@
 import asyncio
 import contextlib
 import logging
+from typing import Any, Dict
 
 from config import settings
 from services import credentials_service
@@ -12,6 +13,10 @@ class CredentialRefreshWorker:
     def __init__(self) -> None:
         self._task: asyncio.Task | None = None
 
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
     async def start(self) -> None:
         if self._task:
             return
@@ -36,3 +41,9 @@ class CredentialRefreshWorker:
             except Exception as exc:  # pragma: no cover - background guard
                 logger.exception("Credential refresh cycle failed: %s", exc)
             await asyncio.sleep(settings.credential_check_interval_seconds)
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "running": self.is_running,
+            "interval_seconds": settings.credential_check_interval_seconds,
+        }
@@ -0,0 +1,146 @@
+import bisect
+import hashlib
+import logging
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from config import settings
+from repositories.lease_repository import LeaseStore, create_lease_store, live_owners
+
+logger = logging.getLogger("p2p-panel")
+
+RING_REPLICAS = 64
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.md5(value.encode("utf-8")).digest()[:8], "big")
+
+
+class HashRing:
+    def __init__(self, members: Iterable[str], replicas: int = RING_REPLICAS) -> None:
+        self.members = sorted(set(members))
+        points: List[Tuple[int, str]] = []
+        for member in self.members:
+            for replica in range(replicas):
+                points.append((_hash(f"{member}#{replica}"), member))
+        points.sort()
+        self._keys = [point for point, _ in points]
+        self._owners = [member for _, member in points]
+
+    def owner(self, key: str) -> Optional[str]:
+        if not self._keys:
+            return None
+        index = bisect.bisect(self._keys, _hash(key)) % len(self._keys)
+        return self._owners[index]
+
+
+# Ring ownership decides who should take a credential; the per-credential lease makes the
+# hand-over safe, since the new owner waits until the old one releases or lets the lease expire.
+class ShardCoordinator:
+    def __init__(self, store: LeaseStore, group: str, member_id: str, *, ttl_seconds: float) -> None:
+        self.store = store
+        self.group = group
+        self.member_id = member_id
+        self.ttl_seconds = ttl_seconds
+        self._ring = HashRing([member_id])
+        self._held: set[str] = set()
+        self._checked_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def members(self) -> List[str]:
+        return self._ring.members
+
+    def _member_prefix(self) -> str:
+        return f"member:{self.group}:"
+
+    def _credential_lease(self, credential_id: str) -> str:
+        return f"credential:{self.group}:{credential_id}"
+
+    def refresh(self) -> None:
+        self.store.acquire(f"{self._member_prefix()}{self.member_id}", self.member_id, self.ttl_seconds)
+        members = live_owners(self.store, self._member_prefix())
+        if self.member_id not in members:
+            members.append(self.member_id)
+        with self._lock:
+            if sorted(members) != self._ring.members:
+                logger.info("Shard membership for %s changed: %s", self.group, sorted(members))
+                self._ring = HashRing(members)
+
+    def filter_rows(self, rows: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        rows = list(rows)
+        now = time.monotonic()
+        # Leases are renewed a few times per TTL; fast loops in between reuse the last answer.
+        if self._checked_at is not None and now - self._checked_at < self.ttl_seconds / 3:
+            with self._lock:
+                held = set(self._held)
+            return [row for row in rows if str(row.get("id") or "") in held]
+        self._checked_at = now
+        self.refresh()
+        owned: List[Dict[str, Any]] = []
+        wanted: set[str] = set()
+        for row in rows:
+            credential_id = str(row.get("id") or "")
+            if not credential_id or self._ring.owner(credential_id) != self.member_id:
+                continue
+            wanted.add(credential_id)
+            if self.store.acquire(self._credential_lease(credential_id), self.member_id, self.ttl_seconds):
+                owned.append(row)
+        with self._lock:
+            released = self._held - wanted
+            self._held = {str(row.get("id")) for row in owned}
+        for credential_id in released:
+            self.store.release(self._credential_lease(credential_id), self.member_id)
+        return owned
+
+    def shutdown(self) -> None:
+        with self._lock:
+            held, self._held = self._held, set()
+        for credential_id in held:
+            self.store.release(self._credential_lease(credential_id), self.member_id)
+        self.store.release(f"{self._member_prefix()}{self.member_id}", self.member_id)
+
+
+_store: Optional[LeaseStore] = None
+_coordinators: Dict[str, ShardCoordinator] = {}
+_registry_lock = threading.Lock()
+
+
+def lease_store() -> LeaseStore:
+    global _store
+    with _registry_lock:
+        if _store is None:
+            _store = create_lease_store(settings.lease_backend, settings.lease_sqlite_path)
+        return _store
+
+
+def shard_coordinator(group: str) -> Optional[ShardCoordinator]:
+    if not settings.worker_sharding:
+        return None
+    store = lease_store()
+    with _registry_lock:
+        coordinator = _coordinators.get(group)
+        if coordinator is None:
+            coordinator = ShardCoordinator(store, group, settings.worker_id, ttl_seconds=settings.lease_ttl_seconds)
+            _coordinators[group] = coordinator
+        return coordinator
+
+
+def owned_credentials(group: str, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Rows this process should work on; all of them when sharding is off."""
+    coordinator = shard_coordinator(group)
+    if coordinator is None:
+        return rows
+    try:
+        return coordinator.filter_rows(rows)
+    except Exception as exc:  # pragma: no cover - lease store unavailable
+        logger.warning("Shard lease check failed for %s, skipping cycle: %s", group, exc)
+        return []
+
+
+def release_shard(group: str) -> None:
+    with _registry_lock:
+        coordinator = _coordinators.pop(group, None)
+    if coordinator is not None:
+        coordinator.shutdown()
@@ -0,0 +1,328 @@
+import asyncio
+import contextlib
+import json
+import logging
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from config import settings
+from services.spot_snapshot import SpotSnapshotService, spot_snapshot
+
+logger = logging.getLogger("p2p-panel")
+
+BYBIT_SPOT_WS_URL = "wss://stream.bybit.com/v5/public/spot"
+# Symbols the pricing paths read (auto pricing guardrails and fiat-balance quotes).
+DEFAULT_SPOT_SYMBOLS = (
+    "USDTEUR", "USDCEUR", "BTCEUR", "ETHEUR",
+    "USDTBRL", "USDCBRL", "BTCBRL", "ETHBRL",
+    "USDTPLN", "BTCPLN", "ETHPLN",
+    "USDTTRY", "USDTMNT",
+    "USDCUSDT", "BTCUSDT", "ETHUSDT",
+)
+WS_SUBSCRIBE_BATCH = 10
+WS_PING_SECONDS = 20
+RECONNECT_BACKOFF_SECONDS = (1, 2, 5, 10, 30)
+
+
+def _to_float(value: Any) -> Optional[float]:
+    try:
+        if value in (None, ""):
+            return None
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class SpotFeed(ABC):
+    """Background task that keeps the in-memory spot book current; pricing only ever reads it."""
+
+    source = "none"
+
+    def __init__(
+        self,
+        symbols: Optional[List[str]] = None,
+        service: SpotSnapshotService = spot_snapshot,
+        record_path: Optional[Path] = None,
+    ) -> None:
+        self.symbols = [symbol.upper() for symbol in (symbols or DEFAULT_SPOT_SYMBOLS)]
+        self.service = service
+        self.record_path = record_path
+        self._task: Optional[asyncio.Task] = None
+        self._record_fh = None
+        self._started_at: Optional[datetime] = None
+        self._last_message_at: Optional[datetime] = None
+        self._last_error: Optional[str] = None
+        self.messages = 0
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self) -> None:
+        if self.is_running:
+            return
+        if self.record_path:
+            self.record_path.parent.mkdir(parents=True, exist_ok=True)
+            self._record_fh = self.record_path.open("a", encoding="utf-8")
+        self.service.feed_source = self.source
+        self._started_at = datetime.utcnow()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if not self._task:
+            return
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+        self.service.feed_source = None
+        if self._record_fh:
+            self._record_fh.close()
+            self._record_fh = None
+
+    @abstractmethod
+    async def _run(self) -> None:
+        ...
+
+    def _apply(
+        self,
+        symbol: str,
+        *,
+        bid: Optional[float] = None,
+        ask: Optional[float] = None,
+        last: Optional[float] = None,
+        at: Optional[float] = None,
+    ) -> None:
+        self.service.update(symbol, bid=bid, ask=ask, last=last, at=at)
+        self.messages += 1
+        self._last_message_at = datetime.utcnow()
+        self._record(symbol, bid=bid, ask=ask, last=last, at=at)
+
+    def _record(
+        self,
+        symbol: str,
+        *,
+        bid: Optional[float] = None,
+        ask: Optional[float] = None,
+        last: Optional[float] = None,
+        at: Optional[float] = None,
+    ) -> None:
+        if not self._record_fh:
+            return
+        record = {"ts": time.time() if at is None else at, "symbol": symbol.upper()}
+        record.update({key: value for key, value in (("bid", bid), ("ask", ask), ("last", last)) if value is not None})
+        self._record_fh.write(json.dumps(record) + "\n")
+
+    def _note_error(self, exc: Exception) -> None:
+        self._last_error = str(exc)
+        logger.warning("Spot feed %s error: %s", self.source, exc)
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "source": self.source,
+            "running": self.is_running,
+            "started_at": self._started_at,
+            "last_message_at": self._last_message_at,
+            "last_error": self._last_error,
+            "messages": self.messages,
+            "rest_fetches": self.service.fetches,
+            "staleness": self.service.staleness(self.symbols),
+        }
+
+
+class RestPollSpotFeed(SpotFeed):
+    source = "rest"
+
+    def __init__(self, interval_seconds: float, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.interval_seconds = interval_seconds
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                snapshot = await asyncio.to_thread(self.service.refresh)
+                self.messages += 1
+                self._last_message_at = datetime.utcnow()
+                self._last_error = None
+                # A poll replaces the whole book; the capture keeps the feed's symbols from it.
+                for symbol in self.symbols:
+                    ticker = snapshot.ticker(symbol)
+                    if ticker is not None:
+                        self._record(symbol, bid=ticker.bid, ask=ticker.ask, last=ticker.last, at=ticker.updated_at)
+            except Exception as exc:  # pragma: no cover - network failures
+                self._note_error(exc)
+            await asyncio.sleep(self.interval_seconds)
+
+
+# Bybit's public spot stream: orderbook.1 carries the best bid/ask, tickers carries the last
+# price. A slow REST refresh keeps the long tail (symbols not subscribed) from going stale.
+class WebsocketSpotFeed(SpotFeed):
+    source = "websocket"
+
+    def __init__(self, url: str = BYBIT_SPOT_WS_URL, rest_refresh_seconds: float = 60, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.url = url
+        self.rest_refresh_seconds = rest_refresh_seconds
+        self.reconnects = 0
+
+    async def _run(self) -> None:
+        refresher = asyncio.create_task(self._refresh_rest())
+        attempt = 0
+        try:
+            while True:
+                try:
+                    await self._stream()
+                    attempt = 0
+                except asyncio.CancelledError:
+                    raise
+                except Exception as exc:  # pragma: no cover - network failures
+                    self._note_error(exc)
+                delay = RECONNECT_BACKOFF_SECONDS[min(attempt, len(RECONNECT_BACKOFF_SECONDS) - 1)]
+                attempt += 1
+                self.reconnects += 1
+                await asyncio.sleep(delay)
+        finally:
+            refresher.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await refresher
+
+    async def _refresh_rest(self) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(self.service.refresh)
+            except Exception as exc:  # pragma: no cover - network failures
+                self._note_error(exc)
+            await asyncio.sleep(self.rest_refresh_seconds)
+
+    async def _stream(self) -> None:
+        import websockets
+
+        async with websockets.connect(self.url, ping_interval=None) as ws:
+            topics = [f"{kind}.{symbol}" for symbol in self.symbols for kind in ("orderbook.1", "tickers")]
+            for index in range(0, len(topics), WS_SUBSCRIBE_BATCH):
+                await ws.send(json.dumps({"op": "subscribe", "args": topics[index:index + WS_SUBSCRIBE_BATCH]}))
+            self._last_error = None
+            # Bybit drops connections without an app-level ping every 20s, however busy the stream is.
+            next_ping = time.monotonic() + WS_PING_SECONDS
+            while True:
+                try:
+                    raw = await asyncio.wait_for(ws.recv(), timeout=max(next_ping - time.monotonic(), 0))
+                except asyncio.TimeoutError:
+                    raw = None
+                if time.monotonic() >= next_ping:
+                    await ws.send(json.dumps({"op": "ping"}))
+                    next_ping = time.monotonic() + WS_PING_SECONDS
+                if raw is not None:
+                    self._handle(json.loads(raw))
+
+    def _handle(self, message: Dict[str, Any]) -> None:
+        topic = str(message.get("topic") or "")
+        data = message.get("data")
+        if not topic or not isinstance(data, dict):
+            return
+        at = _to_float(message.get("ts"))
+        at = at / 1000 if at else None
+        if topic.startswith("orderbook.1."):
+            bids = data.get("b") or []
+            asks = data.get("a") or []
+            self._apply(
+                str(data.get("s") or topic.rsplit(".", 1)[-1]),
+                bid=_to_float(bids[0][0]) if bids else None,
+                ask=_to_float(asks[0][0]) if asks else None,
+                at=at,
+            )
+        elif topic.startswith("tickers."):
+            self._apply(str(data.get("symbol") or topic.rsplit(".", 1)[-1]), last=_to_float(data.get("lastPrice")), at=at)
+
+
+# Replays a JSONL capture (as written with SPOT_FEED_RECORD_PATH) for offline runs. Each line is
+# {"ts", "symbol", "bid"?, "ask"?, "last"?}; speed 0 replays as fast as possible.
+class ReplaySpotFeed(SpotFeed):
+    source = "replay"
+
+    def __init__(self, path: Path, speed: float = 1.0, loop: bool = False, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.path = Path(path)
+        self.speed = speed
+        self.loop = loop
+
+    async def _run(self) -> None:
+        while True:
+            await self._replay_once()
+            if not self.loop:
+                return
+
+    async def _replay_once(self) -> None:
+        previous_ts: Optional[float] = None
+        with self.path.open("r", encoding="utf-8") as fh:
+            for line in fh:
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                ts = _to_float(record.get("ts"))
+                if self.speed > 0 and ts is not None and previous_ts is not None and ts > previous_ts:
+                    await asyncio.sleep((ts - previous_ts) / self.speed)
+                previous_ts = ts if ts is not None else previous_ts
+                # Replayed quotes are stamped with the current time, so staleness reads as live.
+                self._apply(
+                    str(record.get("symbol") or ""),
+                    bid=_to_float(record.get("bid")),
+                    ask=_to_float(record.get("ask")),
+                    last=_to_float(record.get("last")),
+                )
+                if self.speed <= 0:
+                    await asyncio.sleep(0)
+
+
+def create_spot_feed(kind: str) -> Optional[SpotFeed]:
+    kind = (kind or "").strip().lower()
+    symbols = settings.spot_feed_symbols or None
+    record_path = settings.spot_feed_record_path
+    if kind in {"", "off", "none"}:
+        return None
+    if kind == "rest":
+        return RestPollSpotFeed(settings.spot_feed_poll_seconds, symbols=symbols, record_path=record_path)
+    if kind == "websocket":
+        return WebsocketSpotFeed(symbols=symbols, record_path=record_path)
+    if kind == "replay":
+        if settings.spot_feed_replay_path is None:
+            raise ValueError("SPOT_FEED=replay requires SPOT_FEED_REPLAY_PATH")
+        return ReplaySpotFeed(settings.spot_feed_replay_path, speed=settings.spot_feed_replay_speed, symbols=symbols)
+    raise ValueError(f"Unknown spot feed: {kind}")
+
+
+spot_feed = create_spot_feed(settings.spot_feed)
+_feed_users: set[str] = set()
+
+
+# The feed only serves the pricing workers, so it runs while at least one of them runs in this
+# process; API-only processes never open the stream or poll.
+async def retain_spot_feed(user: str) -> None:
+    if spot_feed is None:
+        return
+    _feed_users.add(user)
+    await spot_feed.start()
+
+
+async def release_spot_feed(user: str) -> None:
+    if spot_feed is None:
+        return
+    _feed_users.discard(user)
+    if not _feed_users:
+        await spot_feed.stop()
+
+
+def spot_feed_status() -> Dict[str, Any]:
+    if spot_feed is not None:
+        return spot_feed.get_status()
+    symbols = settings.spot_feed_symbols or list(DEFAULT_SPOT_SYMBOLS)
+    return {
+        "source": "none",
+        "running": False,
+        "rest_fetches": spot_snapshot.fetches,
+        "staleness": spot_snapshot.staleness(symbols),
+    }
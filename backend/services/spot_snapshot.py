@@ -0,0 +1,211 @@
+import logging
+import threading
+import time
+from dataclasses import dataclass, replace
+from typing import Any, Dict, Iterable, Optional
+
+import requests
+
+from config import settings
+
+logger = logging.getLogger("p2p-panel")
+
+SPOT_TICKERS_URL = "https://api.bybit.com/v5/market/tickers"
+SPOT_REQUEST_TIMEOUT_SECONDS = 10
+
+
+def _to_float(value: Any) -> Optional[float]:
+    try:
+        if value in (None, ""):
+            return None
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass(frozen=True)
+class SpotTicker:
+    symbol: str
+    bid: Optional[float]
+    ask: Optional[float]
+    last: Optional[float]
+    updated_at: float = 0.0
+
+    @classmethod
+    def from_raw(cls, raw: Dict[str, Any], updated_at: float) -> "SpotTicker":
+        return cls(
+            symbol=str(raw.get("symbol") or "").upper(),
+            bid=_to_float(raw.get("bid1Price")),
+            ask=_to_float(raw.get("ask1Price")),
+            last=_to_float(raw.get("lastPrice")),
+            updated_at=updated_at,
+        )
+
+
+@dataclass(frozen=True)
+class SpotSnapshot:
+    tickers: Dict[str, SpotTicker]
+    fetched_at: float
+
+    def ticker(self, symbol: str) -> Optional[SpotTicker]:
+        return self.tickers.get(symbol.upper())
+
+
+# Every pricing path reads spot prices from here: the whole spot ticker list comes back from
+# Bybit in one call, so a cycle costs a single request however many symbols it looks at.
+# While a streaming feed (services/spot_feed.py) owns the book, reads never touch the network.
+class SpotSnapshotService:
+    def __init__(
+        self,
+        ttl_seconds: float,
+        session: Optional[requests.Session] = None,
+        feed_max_staleness_seconds: float = 60,
+    ) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.feed_max_staleness_seconds = feed_max_staleness_seconds
+        self._session = session
+        self._snapshot: Optional[SpotSnapshot] = None
+        self._lock = threading.Lock()
+        self._fetch_lock = threading.Lock()
+        self._changed_at = 0.0
+        # When the last full REST ticker list landed; a feed alone may only have part of the book.
+        self._full_at = 0.0
+        self.feed_source: Optional[str] = None
+        self.fetches = 0
+        self.updates = 0
+
+    @property
+    def session(self) -> requests.Session:
+        if self._session is None:
+            self._session = requests.Session()
+        return self._session
+
+    def _fresh(self) -> Optional[SpotSnapshot]:
+        snapshot = self._snapshot
+        if snapshot is None:
+            return None
+        now = time.time()
+        # A feed that has gone quiet for too long stops vouching for the book; reads fall back to REST.
+        if self.feed_source and now - self._changed_at < self.feed_max_staleness_seconds:
+            return snapshot
+        if now - snapshot.fetched_at < self.ttl_seconds:
+            return snapshot
+        return None
+
+    def snapshot(self) -> SpotSnapshot:
+        with self._lock:
+            snapshot = self._fresh()
+        if snapshot is not None:
+            return snapshot
+        with self._fetch_lock:
+            with self._lock:
+                snapshot = self._fresh()
+            if snapshot is not None:
+                return snapshot
+            return self.refresh()
+
+    def refresh(self) -> SpotSnapshot:
+        """Pull the full ticker list now, regardless of the TTL."""
+        response = self.session.get(
+            SPOT_TICKERS_URL,
+            params={"category": "spot"},
+            timeout=SPOT_REQUEST_TIMEOUT_SECONDS,
+        )
+        response.raise_for_status()
+        payload = response.json()
+        self.fetches += 1
+        snapshot = self.publish(payload.get("result", {}).get("list", []) or [])
+        self._full_at = snapshot.fetched_at
+        return snapshot
+
+    def publish(self, raw_tickers: Iterable[Dict[str, Any]], at: Optional[float] = None) -> SpotSnapshot:
+        now = time.time() if at is None else at
+        with self._lock:
+            tickers = dict(self._snapshot.tickers) if self._snapshot else {}
+            for raw in raw_tickers:
+                ticker = SpotTicker.from_raw(raw, now)
+                if ticker.symbol:
+                    tickers[ticker.symbol] = ticker
+            self._snapshot = SpotSnapshot(tickers=tickers, fetched_at=now)
+            self._changed_at = max(self._changed_at, now)
+            return self._snapshot
+
+    def update(
+        self,
+        symbol: str,
+        *,
+        bid: Optional[float] = None,
+        ask: Optional[float] = None,
+        last: Optional[float] = None,
+        at: Optional[float] = None,
+    ) -> None:
+        """Apply one streamed quote; fields left as None keep their previous value."""
+        symbol = symbol.upper()
+        now = time.time() if at is None else at
+        with self._lock:
+            tickers = dict(self._snapshot.tickers) if self._snapshot else {}
+            previous = tickers.get(symbol) or SpotTicker(symbol=symbol, bid=None, ask=None, last=None)
+            tickers[symbol] = replace(
+                previous,
+                bid=previous.bid if bid is None else bid,
+                ask=previous.ask if ask is None else ask,
+                last=previous.last if last is None else last,
+                updated_at=now,
+            )
+            fetched_at = self._snapshot.fetched_at if self._snapshot else now
+            self._snapshot = SpotSnapshot(tickers=tickers, fetched_at=fetched_at)
+            self._changed_at = max(self._changed_at, now)
+            self.updates += 1
+
+    def ticker(self, symbol: str) -> Optional[SpotTicker]:
+        ticker = self.snapshot().ticker(symbol)
+        if ticker is not None or time.time() - self._full_at < self.ttl_seconds:
+            return ticker
+        # A streamed book can be partial (e.g. before the feed's first REST refresh); fill it in once.
+        with self._fetch_lock:
+            if time.time() - self._full_at >= self.ttl_seconds:
+                try:
+                    self.refresh()
+                except requests.RequestException as exc:
+                    logger.warning("Spot ticker refresh for %s failed: %s", symbol, exc)
+            with self._lock:
+                snapshot = self._snapshot
+        return snapshot.ticker(symbol) if snapshot else None
+
+    def last_price(self, symbol: str) -> float:
+        ticker = self.ticker(symbol)
+        if ticker is None or ticker.last is None:
+            raise ValueError(f"No ticker for {symbol}")
+        return ticker.last
+
+    def staleness(self, symbols: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """Seconds since each watched symbol (or the full snapshot) last changed."""
+        now = time.time()
+        with self._lock:
+            snapshot = self._snapshot
+        if snapshot is None:
+            return {
+                "feed_source": self.feed_source,
+                "snapshot_age_seconds": None,
+                "last_change_age_seconds": None,
+                "max_age_seconds": None,
+                "symbols": {},
+            }
+        ages: Dict[str, Optional[float]] = {}
+        for symbol in symbols or ():
+            ticker = snapshot.ticker(symbol)
+            ages[symbol.upper()] = round(now - ticker.updated_at, 3) if ticker else None
+        known = [age for age in ages.values() if age is not None]
+        return {
+            "feed_source": self.feed_source,
+            "snapshot_age_seconds": round(now - snapshot.fetched_at, 3),
+            "last_change_age_seconds": round(now - self._changed_at, 3),
+            "max_age_seconds": max(known) if known else None,
+            "symbols": ages,
+        }
+
+
+spot_snapshot = SpotSnapshotService(
+    settings.spot_snapshot_ttl_seconds,
+    feed_max_staleness_seconds=settings.spot_feed_max_staleness_seconds,
+)
@@ -0,0 +1,237 @@
+import asyncio
+import contextlib
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from config import settings
+from repositories.worker_state_repository import WorkerStateStore, create_worker_state_store
+from services.sharding import lease_store
+
+logger = logging.getLogger("p2p-panel")
+
+SUPERVISOR_INTERVAL_SECONDS = 5
+
+CREDENTIAL_REFRESH_WORKER = "credential_refresh"
+AUTO_PRICING_WORKER = "auto_pricing"
+FIAT_AUTO_PRICING_WORKER = "fiat_balance_auto_pricing"
+ORDER_PROCESSING_WORKER = "order_processing"
+
+
+@dataclass
+class ManagedWorker:
+    worker: Any
+    default_running: bool = False
+    # Sharded workers run in every process and split credentials; the rest run on the leader only.
+    shardable: bool = False
+    applied_config: Optional[Dict[str, Any]] = None
+
+
+# Each process runs one supervisor. Start/stop requests only change the desired state in the
+# shared store; every supervisor converges on it, and a per-type leader lease keeps singleton
+# workers to one process however many API workers uvicorn starts.
+# A shardable worker runs either on one non-sharded leader or on sharded members, never both:
+# sharded members hold ``sharded:{name}:{member}`` and a leader steps down while any is live.
+class WorkerSupervisor:
+    def __init__(self, interval_seconds: int = SUPERVISOR_INTERVAL_SECONDS) -> None:
+        self.interval_seconds = interval_seconds
+        self.member_id = settings.worker_id
+        self._workers: Dict[str, ManagedWorker] = {}
+        self._store: Optional[WorkerStateStore] = None
+        self._task: Optional[asyncio.Task] = None
+        self._sync_lock = asyncio.Lock()
+
+    @property
+    def store(self) -> WorkerStateStore:
+        if self._store is None:
+            self._store = create_worker_state_store(settings.lease_backend, settings.lease_sqlite_path)
+        return self._store
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def register(self, name: str, worker: Any, *, default_running: bool = False, shardable: bool = False) -> None:
+        self._workers[name] = ManagedWorker(worker, default_running=default_running, shardable=shardable)
+
+    async def start(self) -> None:
+        if self.is_running:
+            return
+        await self.sync()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        for name, managed in self._workers.items():
+            if getattr(managed.worker, "is_running", False):
+                await managed.worker.stop()
+                await self._publish(name, managed)
+            await asyncio.to_thread(self._resign, name)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                await self.sync()
+            except Exception as exc:  # pragma: no cover - background guard
+                logger.exception("Worker supervisor sync failed: %s", exc)
+
+    async def set_desired(self, name: str, running: bool, config: Optional[Dict[str, Any]] = None) -> None:
+        await asyncio.to_thread(self.store.set_desired, name, running, config)
+        await self.sync()
+
+    async def sync(self) -> None:
+        async with self._sync_lock:
+            for name, managed in self._workers.items():
+                await self._sync_worker(name, managed)
+
+    async def _sync_worker(self, name: str, managed: ManagedWorker) -> None:
+        desired = await asyncio.to_thread(self.store.desired, name)
+        should_run = desired["running"] if desired else managed.default_running
+        config = (desired or {}).get("config")
+        if config and config != managed.applied_config and hasattr(managed.worker, "set_config"):
+            managed.worker.set_config(**config)
+            managed.applied_config = config
+        if should_run and managed.shardable and settings.worker_sharding:
+            should_run = await asyncio.to_thread(self._join_sharded, name)
+        elif should_run:
+            should_run = await asyncio.to_thread(self._acquire_leadership, name, managed.shardable)
+        else:
+            await asyncio.to_thread(self._resign, name)
+        running = getattr(managed.worker, "is_running", False)
+        if should_run and not running:
+            logger.info("Starting worker %s on %s", name, self.member_id)
+            await managed.worker.start()
+        elif not should_run and running:
+            logger.info("Stopping worker %s on %s", name, self.member_id)
+            await managed.worker.stop()
+            await self._publish(name, managed)
+        if getattr(managed.worker, "is_running", False):
+            await self._publish(name, managed)
+
+    def _acquire_leadership(self, name: str, shardable: bool = False) -> bool:
+        store = lease_store()
+        if not store.acquire(f"leader:{name}", self.member_id, settings.lease_ttl_seconds):
+            return False
+        if shardable:
+            members = store.holders(f"sharded:{name}:")
+            if members:
+                logger.error(
+                    "Not running %s unsharded on %s: sharded runners %s hold it (set WORKER_SHARDING=1 here)",
+                    name,
+                    self.member_id,
+                    ", ".join(sorted(members.values())),
+                )
+                store.release(f"leader:{name}", self.member_id)
+                return False
+        return True
+
+    def _join_sharded(self, name: str) -> bool:
+        store = lease_store()
+        store.acquire(f"sharded:{name}:{self.member_id}", self.member_id, settings.lease_ttl_seconds)
+        leader = store.owner(f"leader:{name}")
+        if leader is not None:
+            # The leader sees our lease on its next sync and steps down; we start after that.
+            logger.error("Not running %s sharded on %s yet: unsharded leader %s still runs it", name, self.member_id, leader)
+            return False
+        return True
+
+    def _resign(self, name: str) -> None:
+        store = lease_store()
+        store.release(f"leader:{name}", self.member_id)
+        store.release(f"sharded:{name}:{self.member_id}", self.member_id)
+
+    async def _publish(self, name: str, managed: ManagedWorker) -> None:
+        get_status = getattr(managed.worker, "get_status", None)
+        if get_status is None:
+            return
+        get_metrics = getattr(managed.worker, "get_metrics", None)
+        metrics = get_metrics() if get_metrics else None
+        try:
+            await asyncio.to_thread(self.store.publish_status, name, self.member_id, get_status(), metrics)
+        except Exception as exc:  # pragma: no cover - store unavailable
+            logger.warning("Failed to publish status for %s: %s", name, exc)
+
+    def _reports(self, name: str) -> List[Dict[str, Any]]:
+        """Each runner's last report; this process's own report is always taken live."""
+        managed = self._workers[name]
+        try:
+            rows = self.store.statuses(name)
+        except Exception as exc:  # pragma: no cover - store unavailable
+            logger.warning("Failed to read shared status for %s: %s", name, exc)
+            rows = []
+        now = time.time()
+        reports = []
+        for row in rows:
+            if row.get("owner") == self.member_id:
+                continue
+            status = dict(row.get("status") or {})
+            # A runner that stopped publishing (crashed, lost its lease) is reported as not running.
+            if now - float(row.get("updated_at") or 0) > settings.lease_ttl_seconds:
+                status["running"] = False
+            reports.append({**row, "status": status})
+        get_metrics = getattr(managed.worker, "get_metrics", None)
+        reports.append(
+            {
+                "owner": self.member_id,
+                "status": managed.worker.get_status(),
+                "metrics": get_metrics() if get_metrics else None,
+                "updated_at": now,
+            }
+        )
+        return reports
+
+    async def status(self, name: str) -> Dict[str, Any]:
+        return await asyncio.to_thread(self.get_status, name)
+
+    def get_status(self, name: str) -> Dict[str, Any]:
+        """Status merged over every runner of the worker; each runner's own row is under ``workers``."""
+        reports = self._reports(name)
+        local = reports[-1]["status"]
+        running = [report for report in reports if report["status"].get("running")]
+        # Prefer a live runner's fields, the most recent one when several shards run.
+        primary = max(running or reports[:-1] or reports, key=lambda report: float(report.get("updated_at") or 0))
+        status = {**local, **primary["status"]}
+        status["running"] = bool(running)
+        # Sharded runners each report their own credentials; list fields (e.g. ads) are combined.
+        for key, value in primary["status"].items():
+            if isinstance(value, list) and len(running) > 1:
+                status[key] = [item for report in running for item in report["status"].get(key) or []]
+        status["workers"] = {
+            report["owner"]: {
+                "running": bool(report["status"].get("running")),
+                "last_run_at": report["status"].get("last_run_at"),
+                "last_success_at": report["status"].get("last_success_at"),
+                "last_error": report["status"].get("last_error"),
+                "updated_at": report.get("updated_at"),
+            }
+            for report in reports
+            if report["owner"] != self.member_id or report["status"].get("running")
+        }
+        return status
+
+    async def metrics(self, name: str) -> Dict[str, Dict[str, Any]]:
+        return await asyncio.to_thread(self.get_metrics, name)
+
+    def get_metrics(self, name: str) -> Dict[str, Dict[str, Any]]:
+        """Metrics published by each live runner of the worker, keyed by worker id."""
+        reports = self._reports(name)
+        live = {
+            report["owner"]: {**report["metrics"], "updated_at": report.get("updated_at")}
+            for report in reports
+            if report.get("metrics") and report["status"].get("running")
+        }
+        if not live:
+            # Nothing runs anywhere: show this process's (possibly empty) window rather than nothing.
+            local = reports[-1]
+            if local.get("metrics"):
+                live[local["owner"]] = {**local["metrics"], "updated_at": local.get("updated_at")}
+        return live
+
+
+worker_supervisor = WorkerSupervisor()
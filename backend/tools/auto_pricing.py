@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import json
-from dataclasses import asdict, dataclass
+from dataclasses import asdict, dataclass, field, replace
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Set, Tuple
 
@@ -14,13 +14,13 @@ from exchanges import ExchangeCredentials, create_exchange_client
 from repositories.credentials_repository import fetch_all_credentials
 from security import decrypt_secret
 from services.ads_service import _load_bybit_ads
+from services.market_book import MarketKey, market_book_cache
+from services.spot_snapshot import spot_snapshot
 
 RESULTS_DIR = Path("playground_results")
 AUTO_RESULTS_DIR = RESULTS_DIR / "auto_ads"
 AUTO_MARKER = "@@@"
 AUTO_PAUSED_MARKER = "@*@"
-MARKET_PAGE_SIZE = 30
-SPOT_TICKERS_URL = "https://api.bybit.com/v5/market/tickers"
 REST_COUNTRIES_URL = "https://restcountries.com/v3.1/all?fields=cca3,currencies"
 MIN_ACTIVITY_USD = 300.0
 MAX_COMPETITION_USD = 1_000.0
@@ -37,6 +37,10 @@ DEFAULT_CURRENCY_COUNTRY_MAP = {
 }
 CURRENCY_COUNTRY_MAP: Dict[str, Set[str]] = {}
 
+# Integer-tick grouping stays within int64; anything finer or larger uses Decimal.
+MAX_TICK_DECIMALS = 12
+MAX_TICK_DIGITS = 18
+
 MY_MIN_POINTS = np.array([100, 1_000, 5_000, 50_000, 100_000], dtype=float)
 COMPETITOR_MIN_LIMITS = np.array(
     [500, 2_000, 6_000, 65_000, 110_000],
@@ -59,6 +63,8 @@ class AutoAdContext:
     competitors: List[Dict[str, Any]]
     competitor_groups: List[List[Dict[str, Any]]]
     competitors_raw: List[Dict[str, Any]] = None
+    # Columns of the market book the competitors came from; lets later grouping reuse its price ticks.
+    market_columns: Optional["MarketColumns"] = field(default=None, repr=False, compare=False)
 
 
 @dataclass(frozen=True)
@@ -90,18 +96,6 @@ def _to_float(value: Any) -> Optional[float]:
         return None
 
 
-def _extract_items(response: Dict[str, Any]) -> List[Dict[str, Any]]:
-    if not isinstance(response, dict):
-        return []
-    result = response.get("result")
-    if not isinstance(result, dict):
-        return []
-    items = result.get("items")
-    if isinstance(items, list):
-        return items
-    return []
-
-
 def _extract_ad_side(ad: Dict[str, Any]) -> Optional[int]:
     try:
         side = int(ad.get("side"))
@@ -154,30 +148,21 @@ CURRENCY_COUNTRY_MAP = _load_currency_country_map()
 
 
 def _fetch_spot_market_data() -> SpotMarketData:
-    response = requests.get(
-        SPOT_TICKERS_URL,
-        params={"category": "spot"},
-        timeout=10,
-    )
-    response.raise_for_status()
-    payload = response.json()
-    tickers = payload.get("result", {}).get("list", [])
     usd_prices: Dict[str, float] = {}
     fiat_quotes: Dict[Tuple[str, str], Dict[str, float]] = {}
-    for ticker in tickers:
-        symbol = str(ticker.get("symbol") or "")
-        pair = _split_symbol(symbol)
+    for ticker in spot_snapshot.snapshot().tickers.values():
+        pair = _split_symbol(ticker.symbol)
         if not pair:
             continue
         base, quote = pair
-        last_price = _to_float(ticker.get("lastPrice"))
+        last_price = ticker.last
         if quote == "USDT" and last_price is not None:
             usd_prices[base] = last_price
         elif quote == "USDC" and last_price is not None:
             usd_prices.setdefault(base, last_price)
         if quote in FIAT_SPOT_FILTERS and base in SPOT_BASE_TOKENS:
-            bid = _to_float(ticker.get("bid1Price"))
-            ask = _to_float(ticker.get("ask1Price"))
+            bid = ticker.bid
+            ask = ticker.ask
             if bid is not None and ask is not None:
                 fiat_quotes[(base, quote)] = {"bid": bid, "ask": ask}
     usd_prices.setdefault("USDT", 1.0)
@@ -266,9 +251,85 @@ def _prices_within_gap(
     return delta <= gap
 
 
+def _price_ticks(prices: List[Any]) -> Optional[Tuple[np.ndarray, np.ndarray, int]]:
+    """Prices as int64 ticks at the finest precision present, plus a validity mask and the scale.
+
+    Returns None for anything that is not a plain decimal string/number (exponents, NaN, huge
+    values); callers then fall back to the Decimal path so the result never changes.
+    """
+    parts: List[Optional[Tuple[str, str]]] = []
+    scale = 2  # group gaps go down to 0.01
+    for value in prices:
+        if value in (None, ""):
+            parts.append(None)
+            continue
+        text = str(value).strip()
+        whole, _, frac = text.partition(".")
+        if not (whole + frac).isascii() or not whole.isdigit() or (frac and not frac.isdigit()):
+            if _to_decimal(value) is None:
+                parts.append(None)
+                continue
+            return None
+        parts.append((whole, frac))
+        scale = max(scale, len(frac))
+    if scale > MAX_TICK_DECIMALS:
+        return None
+    ticks = np.zeros(len(parts), dtype=np.int64)
+    valid = np.zeros(len(parts), dtype=bool)
+    for index, part in enumerate(parts):
+        if part is None:
+            continue
+        whole, frac = part
+        digits = whole.lstrip("0") + frac.ljust(scale, "0")
+        if len(digits) > MAX_TICK_DIGITS:
+            return None
+        ticks[index] = int(digits or "0")
+        valid[index] = True
+    return ticks, valid, scale
+
+
 def _group_competitors_by_price(
     ad: Dict[str, Any],
     competitors: List[Dict[str, Any]],
+    columns: Optional["MarketColumns"] = None,
+) -> List[List[Dict[str, Any]]]:
+    """Split competitors (in list order) into runs whose neighbouring prices are within the group gap.
+
+    With the market's columns the prices come from ticks parsed once per book; otherwise, or when
+    a competitor is not from that book, the Decimal path is used (parsing per call is slower).
+    """
+    if not competitors:
+        return []
+    if columns is None or columns.ticks is None:
+        return _group_competitors_by_price_decimal(ad, competitors)
+    positions = [columns.positions.get(id(competitor)) for competitor in competitors]
+    if None in positions:
+        return _group_competitors_by_price_decimal(ad, competitors)
+    scaled_gap = _determine_group_gap(ad, competitors).scaleb(columns.tick_scale)
+    if scaled_gap != scaled_gap.to_integral_value():
+        return _group_competitors_by_price_decimal(ad, competitors)
+    gap = int(scaled_gap)
+    index = np.fromiter(positions, dtype=np.intp, count=len(positions))
+    ticks = columns.ticks[index]
+    valid = columns.tick_valid[index]
+    ad_side = _extract_ad_side(ad)
+    # Same rule as _prices_within_gap, applied to every neighbouring pair in list order at once.
+    step = ticks[1:] - ticks[:-1]
+    if ad_side == 0:
+        delta = -step
+    elif ad_side == 1:
+        delta = step
+    else:
+        delta = np.abs(step)
+    joined = valid[1:] & valid[:-1] & (delta >= 0) & (delta <= gap)
+    starts = np.flatnonzero(np.concatenate(([True], ~joined))).tolist()
+    ends = starts[1:] + [len(competitors)]
+    return [competitors[start:end] for start, end in zip(starts, ends)]
+
+
+def _group_competitors_by_price_decimal(
+    ad: Dict[str, Any],
+    competitors: List[Dict[str, Any]],
 ) -> List[List[Dict[str, Any]]]:
     if not competitors:
         return []
@@ -342,22 +403,7 @@ def _requires_strict_payment_match(ad: Dict[str, Any]) -> bool:
 
 
 def _fetch_market_ads(api, ad: Dict[str, Any]) -> List[Dict[str, Any]]:
-    all_items: List[Dict[str, Any]] = []
-    page = 1
-    while True:
-        resp = api.get_online_ads(
-            tokenId=str(ad.get("tokenId")),
-            currencyId=str(ad.get("currencyId")),
-            side=str(ad.get("side")),
-            page=str(page),
-            size=str(MARKET_PAGE_SIZE),
-        )
-        items = _extract_items(resp)
-        all_items.extend(items)
-        if len(items) < MARKET_PAGE_SIZE:
-            break
-        page += 1
-    return all_items
+    return market_book_cache.get_for_ad(api, ad)
 
 
 def _allowed_competitor_min(my_min: float) -> float:
@@ -509,11 +555,121 @@ def _passes_activity_filters(
     return True
 
 
+@dataclass(frozen=True)
+class MarketColumns:
+    """One market book as NumPy columns; missing numbers are NaN with a separate presence mask."""
+
+    account_ids: np.ndarray
+    price: np.ndarray
+    has_price: np.ndarray
+    min_amount: np.ndarray
+    has_min: np.ndarray
+    max_amount: np.ndarray
+    has_max: np.ndarray
+    last_quantity: np.ndarray
+    has_last_quantity: np.ndarray
+    recent_orders: np.ndarray
+    has_recent_orders: np.ndarray
+    token_usd: np.ndarray
+    spot_bid: np.ndarray
+    spot_ask: np.ndarray
+    has_spot_quote: np.ndarray
+    payment_codes: List[set[str]]
+    # Prices as int64 ticks at tick_scale decimals (None when the book needs the Decimal path),
+    # and each ad dict's row, looked up by identity.
+    ticks: Optional[np.ndarray]
+    tick_valid: Optional[np.ndarray]
+    tick_scale: int
+    positions: Dict[int, int]
+
+
+def _float_column(values: List[Optional[float]]) -> Tuple[np.ndarray, np.ndarray]:
+    present = np.fromiter((value is not None for value in values), dtype=bool, count=len(values))
+    column = np.fromiter((np.nan if value is None else value for value in values), dtype=float, count=len(values))
+    return column, present
+
+
+def _market_columns(market_ads: List[Dict[str, Any]], market_data: SpotMarketData) -> MarketColumns:
+    price, has_price = _float_column([_to_float(item.get("price")) for item in market_ads])
+    min_amount, has_min = _float_column([_to_float(item.get("minAmount")) for item in market_ads])
+    max_amount, has_max = _float_column([_to_float(item.get("maxAmount")) for item in market_ads])
+    last_quantity, has_last_quantity = _float_column([_to_float(item.get("lastQuantity")) for item in market_ads])
+    recent_orders, has_recent_orders = _float_column([_to_float(item.get("recentOrderNum")) for item in market_ads])
+    tokens = [str(item.get("tokenId") or "").upper() for item in market_ads]
+    token_usd, _ = _float_column([_token_price_in_usd(token, market_data) for token in tokens])
+    quotes = [
+        _token_fiat_quote(token, currency, market_data) if currency in FIAT_SPOT_FILTERS else None
+        for token, currency in zip(tokens, (str(item.get("currencyId") or "").upper() for item in market_ads))
+    ]
+    spot_bid, has_bid = _float_column([(quote or {}).get("bid") for quote in quotes])
+    spot_ask, has_ask = _float_column([(quote or {}).get("ask") for quote in quotes])
+    ticks = _price_ticks([item.get("price") for item in market_ads])
+    return MarketColumns(
+        account_ids=np.array([str(item.get("accountId")) for item in market_ads], dtype=object),
+        price=price,
+        has_price=has_price,
+        min_amount=min_amount,
+        has_min=has_min,
+        max_amount=max_amount,
+        has_max=has_max,
+        last_quantity=last_quantity,
+        has_last_quantity=has_last_quantity,
+        recent_orders=recent_orders,
+        has_recent_orders=has_recent_orders,
+        token_usd=token_usd,
+        spot_bid=spot_bid,
+        spot_ask=spot_ask,
+        has_spot_quote=has_bid & has_ask,
+        payment_codes=[_extract_payment_codes(item) for item in market_ads],
+        ticks=ticks[0] if ticks else None,
+        tick_valid=ticks[1] if ticks else None,
+        tick_scale=ticks[2] if ticks else 0,
+        positions={id(item): index for index, item in enumerate(market_ads)},
+    )
+
+
+def _payment_mask(columns: MarketColumns, target_payments: set[str], strict: bool) -> np.ndarray:
+    if not target_payments:
+        return np.ones(len(columns.payment_codes), dtype=bool)
+    if strict:
+        return np.fromiter((codes == target_payments for codes in columns.payment_codes), dtype=bool)
+    return np.fromiter((bool(target_payments & codes) for codes in columns.payment_codes), dtype=bool)
+
+
+def _spot_guardrail_mask(columns: MarketColumns, ad_side: Optional[int]) -> np.ndarray:
+    if ad_side not in (0, 1):
+        return np.ones(len(columns.price), dtype=bool)
+    guarded = columns.has_spot_quote & columns.has_price
+    with np.errstate(invalid="ignore"):
+        if ad_side == 0:
+            # Drop buyers that bid above what spot would pay us
+            within = columns.price <= columns.spot_bid
+        else:
+            # Sell: drop sellers priced below spot ask
+            within = columns.price >= columns.spot_ask
+    return ~guarded | within
+
+
+def _activity_mask(columns: MarketColumns, my_last_quantity: Optional[float]) -> np.ndarray:
+    last_quantity = columns.last_quantity
+    priced = columns.token_usd > 0
+    with np.errstate(invalid="ignore", divide="ignore"):
+        min_liquidity = np.where(priced, MIN_ACTIVITY_USD / columns.token_usd, np.nan)
+        competition_cap = np.where(priced, MAX_COMPETITION_USD / columns.token_usd, np.nan)
+        mask = columns.has_last_quantity & (last_quantity > 0)
+        mask &= ~(priced & (last_quantity < min_liquidity))
+        if my_last_quantity is not None:
+            mask &= ~(priced & (last_quantity <= competition_cap) & (last_quantity < my_last_quantity))
+        mask &= columns.has_recent_orders & (columns.recent_orders >= 50)
+    return mask
+
+
 def _collect_competitors(
     api,
     ad: Dict[str, Any],
     market_data: SpotMarketData,
     market_ads: Optional[List[Dict[str, Any]]] = None,
+    columns: Optional[MarketColumns] = None,
 ) -> List[Dict[str, Any]]:
     my_min = _to_float(ad.get("minAmount"))
     my_last_quantity = _to_float(ad.get("lastQuantity"))
@@ -525,33 +681,30 @@ def _collect_competitors(
     token_up = str(ad.get("tokenId") or ad.get("token") or "").upper()
     relax_filters = token_up in {"BTC", "ETH", "USDC"}
     market_ads = market_ads if market_ads is not None else _fetch_market_ads(api, ad)
-    filtered: List[Dict[str, Any]] = []
-    for competitor in market_ads:
-        if my_account_id and str(competitor.get("accountId")) == my_account_id:
-            continue
-        if not _passes_min_gap_filter(my_min, competitor):
-            continue
-        if not _passes_min_max_gap_filter(competitor):
-            continue
-        if not _shares_payment_method(my_payment_codes, competitor, strict_payment_match):
-            continue
-        if relax_filters:
-            filtered.append(competitor)
-            continue
-        if not _passes_spot_price_guardrails(competitor, ad_side, market_data):
-            continue
-        if not _passes_activity_filters(competitor, my_last_quantity, market_data):
-            continue
-        if not _passes_trading_preferences(target_preferences, competitor):
-            continue
-        filtered.append(competitor)
-    return filtered
+    if not market_ads or my_min is None:
+        return []
+    # Same filters as the per-competitor _passes_* helpers, evaluated as masks over the whole book.
+    columns = columns if columns is not None else _market_columns(market_ads, market_data)
+    with np.errstate(invalid="ignore"):
+        mask = columns.has_min & (columns.min_amount <= _allowed_competitor_min(my_min))
+        required_max = np.interp(columns.min_amount, MIN_POINTS, REQ_MAX_POINTS)
+        mask &= columns.has_max & (columns.max_amount >= required_max)
+    if my_account_id:
+        mask &= columns.account_ids != my_account_id
+    mask &= _payment_mask(columns, my_payment_codes, strict_payment_match)
+    if not relax_filters:
+        mask &= _spot_guardrail_mask(columns, ad_side)
+        mask &= _activity_mask(columns, my_last_quantity)
+    candidates = [market_ads[index] for index in np.flatnonzero(mask)]
+    if relax_filters:
+        return candidates
+    return [competitor for competitor in candidates if _passes_trading_preferences(target_preferences, competitor)]
 
 
 def _save_snapshot(contexts: List[AutoAdContext]) -> Path:
     RESULTS_DIR.mkdir(exist_ok=True)
     target = RESULTS_DIR / "auto_pricing_snapshot.json"
-    payload = [asdict(item) for item in contexts]
+    payload = [asdict(replace(item, market_columns=None)) for item in contexts]
     with target.open("w", encoding="utf-8") as fh:
         json.dump(payload, fh, ensure_ascii=False, indent=2)
     return target
@@ -584,20 +737,28 @@ def collect_auto_pricing_contexts(
     my_ads = all_ads if all_ads is not None else _load_bybit_ads(creds)
     auto_ads = [ad for ad in my_ads if _is_auto_enabled(ad)]
     market_data = _fetch_spot_market_data()
-    contexts: List[AutoAdContext] = []
-    for ad in auto_ads:
-        market_ads = _fetch_market_ads(api, ad)
-        competitors = _collect_competitors(api, ad, market_data, market_ads)
-        competitor_groups = _group_competitors_by_price(ad, competitors)
-        contexts.append(
-            AutoAdContext(
+    ads_by_market: Dict[MarketKey, List[int]] = {}
+    for index, ad in enumerate(auto_ads):
+        key = market_book_cache.key(ad.get("tokenId"), ad.get("currencyId"), ad.get("side"))
+        ads_by_market.setdefault(key, []).append(index)
+    contexts: List[Optional[AutoAdContext]] = [None] * len(auto_ads)
+    # Distinct markets download in parallel; each one is filtered and grouped as soon as it lands.
+    for key, market_ads, error in market_book_cache.iter_books(api, ads_by_market):
+        if error is not None:
+            raise error
+        columns = _market_columns(market_ads, market_data)
+        for index in ads_by_market[key]:
+            ad = auto_ads[index]
+            competitors = _collect_competitors(api, ad, market_data, market_ads, columns)
+            competitor_groups = _group_competitors_by_price(ad, competitors, columns)
+            contexts[index] = AutoAdContext(
                 ad=ad,
                 competitors=competitors,
                 competitor_groups=competitor_groups,
                 competitors_raw=market_ads,
+                market_columns=columns,
             )
-        )
-    return contexts
+    return [context for context in contexts if context is not None]
 
 
 def main() -> None:
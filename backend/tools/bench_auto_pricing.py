@@ -0,0 +1,173 @@
+"""Competitor filtering and price grouping cost in tools.auto_pricing, old paths vs NumPy.
+
+    python -m tools.bench_auto_pricing --competitors 1000 --ads 20
+"""
+
+import argparse
+import random
+import timeit
+from typing import Any, Dict, List, Optional
+
+from tools.auto_pricing import (
+    SpotMarketData,
+    _collect_competitors,
+    _extract_ad_side,
+    _extract_payment_codes,
+    _group_competitors_by_price,
+    _group_competitors_by_price_decimal,
+    _market_columns,
+    _passes_activity_filters,
+    _passes_min_gap_filter,
+    _passes_min_max_gap_filter,
+    _passes_spot_price_guardrails,
+    _passes_trading_preferences,
+    _requires_strict_payment_match,
+    _shares_payment_method,
+    _to_float,
+)
+
+_PAYMENTS = ["416", "14", "62", "90", "377"]
+_MARKET_DATA = SpotMarketData(
+    usd_prices={"USDT": 1.0, "USDC": 1.0, "BTC": 65_000.0},
+    fiat_quotes={("USDT", "PLN"): {"bid": 3.94, "ask": 3.96}},
+)
+
+
+def _legacy_collect(ad: Dict[str, Any], market_ads: List[Dict[str, Any]], market_data: SpotMarketData) -> List[Dict[str, Any]]:
+    # The per-competitor loop _collect_competitors used before the NumPy masks.
+    my_min = _to_float(ad.get("minAmount"))
+    my_last_quantity = _to_float(ad.get("lastQuantity"))
+    my_payment_codes = _extract_payment_codes(ad)
+    strict_payment_match = _requires_strict_payment_match(ad)
+    target_preferences = ad.get("tradingPreferenceSet") or {}
+    my_account_id = str(ad.get("accountId") or "")
+    ad_side = _extract_ad_side(ad)
+    relax_filters = str(ad.get("tokenId") or "").upper() in {"BTC", "ETH", "USDC"}
+    filtered: List[Dict[str, Any]] = []
+    for competitor in market_ads:
+        if my_account_id and str(competitor.get("accountId")) == my_account_id:
+            continue
+        if not _passes_min_gap_filter(my_min, competitor):
+            continue
+        if not _passes_min_max_gap_filter(competitor):
+            continue
+        if not _shares_payment_method(my_payment_codes, competitor, strict_payment_match):
+            continue
+        if relax_filters:
+            filtered.append(competitor)
+            continue
+        if not _passes_spot_price_guardrails(competitor, ad_side, market_data):
+            continue
+        if not _passes_activity_filters(competitor, my_last_quantity, market_data):
+            continue
+        if not _passes_trading_preferences(target_preferences, competitor):
+            continue
+        filtered.append(competitor)
+    return filtered
+
+
+def _maybe(rng: random.Random, value: Any, missing: float = 0.03) -> Optional[Any]:
+    return None if rng.random() < missing else value
+
+
+def _competitor(rng: random.Random, index: int, side: str) -> Dict[str, Any]:
+    min_amount = rng.choice([100, 300, 500, 1_000, 2_000, 5_000, 20_000])
+    return {
+        "id": str(index),
+        "accountId": str(rng.randint(1, 400)),
+        "tokenId": "USDT",
+        "currencyId": "PLN",
+        "side": side,
+        "price": _maybe(rng, f"{rng.uniform(3.85, 4.05):.2f}"),
+        "minAmount": _maybe(rng, str(min_amount)),
+        "maxAmount": _maybe(rng, str(min_amount * rng.choice([2, 5, 10, 40]))),
+        "lastQuantity": _maybe(rng, f"{rng.uniform(0, 20_000):.2f}"),
+        "recentOrderNum": _maybe(rng, rng.randint(0, 3_000)),
+        "payments": rng.sample(_PAYMENTS, rng.randint(1, 3)),
+        "tradingPreferenceSet": {
+            "hasRegisterTime": rng.randint(0, 1),
+            "registerTimeThreshold": rng.choice([0, 7, 30]),
+            "hasCompleteRateDay30": rng.randint(0, 1),
+            "completeRateDay30": rng.choice([80, 90, 95]),
+        },
+    }
+
+
+def _ad(rng: random.Random, index: int) -> Dict[str, Any]:
+    return {
+        "id": f"ad{index}",
+        "accountId": str(rng.randint(1, 400)),
+        "tokenId": "USDT",
+        "currencyId": "PLN",
+        "side": rng.choice(["0", "1"]),
+        "minAmount": str(rng.choice([100, 1_000, 5_000, 50_000])),
+        "lastQuantity": f"{rng.uniform(100, 5_000):.2f}",
+        "payments": rng.sample(_PAYMENTS, rng.randint(1, 2)),
+        "remark": rng.choice(["@@@", "@@@1"]),
+        "tradingPreferenceSet": {"hasCompleteRateDay30": 1, "completeRateDay30": 95},
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--competitors", type=int, default=1000)
+    parser.add_argument("--ads", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    books = {side: [_competitor(rng, i, side) for i in range(args.competitors)] for side in ("0", "1")}
+    ads = [_ad(rng, i) for i in range(args.ads)]
+
+    for ad in ads:
+        legacy = _legacy_collect(ad, books[ad["side"]], _MARKET_DATA)
+        vectorized = _collect_competitors(None, ad, _MARKET_DATA, books[ad["side"]])
+        if [c["id"] for c in legacy] != [c["id"] for c in vectorized]:
+            raise SystemExit(f"mismatch for {ad['id']}: {len(legacy)} vs {len(vectorized)} competitors")
+
+    def run_legacy() -> int:
+        return sum(len(_legacy_collect(ad, books[ad["side"]], _MARKET_DATA)) for ad in ads)
+
+    def run_vectorized() -> int:
+        # Columns are built once per market and shared by every ad in it, as in a pricing cycle.
+        columns = {side: _market_columns(book, _MARKET_DATA) for side, book in books.items()}
+        return sum(
+            len(_collect_competitors(None, ad, _MARKET_DATA, books[ad["side"]], columns[ad["side"]]))
+            for ad in ads
+        )
+
+    priced = {
+        side: sorted(
+            (c for c in book if c["price"] is not None),
+            key=lambda c: float(c["price"]),
+            reverse=side == "0",
+        )
+        for side, book in books.items()
+    }
+    # Built once per market for filtering anyway; grouping reuses the price ticks parsed there.
+    book_columns = {side: _market_columns(book, _MARKET_DATA) for side, book in books.items()}
+    for ad in ads:
+        decimal_groups = _group_competitors_by_price_decimal(ad, priced[ad["side"]])
+        tick_groups = _group_competitors_by_price(ad, priced[ad["side"]], book_columns[ad["side"]])
+        if [[c["id"] for c in g] for g in decimal_groups] != [[c["id"] for c in g] for g in tick_groups]:
+            raise SystemExit(f"group mismatch for {ad['id']}")
+
+    def run_decimal_groups() -> int:
+        return sum(len(_group_competitors_by_price_decimal(ad, priced[ad["side"]])) for ad in ads)
+
+    def run_tick_groups() -> int:
+        return sum(len(_group_competitors_by_price(ad, priced[ad["side"]], book_columns[ad["side"]])) for ad in ads)
+
+    print(f"competitors={args.competitors} ads={args.ads} kept={run_legacy()} (identical)")
+    for name, fn in (
+        ("per-competitor", run_legacy),
+        ("numpy masks", run_vectorized),
+        ("decimal groups", run_decimal_groups),
+        ("tick groups", run_tick_groups),
+    ):
+        best = min(timeit.repeat(fn, number=1, repeat=args.repeat))
+        print(f"{name:<16} {best * 1000:8.2f} ms  {best / args.ads * 1000:8.3f} ms/ad")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Per-order render cost of the chat messages built in services.order_processing.messaging.
+
+    python -m tools.bench_messaging --orders 5000
+"""
+
+import argparse
+import random
+import timeit
+
+from services.order_processing.messaging import (
+    _transliterate,
+    build_intro_message,
+    country_name,
+    message_text,
+    payment_summary_head,
+    status20_message,
+)
+
+_NAMES = ["Іван Петренко", "Олена Коваль", "Jan Kowalski", "Łukasz Wiśniewski", "Дмитро Шевченко"]
+_COUNTRIES = ["UA", "UKR", "PL", "POL", "DE", "LT", "Ukraine"]
+
+
+def _sample(rng: random.Random, index: int):
+    side = rng.choice(["0", "1"])
+    name = rng.choice(_NAMES)
+    order = {
+        "id": str(index),
+        "side": side,
+        "tokenId": "USDT",
+        "currencyId": "PLN",
+        "quantity": f"{rng.uniform(10, 5000):.2f}",
+        "amount": f"{rng.uniform(40, 20000):.2f}",
+        "price": "3.95",
+        "sellerRealName": name,
+        "buyerRealName": name,
+    }
+    counterparty = {
+        "nickName": f"user{index}",
+        "kycCountryCode": rng.choice(_COUNTRIES),
+        "totalFinishSellCount": rng.randint(0, 500),
+        "totalFinishBuyCount": rng.randint(0, 500),
+        "accountCreateDays": rng.randint(1, 2000),
+        "firstTradeDays": rng.randint(1, 2000),
+        "totalTradeAmount": rng.randint(0, 100000),
+        "averageTransferTime": rng.randint(1, 30),
+        "averageReleaseTime": rng.randint(1, 30),
+        "goodAppraiseCount": rng.randint(0, 500),
+        "badAppraiseCount": rng.randint(0, 5),
+    }
+    return order, counterparty, "SELL" if side == "1" else "BUY"
+
+
+def _render(samples) -> int:
+    size = 0
+    for order, counterparty, side in samples:
+        lang = "uk" if counterparty["kycCountryCode"] in {"UA", "UKR"} else "en"
+        size += len(build_intro_message(order, counterparty, side, lang=lang))
+        size += len(message_text("bot_check", lang))
+        size += len(status20_message(side, lang=lang))
+        size += len(payment_summary_head({"full_name": "Jan", "iban": "1" * 26, "phone": "512345678"}, lang))
+    return size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    samples = [_sample(rng, index) for index in range(args.orders)]
+
+    def cold() -> int:
+        country_name.cache_clear()
+        _transliterate.cache_clear()
+        return _render(samples)
+
+    def warm() -> int:
+        return _render(samples)
+
+    warm()
+    for name, fn in (("cold caches", cold), ("warm caches", warm)):
+        best = min(timeit.repeat(fn, number=1, repeat=args.repeat))
+        print(f"{name:<12} {best * 1000:8.2f} ms  {best / args.orders * 1e6:8.2f} us/order")
+    print(f"country_name {country_name.cache_info()}")
+    print(f"transliterate {_transliterate.cache_info()}")
+
+
+if __name__ == "__main__":
+    main()
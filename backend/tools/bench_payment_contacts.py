@@ -0,0 +1,100 @@
+"""Micro-benchmark for services.payment_contacts against the old per-field extractors.
+
+    python -m tools.bench_payment_contacts --orders 2000
+"""
+
+import argparse
+import random
+import re
+import timeit
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from services.order_processing.constants import PAYMENT_FIELDS
+from services.payment_contacts import collect_contacts, scan_many
+
+
+def _legacy_normalize(text: str) -> str:
+    trimmed = re.sub(r"^[^\d]+|[^\d]+$", "", text)
+    return trimmed.replace(" ", "")
+
+
+def _legacy_iban(value: str) -> Optional[str]:
+    digits = _legacy_normalize(value)
+    return digits if re.fullmatch(r"\d{26}", digits) else None
+
+
+def _legacy_phone(value: str) -> Optional[str]:
+    digits = _legacy_normalize(value)
+    if re.fullmatch(r"\d{9}", digits):
+        return digits
+    if re.fullmatch(r"48\d{9}", digits):
+        return digits[2:]
+    return None
+
+
+def _legacy_collect(terms: List[Dict[str, Any]]) -> Tuple[Set[str], Set[str]]:
+    ibans: Set[str] = set()
+    phones: Set[str] = set()
+    for term in terms:
+        for field in PAYMENT_FIELDS:
+            val = str(term.get(field, "") or "")
+            iban = _legacy_iban(val)
+            if iban:
+                ibans.add(iban)
+            phone = _legacy_phone(val)
+            if phone:
+                phones.add(phone)
+    return ibans, phones
+
+
+def _iban(rng: random.Random) -> str:
+    bban = "".join(rng.choice("0123456789") for _ in range(24))
+    check = 98 - int(bban + "252100") % 97
+    return f"{check:02d}{bban}"
+
+
+def _sample_terms(rng: random.Random) -> List[Dict[str, Any]]:
+    iban = _iban(rng)
+    phone = "".join(rng.choice("0123456789") for _ in range(9))
+    return [
+        {
+            "accountNo": f"PL {' '.join(iban[i:i + 4] for i in range(0, 26, 4))}",
+            "mobile": f"+48 {phone[:3]} {phone[3:6]} {phone[6:]}",
+            "payMessage": f"my iban is {iban}, blik {phone} thanks",
+            "bankName": "mBank",
+            "realName": "Jan Kowalski",
+        }
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    orders = [_sample_terms(rng) for _ in range(args.orders)]
+    texts = [str(term.get(field) or "") for terms in orders for term in terms for field in PAYMENT_FIELDS]
+
+    def legacy() -> int:
+        return sum(len(_legacy_collect(terms)[0]) for terms in orders)
+
+    def scanner() -> int:
+        total = 0
+        for terms in orders:
+            total += len(collect_contacts(str(term.get(f, "") or "") for term in terms for f in PAYMENT_FIELDS)[0])
+        return total
+
+    def batch() -> int:
+        return sum(len(contacts.ibans) for contacts in scan_many(texts))
+
+    print(f"orders={args.orders} fields={len(texts)}")
+    print(f"found ibans legacy={legacy()} scanner={scanner()} batch={batch()}")
+    for name, fn in (("legacy per-field", legacy), ("scanner per-order", scanner), ("scan_many", batch)):
+        best = min(timeit.repeat(fn, number=1, repeat=args.repeat))
+        print(f"{name:<20} {best * 1000:8.2f} ms  {best / args.orders * 1e6:8.2f} us/order")
+
+
+if __name__ == "__main__":
+    main()
@@ -240,7 +240,7 @@ def _load_first_row_and_creds():
 
 def main() -> None:
     # load_dotenv()
-    # _, creds = _load_first_row_and_creds()
+    # row, creds = _load_first_row_and_creds()
     # api = create_exchange_client(creds)
 
     # export_bybit_history_excels(
@@ -248,6 +248,7 @@ def main() -> None:
     #     "2026-01-12",
     #     "2026-01-12",
     #     status="50",
+    #     credential_id=str(row.get("id") or ""),
     #   )
     load_dotenv()
     _, creds = _load_first_row_and_creds()
@@ -11,11 +11,13 @@ from tqdm import tqdm
 
 from bybit_p2p._exceptions import FailedRequestError
 
+from services.order_processing.chat_history import index_order_names, sync_order_chat
+from services.order_processing.details_cache import order_details_cache
 from services.order_processing.messaging import counterparty_realname, country_name
-from services.order_processing.payments import extract_iban, extract_pl_phone, extract_pln_payment_buy
+from services.order_processing.payments import extract_pln_payment_buy
 from services.orders_service import _fetch_counterparty_info
+from services.payment_contacts import chat_contact_extractor
 
-CHAT_PAGE_SIZE = 200
 ORDERS_PAGE_SIZE = 50
 
 
@@ -82,17 +84,6 @@ def _get_orders_with_fallback(
     return api.get_orders(**params), None
 
 
-def _extract_chat_items(response: Dict[str, Any]) -> List[Dict[str, Any]]:
-    if not isinstance(response, dict):
-        return []
-    result = response.get("result")
-    if isinstance(result, dict):
-        items = result.get("result") or result.get("items") or []
-    else:
-        items = []
-    return items if isinstance(items, list) else []
-
-
 def _normalize_side(value: Any) -> str:
     text = str(value).lower()
     if text in {"1", "sell"}:
@@ -212,50 +203,30 @@ def _get_my_account_id(api) -> str:
     return str(result.get("accountId") or "") if isinstance(result, dict) else ""
 
 
-def _collect_chat_contacts(api, order_id: str, my_account_id: str) -> Tuple[set[str], set[str], str]:
+def _collect_chat_contacts(
+    api, order_id: str, my_account_id: str, credential_id: str = ""
+) -> Tuple[set[str], set[str], str]:
     ibans: set[str] = set()
     phones: set[str] = set()
     last_phone = ""
     last_phone_id: Optional[int] = None
-    start_message_id: Optional[int] = None
-    while True:
-        params: Dict[str, Any] = {"orderId": order_id, "size": str(CHAT_PAGE_SIZE)}
-        if start_message_id is not None:
-            params["startMessageId"] = str(start_message_id)
-        try:
-            resp = api.get_chat_messages(**params)
-        except Exception:
-            break
-        items = _extract_chat_items(resp)
-        if not items:
-            break
-        max_id = start_message_id
-        for item in items:
-            account_id = str(item.get("accountId") or "")
-            if account_id and account_id == my_account_id:
-                continue
-            if str(item.get("contentType") or "str") != "str":
-                continue
-            msg = str(item.get("message") or "")
-            if not msg:
-                continue
-            msg_id = _parse_ms(item.get("id"))
-            iban = extract_iban(msg)
-            if iban:
-                ibans.add(iban)
-            phone = extract_pl_phone(msg)
-            if phone:
-                phones.add(phone)
-                if msg_id is not None and (last_phone_id is None or msg_id > last_phone_id):
-                    last_phone_id = msg_id
-                    last_phone = phone
-            if msg_id is not None:
-                max_id = max(max_id or msg_id, msg_id)
-        if max_id is None or max_id == start_message_id:
-            break
-        if len(items) < CHAT_PAGE_SIZE:
-            break
-        start_message_id = max_id
+    # Transcripts come from the local store; only messages past its cursor hit the API.
+    items = sync_order_chat(api, order_id, credential_id=credential_id, my_account_id=my_account_id)
+    incoming = [
+        item
+        for item in items
+        if not (item.get("accountId") and str(item.get("accountId")) == my_account_id)
+    ]
+    for item, contacts in zip(incoming, chat_contact_extractor.extract(incoming)):
+        if str(item.get("contentType") or "str") != "str" or not item.get("message"):
+            continue
+        msg_id = _parse_ms(item.get("id"))
+        ibans.update(contacts.ibans)
+        if contacts.phones:
+            phones.update(contacts.phones)
+            if msg_id is not None and (last_phone_id is None or msg_id > last_phone_id):
+                last_phone_id = msg_id
+                last_phone = contacts.phones[0]
     return ibans, phones, last_phone
 
 
@@ -278,7 +249,9 @@ def export_bybit_history_excels(
     currency_id: str | None = None,
     side: int | None = None,
     output_path: str | None = None,
+    credential_id: str = "",
 ) -> Path:
+    # ``credential_id`` tags the synced transcripts; without it /api/chats/search never returns them.
     start_dt = _parse_date_input(start_date, is_end=False)
     end_dt = _parse_date_input(end_date, is_end=True)
     orders: List[Dict[str, Any]] = []
@@ -335,13 +308,11 @@ def export_bybit_history_excels(
             order_id = str(order.get("id") or order.get("orderId") or "")
             details: Dict[str, Any] = {}
             if order_id:
-                try:
-                    resp = api.get_order_details(orderId=order_id)
-                    details = resp.get("result") if isinstance(resp, dict) else {}
-                except Exception:
-                    details = {}
+                details = order_details_cache.get(api, order) or {}
             record = details if isinstance(details, dict) and details else order
             counterparty = record.get("counterparty_info") or _fetch_counterparty_info(api, record) or {}
+            if order_id and credential_id:
+                index_order_names(record, credential_id=credential_id)
 
             side = _normalize_side(record.get("side"))
             payment_method = _payment_method_label(record)
@@ -354,12 +325,12 @@ def export_bybit_history_excels(
                 phone = _clean_missing(buy_info.get("phone", ""))
                 if order_id:
                     chat_ibans, chat_phones, last_chat_phone = _collect_chat_contacts(
-                        api, order_id, my_account_id
+                        api, order_id, my_account_id, credential_id
                     )
                     account_no = _merge_contacts(account_no, chat_ibans)
                     phone = _merge_contacts(phone, chat_phones)
             elif order_id:
-                _, _, last_chat_phone = _collect_chat_contacts(api, order_id, my_account_id)
+                _, _, last_chat_phone = _collect_chat_contacts(api, order_id, my_account_id, credential_id)
 
             if last_chat_phone:
                 phone = last_chat_phone
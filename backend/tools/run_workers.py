@@ -0,0 +1,126 @@
+"""Run background workers in N sharded processes, outside the API server.
+
+Each process joins the lease table (see repositories/lease_repository.py) and works only on the
+credentials the hash ring assigns to it; stopping or adding a process rebalances the rest.
+
+The API server must run with WORKER_SHARDING=1 as well (or not run these workers): an unsharded
+leader would process every credential next to these processes. The supervisor makes such a
+leader step down, and this script refuses to start while one holds a worker.
+
+    python -m tools.run_workers --processes 4 --workers order,pricing --start
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import signal
+import socket
+from typing import List
+
+WORKER_NAMES = ("order", "pricing", "fiat")
+
+
+def _register_workers(names: List[str]):
+    from services.auto_pricing_service import auto_pricing_worker
+    from services.fiat_balance_auto_pricing_service import fiat_balance_auto_worker
+    from services.order_processing_service import order_processing_worker
+    from services.worker_supervisor import (
+        AUTO_PRICING_WORKER,
+        FIAT_AUTO_PRICING_WORKER,
+        ORDER_PROCESSING_WORKER,
+        worker_supervisor,
+    )
+
+    workers = {
+        "order": (ORDER_PROCESSING_WORKER, order_processing_worker),
+        "pricing": (AUTO_PRICING_WORKER, auto_pricing_worker),
+        "fiat": (FIAT_AUTO_PRICING_WORKER, fiat_balance_auto_worker),
+    }
+    for name in names:
+        supervisor_name, worker = workers[name]
+        worker_supervisor.register(supervisor_name, worker, shardable=True)
+    return worker_supervisor, [workers[name][0] for name in names]
+
+
+async def _serve(names: List[str], start: bool) -> None:
+    from repositories.order_state_repository import action_log_writer
+
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop_event.set)
+
+    # Workers follow the shared desired state, so the API start/stop endpoints control them too
+    # (the API process itself only runs them when it is sharded as well).
+    supervisor, supervisor_names = _register_workers(names)
+    await action_log_writer.start()
+    if start:
+        for supervisor_name in supervisor_names:
+            await asyncio.to_thread(supervisor.store.set_desired, supervisor_name, True)
+    await supervisor.start()
+    try:
+        await stop_event.wait()
+    finally:
+        await supervisor.stop()
+        await action_log_writer.stop()
+
+
+def _check_no_unsharded_leader(names: List[str]) -> None:
+    from config import settings
+    from services.sharding import lease_store
+    from services.worker_supervisor import AUTO_PRICING_WORKER, FIAT_AUTO_PRICING_WORKER, ORDER_PROCESSING_WORKER
+
+    supervisor_names = {"order": ORDER_PROCESSING_WORKER, "pricing": AUTO_PRICING_WORKER, "fiat": FIAT_AUTO_PRICING_WORKER}
+    if settings.lease_backend == "memory":
+        raise SystemExit("LEASE_BACKEND=memory is per process; use sqlite or supabase for sharded workers")
+    store = lease_store()
+    for name in names:
+        supervisor_name = supervisor_names[name]
+        leader = store.owner(f"leader:{supervisor_name}")
+        if leader is not None:
+            raise SystemExit(
+                f"{supervisor_name} runs unsharded on {leader}; restart it with WORKER_SHARDING=1 or stop it first"
+            )
+
+
+def _process_main(worker_id: str, names: List[str], start: bool) -> None:
+    # Settings are read at import time, so the shard identity has to be in the env first.
+    os.environ["WORKER_SHARDING"] = "1"
+    os.environ["WORKER_ID"] = worker_id
+    asyncio.run(_serve(names, start))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--workers", default="order,pricing,fiat", help="comma separated: order, pricing, fiat")
+    parser.add_argument("--start", action="store_true", help="mark the selected workers as running on boot")
+    parser.add_argument("--prefix", default=socket.gethostname(), help="worker id prefix, unique per host")
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.workers.split(",") if name.strip()]
+    unknown = [name for name in names if name not in WORKER_NAMES]
+    if unknown:
+        parser.error(f"unknown workers: {', '.join(unknown)}")
+    _check_no_unsharded_leader(names)
+
+    ctx = multiprocessing.get_context("spawn")
+    processes = [
+        ctx.Process(target=_process_main, args=(f"{args.prefix}:{index}", names, args.start), name=f"worker-{index}")
+        for index in range(max(1, args.processes))
+    ]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join()
+
+
+if __name__ == "__main__":
+    main()